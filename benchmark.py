@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Benchmark Suite
+-------------------------------
+Reproducible timings for the estimation engine and the Streamlit UI.
+Every case is run several times and the median is kept. Results are written
+as JSON; comparing against a saved baseline fails the run (exit code 1)
+when any case is slower than baseline x (1 + threshold). The metrics suite
+also fails the run when disabled instrumentation slows estimate() by more
+than --max-metrics-overhead percent.
+
+Usage:
+    python benchmark.py --save bench.json
+    python benchmark.py --baseline bench.json --threshold 0.25
+    python benchmark.py --only batch --sizes 1k,100k
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+import emission_calc
+import emission_metrics
+from emission_calc import (
+    Inputs,
+    compute_minor_scope3,
+    compute_scope1_refrigerant,
+    compute_scope1_vehicle,
+    compute_scope2,
+    detailed_estimate,
+    estimate,
+    estimate_record,
+    quick_estimate_from_monthly_bill,
+)
+from emission_batch import estimate_batch
+from emission_stream import estimate_file
+
+BASE_DIR = Path(__file__).parent
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = ("1k", "100k", "10m")
+DEFAULT_STREAM_SIZES = ("1k", "100k", "10m")
+BATCH_CHUNK = 1_000_000
+# Allowed estimate() slowdown (percent) while emission_metrics is disabled
+METRICS_OVERHEAD_PCT = 5.0
+SEED = 20240101
+
+QUICK_INPUTS = Inputs(region="TW", mode="quick", monthly_bill_ntd=5000, car_count=5, motorcycles=10,
+                      use_rule_of_thumb=True)
+DETAIL_INPUTS = Inputs(region="TW", mode="detail", annual_kwh=500000, gasoline_liters_year=15000,
+                       diesel_liters_year=5000, refrigerant_leak_kg=5, refrigerant_gwp=1430,
+                       include_scope3=True, water_m3_year=2000, waste_ton_year=50)
+
+
+# === Synthetic Data ===
+
+def synthetic_columns(n, seed=SEED):
+    """
+    Deterministic portfolio columns covering every estimate() branch
+
+    Args:
+        n: Number of sites
+        seed: Random seed
+
+    Returns:
+        Dictionary of Inputs field name -> np.ndarray
+    """
+    rng = np.random.default_rng(seed)
+    quick = rng.random(n) < 0.5
+    has_fuel = rng.random(n) < 0.5
+    return {
+        "region": rng.choice(np.array(["TW", "US", "EU", "CN", "JP"]), n),
+        "monthly_bill_ntd": np.where(quick, rng.uniform(500, 50000, n), np.nan),
+        "price_per_kwh_ntd": rng.uniform(0.1, 25, n),
+        "annual_kwh": np.where(quick, np.nan, rng.uniform(1e4, 2e6, n)),
+        "car_count": rng.integers(0, 20, n).astype(np.float64),
+        "motorcycles": rng.integers(0, 40, n).astype(np.float64),
+        "gasoline_liters_year": np.where(has_fuel, rng.uniform(0, 50000, n), np.nan),
+        "diesel_liters_year": np.where(has_fuel, rng.uniform(0, 20000, n), np.nan),
+        "refrigerant_leak_kg": rng.uniform(0, 20, n),
+        "refrigerant_gwp": rng.choice(np.array([675.0, 1430.0, 2088.0]), n),
+        "include_scope3": ~quick,
+        "water_m3_year": rng.uniform(0, 5000, n),
+        "waste_ton_year": rng.uniform(0, 100, n),
+        "use_rule_of_thumb": quick,
+    }
+
+
+def synthetic_chunks(n, chunk=BATCH_CHUNK):
+    """
+    n distinct synthetic rows in blocks of at most `chunk` rows (one seed per block)
+
+    The first block equals synthetic_columns(min(n, chunk)), so sizes up to
+    one chunk see the same rows either way.
+    """
+    for i, start in enumerate(range(0, n, chunk)):
+        yield synthetic_columns(min(chunk, n - start), seed=SEED + i)
+
+
+def _write_csv(path, n):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for i, columns in enumerate(synthetic_chunks(n)):
+            if i == 0:
+                writer.writerow(list(columns))
+            block = [np.asarray(values).tolist() for values in columns.values()]
+            writer.writerows(["" if v != v else v for v in row] for row in zip(*block))
+
+
+# === Timing ===
+
+def _time(fn, repeat, number=1):
+    """Median seconds per call over `repeat` runs of `number` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings)
+
+
+def _case(seconds, items=1):
+    return {
+        "seconds": seconds,
+        "items": items,
+        "per_item_us": round(seconds / items * 1e6, 4),
+        "items_per_sec": round(items / seconds, 1) if seconds else None,
+    }
+
+
+# === Suites ===
+
+def bench_scalar(repeat):
+    """estimate() in both modes and the helper functions"""
+    number = 20_000
+    cases = {
+        "estimate_quick": lambda: estimate(QUICK_INPUTS),
+        "estimate_detail": lambda: estimate(DETAIL_INPUTS),
+        "quick_estimate_from_monthly_bill": lambda: quick_estimate_from_monthly_bill(5000, 5, 10),
+        "detailed_estimate": lambda: detailed_estimate(500000, 15000, 5000, 5, 1430, 2000, 50),
+        "compute_scope2": lambda: compute_scope2(None, 5000, 4.4, "TW"),
+        "compute_scope1_vehicle": lambda: compute_scope1_vehicle(5, 10, None, None),
+        "compute_scope1_refrigerant": lambda: compute_scope1_refrigerant(5, 1430),
+        "compute_minor_scope3": lambda: compute_minor_scope3(2000, 50),
+    }
+    return {name: _case(_time(fn, repeat, number)) for name, fn in cases.items()}
+
+
+def bench_batch(repeat, sizes):
+    """estimate_batch() at each size (distinct 1M-row chunks above that)"""
+    results = {}
+    for label in sizes:
+        n = SIZES[label]
+        if n <= BATCH_CHUNK:
+            columns = synthetic_columns(n)
+            seconds = _time(lambda: estimate_batch(columns), repeat)
+        else:
+            # Too many rows to hold at once: generate each chunk, then time scoring it
+            seconds = sum(_time(lambda: estimate_batch(columns), 1) for columns in synthetic_chunks(n))
+        results[f"batch_{label}"] = _case(seconds, n)
+    return results
+
+
+def bench_stream(repeat, sizes):
+    """CSV -> CSV streaming estimator at each size"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in sizes:
+            n = SIZES[label]
+            source = os.path.join(tmp, f"sites_{label}.csv")
+            output = os.path.join(tmp, f"results_{label}.csv")
+            _write_csv(source, n)
+            runs = repeat if n <= 100_000 else 1
+            results[f"stream_csv_{label}"] = _case(_time(lambda: estimate_file(source, output), runs), n)
+    return results
+
+
+def _calculator_fragment_script(page_path, fragment):
+    """AppTest script that renders one Calculator.py fragment (what a fragment rerun executes)"""
+    import importlib.util
+    import sys
+
+    page = sys.modules.get("calculator_page")
+    if page is None:
+        spec = importlib.util.spec_from_file_location("calculator_page", page_path)
+        page = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(page)
+        sys.modules["calculator_page"] = page
+    getattr(page, fragment)("TW")
+
+
+def bench_ui(repeat):
+    """
+    Streamlit Calculator.py latency via the headless AppTest harness
+
+    AppTest always reruns whole scripts, so fragment-scoped reruns are timed by
+    running each fragment on its own as the app script.
+    """
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+
+    script = str(BASE_DIR / "pages" / "Calculator.py")
+    prices = iter(np.linspace(3.0, 6.0, 10_000).tolist())
+
+    def first_run():
+        AppTest.from_file(script, default_timeout=30).run()
+
+    # Full-page reruns: what every interaction cost before fragments
+    app = AppTest.from_file(script, default_timeout=30).run()
+    app.button(key="calc_quick_submit").click().run()  # so the results section renders
+
+    def page_price_change():
+        app.number_input(key="calc_price_kwh").set_value(next(prices)).run()
+
+    def page_calculate():
+        app.button(key="calc_quick_submit").click().run()
+
+    # Fragment reruns: what a widget change inside one fragment costs now
+    def fragment_app(fragment):
+        return AppTest.from_function(
+            _calculator_fragment_script, args=(script, fragment), default_timeout=30
+        ).run()
+
+    quick = fragment_app("quick_mode_tab")
+    detailed = fragment_app("detailed_mode_tab")
+
+    def quick_price_change():
+        quick.number_input(key="calc_price_kwh").set_value(next(prices)).run()
+
+    def detailed_kwh_change():
+        detailed.number_input(key="calc_annual_kwh").set_value(int(next(prices) * 100000)).run()
+
+    return {
+        "ui_calculator_first_run": _case(_time(first_run, repeat)),
+        "ui_calculator_page_rerun": _case(_time(page_price_change, repeat)),
+        "ui_calculator_calculate": _case(_time(page_calculate, repeat)),
+        "ui_fragment_quick_price_change": _case(_time(quick_price_change, repeat)),
+        "ui_fragment_detailed_input_change": _case(_time(detailed_kwh_change, repeat)),
+    }
+
+
+def _reference_estimate(inputs):
+    """
+    Copy of estimate()'s pipeline with no hook or instrumentation check at all
+
+    The overhead reference: it does not call emission_calc._estimate_components,
+    so checks added there show up as metrics_disabled overhead.
+    """
+    factors, ef_grid = emission_calc.resolve_factors(inputs)
+    s2 = emission_calc.compute_scope2(
+        inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region, ef_grid
+    )
+    s1v = emission_calc.compute_scope1_vehicle(
+        inputs.car_count, inputs.motorcycles, inputs.gasoline_liters_year, inputs.diesel_liters_year,
+        factors.get("gasoline"), factors.get("diesel"),
+    )
+    s1r = emission_calc.compute_scope1_refrigerant(inputs.refrigerant_leak_kg, inputs.refrigerant_gwp)
+    s3_minor = emission_calc.compute_minor_scope3(
+        inputs.water_m3_year, inputs.waste_ton_year, factors.get("water"), factors.get("waste")
+    ) if inputs.include_scope3 else 0
+    s1v, s1r, s1, total = emission_calc._combine_totals(s2, s1v, s1r, inputs.use_rule_of_thumb)
+    return emission_calc._build_result(inputs.region, ef_grid, s2, s1v, s1r, s1, total, s3_minor)
+
+
+def bench_metrics(repeat):
+    """
+    Instrumentation overhead: disabled vs. no hook at all, and enabled
+
+    Each variant keeps its fastest run, which is less sensitive to scheduler
+    noise than the median when comparing a few percent.
+    """
+    number = 20_000
+    previous = emission_metrics.current()
+    metrics = emission_metrics.EstimateMetrics()
+
+    # Interleave the variants so drift and warm-up affect them equally
+    samples = {"reference": [], "disabled": [], "enabled": []}
+    try:
+        emission_metrics.disable()
+        for _ in range(repeat):
+            samples["reference"].append(_time(lambda: _reference_estimate(DETAIL_INPUTS), 1, number))
+            samples["disabled"].append(_time(lambda: estimate(DETAIL_INPUTS), 1, number))
+            emission_metrics.enable(metrics)
+            samples["enabled"].append(_time(lambda: estimate(DETAIL_INPUTS), 1, number))
+            emission_metrics.disable()
+    finally:
+        emission_metrics.enable(previous) if previous else emission_metrics.disable()
+    reference, disabled, enabled = (min(values) for values in samples.values())
+
+    results = {
+        "metrics_reference": _case(reference),
+        "metrics_disabled": _case(disabled),
+        "metrics_enabled": _case(enabled),
+    }
+    results["metrics_disabled"]["overhead_pct"] = round((disabled / reference - 1) * 100, 2)
+    results["metrics_enabled"]["overhead_pct"] = round((enabled / reference - 1) * 100, 2)
+    return results
+
+
+def _retained_bytes(fn, count=10_000):
+    """Bytes still allocated per call when `count` results are kept alive"""
+    keep = [fn()]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        keep = [fn() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Discount the list holding the results
+    return round((after - before - sys.getsizeof(keep)) / len(keep))
+
+
+def bench_result(repeat):
+    """estimate() dictionaries vs. lazy EstimateResult records: time and retained bytes per call"""
+    number = 20_000
+    cases = {
+        "result_dict": lambda: estimate(DETAIL_INPUTS),
+        "result_record": lambda: estimate_record(DETAIL_INPUTS),
+        "result_dict_total": lambda: estimate(DETAIL_INPUTS)["Total_S1S2"],
+        "result_record_total": lambda: estimate_record(DETAIL_INPUTS).Total_S1S2,
+        "result_dict_json": lambda: json.dumps(estimate(DETAIL_INPUTS)),
+        "result_record_json": lambda: estimate_record(DETAIL_INPUTS).to_json(),
+        "result_record_msgpack": lambda: estimate_record(DETAIL_INPUTS).to_msgpack(),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = _case(_time(fn, repeat, number))
+        results[name]["bytes_per_call"] = _retained_bytes(fn)
+    return results
+
+
+SUITES = ("scalar", "batch", "stream", "ui", "metrics", "result")
+
+
+def run_benchmarks(only=SUITES, repeat=5, sizes=DEFAULT_SIZES, stream_sizes=DEFAULT_STREAM_SIZES):
+    """
+    Run the selected benchmark suites
+
+    Args:
+        only: Suite names to run
+        repeat: Runs per case (median is kept)
+        sizes: Size labels for the batch suite
+        stream_sizes: Size labels for the streaming suite
+
+    Returns:
+        Dictionary with meta information and per-case results
+    """
+    results = {}
+    if "scalar" in only:
+        results.update(bench_scalar(repeat))
+    if "batch" in only:
+        results.update(bench_batch(repeat, sizes))
+    if "stream" in only:
+        results.update(bench_stream(repeat, stream_sizes))
+    if "ui" in only:
+        results.update(bench_ui(repeat))
+    if "metrics" in only:
+        results.update(bench_metrics(repeat))
+    if "result" in only:
+        results.update(bench_result(repeat))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Compare a run against a baseline
+
+    Args:
+        current: run_benchmarks() output
+        baseline: Earlier run_benchmarks() output
+        threshold: Allowed relative slowdown (0.2 = 20%)
+
+    Returns:
+        List of (case, baseline_seconds, current_seconds, ratio) for regressions
+    """
+    regressions = []
+    for name, case in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous or not previous["seconds"]:
+            continue
+        ratio = case["seconds"] / previous["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["seconds"], case["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emission engine benchmark suite")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"Comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"Batch sizes ({', '.join(SIZES)})")
+    parser.add_argument("--stream-sizes", default=",".join(DEFAULT_STREAM_SIZES), help="Streaming CSV sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the median is kept")
+    parser.add_argument("--save", help="Write results JSON to this path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--max-metrics-overhead", type=float, default=METRICS_OVERHEAD_PCT,
+                        help="Allowed estimate() slowdown with metrics disabled, in percent (metrics suite)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        only=args.only.split(","),
+        repeat=args.repeat,
+        sizes=[s for s in args.sizes.split(",") if s],
+        stream_sizes=[s for s in args.stream_sizes.split(",") if s],
+    )
+
+    for name, case in report["results"].items():
+        overhead = f"  ({case['overhead_pct']:+.1f}%)" if "overhead_pct" in case else ""
+        retained = f"  {case['bytes_per_call']:6d} B/call" if "bytes_per_call" in case else ""
+        print(f"{name:36s} {case['seconds'] * 1000:12.3f} ms  {case['per_item_us']:12.4f} µs/item{overhead}{retained}")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    disabled = report["results"].get("metrics_disabled")
+    if disabled is not None and disabled["overhead_pct"] > args.max_metrics_overhead:
+        print(f"❌ estimate() with metrics disabled is {disabled['overhead_pct']:+.1f}% slower than the "
+              f"hook-free pipeline (allowed {args.max_metrics_overhead:.1f}%)", file=sys.stderr)
+        return 1
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"❌ {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Abatement Planner
+---------------------------------
+Ranks reduction measures across a portfolio. A catalog of measures (energy
+efficiency, fleet electrification, refrigerant swaps) is evaluated against
+every site at once: measure parameters form an (M, 1) column that broadcasts
+against the (1, N) site columns through the same vectorized components as
+estimate_batch(). Every (site, measure) pair that lowers Total_S1S2 becomes
+an option with its abatement, upfront cost and annualized cost per tonne.
+
+The portfolio MACC (marginal abatement cost curve) aggregates the options by
+measure. plan() picks the most cost-effective options under a budget and/or a
+count limit: each measure's options are sorted once in NumPy, and a heap
+holding one head per measure merges them lazily, so a small k stops after a
+few thousand options instead of ordering millions of pairs in Python.
+At most one measure per site is taken for each kind, since two efficiency
+retrofits at the same site would not both save their full share.
+
+Costs are in the currency of price_per_kwh_ntd. Annual cost is capex spread
+over the measure's lifetime, less the electricity it saves (or plus what an
+electrified fleet buys). Fuel savings are not priced.
+
+Example:
+    measures = [
+        Measure("LED retrofit", "efficiency", 0.12, fixed_cost=20000, unit_cost=800),
+        Measure("EV fleet 50%", "electrification", 0.5, unit_cost=400000),
+        Measure("R-32 swap", "refrigerant_swap", 675, fixed_cost=60000),
+    ]
+    options = evaluate_measures(columns, measures)
+    options.macc()                          # cost-ordered bars per measure
+    options.plan(budget=5_000_000, k=100)   # chosen (site, measure) pairs
+"""
+
+import csv
+import heapq
+from dataclasses import dataclass
+
+import numpy as np
+
+import emission_calc
+from emission_batch import (
+    batch_factors,
+    combine_batch,
+    prepare_columns,
+    round_like_python,
+    scope1_refrigerant_batch,
+    scope1_vehicle_batch,
+    scope2_batch,
+)
+from emission_market import consumption_kwh
+
+# amount is the kWh share saved, the fleet share electrified, or the new GWP
+MEASURE_KINDS = ("efficiency", "electrification", "refrigerant_swap")
+MEASURE_FIELDS = ("name", "kind", "amount", "fixed_cost", "unit_cost", "lifetime_years")
+# unit_cost applies per MWh saved per year, per vehicle electrified, or per kg leaked per year
+MEASURE_UNITS = {"efficiency": "MWh", "electrification": "vehicle", "refrigerant_swap": "kg"}
+DEFAULT_EV_KWH_PER_KM = 0.18
+DEFAULT_LIFETIME_YEARS = 10
+# Cells (measures x sites) evaluated per chunk
+CHUNK_CELLS = 1 << 20
+# Options converted to Python values at a time while merging in plan()
+STREAM_CHUNK = 4096
+
+
+@dataclass(frozen=True)
+class Measure:
+    """One abatement measure from the catalog"""
+
+    name: str
+    kind: str
+    amount: float
+    fixed_cost: float = 0.0
+    unit_cost: float = 0.0
+    lifetime_years: float = DEFAULT_LIFETIME_YEARS
+
+    def __post_init__(self):
+        if self.kind not in MEASURE_KINDS:
+            raise ValueError(f"Unknown measure kind {self.kind!r}; expected one of {MEASURE_KINDS}")
+        if self.lifetime_years <= 0:
+            raise ValueError(f"{self.name}: lifetime_years must be positive")
+        if self.kind != "refrigerant_swap" and not 0 <= self.amount <= 1:
+            raise ValueError(f"{self.name}: {self.kind} amount is a share between 0 and 1")
+
+
+def read_measures(path, report=None):
+    """
+    Read a measure catalog from a CSV with MEASURE_FIELDS columns
+
+    A refrigerant_swap amount may name a refrigerant (e.g. R-32), which is
+    resolved through emission_refrigerants.
+
+    Args:
+        path: CSV file path
+        report: Assessment report for refrigerant names (default: catalog default)
+
+    Returns:
+        List of Measure
+    """
+    measures = []
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle):
+            amount = row["amount"].strip()
+            try:
+                amount = float(amount)
+            except ValueError:
+                from emission_refrigerants import DEFAULT_REPORT, default_catalog
+                amount = default_catalog().gwp(amount, report or DEFAULT_REPORT)
+            measures.append(Measure(
+                name=row["name"].strip(),
+                kind=row["kind"].strip(),
+                amount=amount,
+                fixed_cost=float(row.get("fixed_cost") or 0.0),
+                unit_cost=float(row.get("unit_cost") or 0.0),
+                lifetime_years=float(row.get("lifetime_years") or DEFAULT_LIFETIME_YEARS),
+            ))
+    return measures
+
+
+class AbatementOptions:
+    """
+    Every (site, measure) pair that reduces Total_S1S2
+
+    Attributes:
+        measures: The evaluated catalog
+        site_index, measure_index: Pair coordinates (np.ndarray of int64)
+        abatement_t: Annual reduction in Total_S1S2 (tCO2e)
+        capex: Upfront cost
+        annual_cost: Annualized capex less electricity savings
+        cost_per_t: annual_cost / abatement_t
+    """
+
+    def __init__(self, measures, site_index, measure_index, abatement_t, capex, annual_cost):
+        self.measures = list(measures)
+        self.site_index = site_index
+        self.measure_index = measure_index
+        self.abatement_t = abatement_t
+        self.capex = capex
+        self.annual_cost = annual_cost
+        self.cost_per_t = annual_cost / abatement_t
+        self._order = None
+
+    def __len__(self):
+        return self.site_index.size
+
+    def macc(self):
+        """
+        Portfolio marginal abatement cost curve
+
+        Returns:
+            Dictionary of columns, one row per measure in ascending cost per
+            tonne: Measure, Kind, Sites, Abatement_t, Capex, Annual_Cost,
+            Cost_per_t and Cumulative_Abatement_t
+        """
+        m = len(self.measures)
+        sites = np.bincount(self.measure_index, minlength=m)
+        abatement = np.bincount(self.measure_index, weights=self.abatement_t, minlength=m)
+        capex = np.bincount(self.measure_index, weights=self.capex, minlength=m)
+        annual = np.bincount(self.measure_index, weights=self.annual_cost, minlength=m)
+        keep = np.flatnonzero(sites)
+        cost = annual[keep] / abatement[keep]
+        order = keep[np.argsort(cost, kind="stable")]
+        return {
+            "Measure": np.array([self.measures[i].name for i in order.tolist()], dtype=str),
+            "Kind": np.array([self.measures[i].kind for i in order.tolist()], dtype=str),
+            "Sites": sites[order],
+            "Abatement_t": round_like_python(abatement[order], 2),
+            "Capex": round_like_python(capex[order], 0),
+            "Annual_Cost": round_like_python(annual[order], 0),
+            "Cost_per_t": round_like_python(annual[order] / abatement[order], 2),
+            "Cumulative_Abatement_t": round_like_python(np.cumsum(abatement[order]), 2),
+        }
+
+    def _cost_order(self):
+        """Option indices sorted by (measure, cost per tonne), plus each measure's bounds"""
+        if self._order is None:
+            order = np.lexsort((self.cost_per_t, self.measure_index))
+            bounds = np.searchsorted(self.measure_index[order], np.arange(len(self.measures) + 1))
+            self._order = (order, bounds)
+        return self._order
+
+    def _stream(self, indices, slots):
+        """(cost per tonne, option, slot, capex) tuples of one measure, converted in chunks"""
+        for lo in range(0, indices.size, STREAM_CHUNK):
+            chunk = indices[lo:lo + STREAM_CHUNK]
+            yield from zip(self.cost_per_t[chunk].tolist(), chunk.tolist(),
+                           slots[chunk].tolist(), self.capex[chunk].tolist())
+
+    def plan(self, budget=None, k=None):
+        """
+        Most cost-effective options under a capex budget and/or count limit
+
+        Options are taken in ascending cost per tonne, merging the per-measure
+        cost orders through a heap that holds one head per measure. An option
+        is skipped if its site already has a measure of the same kind or if
+        its capex no longer fits the remaining budget.
+
+        Args:
+            budget: Maximum total capex (default: unlimited)
+            k: Maximum number of options (default: unlimited)
+
+        Returns:
+            Dictionary of columns: site_index, Measure, Abatement_t, Capex,
+            Annual_Cost and Cost_per_t, in selection order
+        """
+        k = len(self) if k is None else int(k)
+        left = np.inf if budget is None else float(budget)
+        kinds = np.array([MEASURE_KINDS.index(measure.kind) for measure in self.measures], dtype=np.int64)
+        slots = self.site_index * len(MEASURE_KINDS) + kinds[self.measure_index]
+        # Once the budget is below the cheapest positive capex, only free options can still fit
+        floor = float(self.capex[self.capex > 0].min(initial=np.inf))
+        order, bounds = self._cost_order()
+
+        chosen, taken = [], set()
+        streams = [self._stream(order[lo:hi], slots) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+        for _, i, slot, capex in heapq.merge(*streams):
+            if len(chosen) >= k or left < floor:
+                break
+            if slot in taken or capex > left:
+                continue
+            taken.add(slot)
+            left -= capex
+            chosen.append(i)
+
+        if left < floor and len(chosen) < k:
+            # Remaining free options, in the merge's (cost per tonne, option) order;
+            # those the merge already passed were chosen or have their slot taken
+            free = np.flatnonzero(self.capex <= left)
+            free = free[np.lexsort((free, self.cost_per_t[free]))]
+            for i, slot, capex in zip(free.tolist(), slots[free].tolist(), self.capex[free].tolist()):
+                if len(chosen) >= k:
+                    break
+                if slot in taken:
+                    continue
+                taken.add(slot)
+                left -= capex
+                chosen.append(i)
+
+        chosen = np.array(chosen, dtype=np.int64)
+        return {
+            "site_index": self.site_index[chosen],
+            "Measure": np.array([self.measures[i].name for i in self.measure_index[chosen].tolist()], dtype=str),
+            "Abatement_t": self.abatement_t[chosen],
+            "Capex": self.capex[chosen],
+            "Annual_Cost": self.annual_cost[chosen],
+            "Cost_per_t": self.cost_per_t[chosen],
+        }
+
+
+def evaluate_measures(columns, measures, factor_set=None, ev_kwh_per_km=DEFAULT_EV_KWH_PER_KM):
+    """
+    Evaluate a measure catalog against every site
+
+    Args:
+        columns: estimate_batch() input columns
+        measures: Sequence of Measure
+        factor_set: Optional factor-set version or FactorSet (emission_factors)
+        ev_kwh_per_km: Electricity an electrified vehicle uses per km
+
+    Returns:
+        AbatementOptions
+    """
+    measures = list(measures)
+    col = prepare_columns(columns)
+    factors = batch_factors(col["region"], factor_set)
+    n = col["region"].size
+    grid = np.broadcast_to(factors["grid"], (n,))
+
+    kwh = consumption_kwh(col)
+    price = col["price_per_kwh_ntd"]
+    car, mc = col["car_count"], col["motorcycles"]
+    gas, diesel = col["gasoline_liters_year"], col["diesel_liters_year"]
+    leak, gwp = col["refrigerant_leak_kg"], col["refrigerant_gwp"]
+    vehicle_args = (factors["gasoline"], factors["diesel"], factors["car_t_per_year"])
+
+    s2 = scope2_batch(col["annual_kwh"], col["monthly_bill_ntd"], price, grid)
+    s1v = scope1_vehicle_batch(car, mc, gas, diesel, *vehicle_args)
+    s1r = scope1_refrigerant_batch(leak, gwp)
+    s3 = np.zeros(n)
+    rule = col["use_rule_of_thumb"]
+    base = combine_batch(s2, s1v, s1r, s3, rule)["Total_S1S2"]
+
+    # Distance the fleet drives: from fuel where liters are reported, else from the car count
+    fuel_liters = np.nan_to_num(gas, nan=0.0) + np.nan_to_num(diesel, nan=0.0)
+    fleet_km = np.where(fuel_liters > 0, fuel_liters * emission_calc.DEFAULT_CAR_KM_PER_L,
+                        car * emission_calc.DEFAULT_CAR_KM_PER_YEAR)
+    vehicles = np.where(fuel_liters > 0, fleet_km / emission_calc.DEFAULT_CAR_KM_PER_YEAR, car)
+
+    kind = np.array([measure.kind for measure in measures], dtype=str)[:, None]
+    amount = np.array([measure.amount for measure in measures], dtype=np.float64)[:, None]
+    fixed = np.array([measure.fixed_cost for measure in measures], dtype=np.float64)[:, None]
+    unit = np.array([measure.unit_cost for measure in measures], dtype=np.float64)[:, None]
+    lifetime = np.array([measure.lifetime_years for measure in measures], dtype=np.float64)[:, None]
+    saved_share = np.where(kind == "efficiency", amount, 0.0)
+    ev_share = np.where(kind == "electrification", amount, 0.0)
+    swap = kind == "refrigerant_swap"
+
+    sites, picks, abatement, capex, annual = [], [], [], [], []
+    step = max(1, CHUNK_CELLS // max(n, 1))
+    for lo in range(0, len(measures), step):
+        rows = slice(lo, lo + step)
+        saved_kwh = kwh * saved_share[rows]
+        added_kwh = fleet_km * ev_share[rows] * ev_kwh_per_km
+        keep = 1 - ev_share[rows]
+        total = combine_batch(
+            (kwh - saved_kwh + added_kwh) * grid / 1000,
+            scope1_vehicle_batch(car * keep, mc, gas * keep, diesel * keep, *vehicle_args),
+            scope1_refrigerant_batch(leak, np.where(swap[rows], amount[rows], gwp)),
+            s3,
+            rule,
+        )["Total_S1S2"]
+        reduction = base - total
+        measure_at, site_at = np.nonzero(reduction > 1e-12)
+
+        units = np.select(
+            [kind[rows] == "efficiency", kind[rows] == "electrification"],
+            [saved_kwh / 1000, vehicles * ev_share[rows]],
+            np.broadcast_to(leak, reduction.shape),
+        )[measure_at, site_at]
+        cost = fixed[rows][measure_at, 0] + unit[rows][measure_at, 0] * units
+        energy = ((saved_kwh - added_kwh) * price)[measure_at, site_at]
+        sites.append(site_at)
+        picks.append(measure_at + lo)
+        abatement.append(reduction[measure_at, site_at])
+        capex.append(cost)
+        annual.append(cost / lifetime[rows][measure_at, 0] - energy)
+
+    empty = [np.empty(0, dtype=np.int64)]
+    return AbatementOptions(
+        measures,
+        np.concatenate(sites or empty).astype(np.int64),
+        np.concatenate(picks or empty).astype(np.int64),
+        np.concatenate(abatement or [np.empty(0)]),
+        np.concatenate(capex or [np.empty(0)]),
+        np.concatenate(annual or [np.empty(0)]),
+    )
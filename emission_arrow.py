@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Arrow / pandas Interop
+--------------------------------------
+Columnar entry points for pipelines that already hold site data as Apache
+Arrow record batches or pandas DataFrames. Input columns are handed to the
+batch engine as NumPy views of the Arrow (or DataFrame) buffers, and result
+columns come back wrapped in a fixed Arrow schema (result_schema()) without a
+copy. No Inputs objects, result dictionaries or per-row Python values are
+created in between.
+
+Zero-copy applies to float64 columns without nulls, which is the common case.
+Nulls, other numeric types and the bit-packed Arrow booleans are converted
+once per column. Region labels (countries, subregions such as "US-CAMX", or
+unknown labels) are passed to the batch engine as is, so results match
+estimate_batch(). The Region result column is dictionary-encoded over each
+batch's own distinct labels.
+
+Requires pyarrow (and pandas for the DataFrame entry point).
+
+Example:
+    table = pyarrow.parquet.read_table("sites.parquet")
+    results = estimate_arrow(table, keep=("site_id",))      # pyarrow.Table
+    df = estimate_dataframe(sites_df, keep=("site_id",))    # pandas.DataFrame
+"""
+
+import numpy as np
+
+from emission_batch import (
+    BOOL_FIELDS,
+    FLOAT_FIELDS,
+    INPUT_DEFAULTS,
+    INPUT_FIELDS,
+    OPTIONAL_FLOAT_FIELDS,
+    RESULT_COLUMNS,
+    estimate_batch,
+)
+
+# mode is a UI label only; it does not change any result column
+ARROW_INPUT_FIELDS = tuple(name for name in INPUT_FIELDS if name != "mode")
+_schema = None
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow interop requires pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("DataFrame interop requires pandas (pip install pandas)") from None
+    return pandas
+
+
+def result_schema():
+    """
+    Fixed Arrow schema of estimate_arrow() results
+
+    Every emission and share column is a non-nullable float64; Region is
+    dictionary<int32, string> over the distinct labels of each batch.
+
+    Returns:
+        pyarrow.Schema
+    """
+    global _schema
+    if _schema is None:
+        pa = _pyarrow()
+        _schema = pa.schema([
+            pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name == "Region" else pa.float64(),
+                     nullable=False)
+            for name in RESULT_COLUMNS
+        ])
+    return _schema
+
+
+# === Inputs ===
+
+def _float_view(array, name):
+    """float64 NumPy view of an Arrow array (copied only for nulls or other types)"""
+    pa = _pyarrow()
+    if array.null_count:
+        default = INPUT_DEFAULTS[name]
+        fill = np.nan if name in OPTIONAL_FLOAT_FIELDS or default is None else float(default)
+        array = array.cast(pa.float64()).fill_null(fill)
+    elif array.type != pa.float64():
+        array = array.cast(pa.float64())
+    return array.to_numpy(zero_copy_only=True)
+
+
+def _bool_values(array, name):
+    """Booleans are bit-packed in Arrow, so this is always a (small) conversion"""
+    if array.null_count:
+        array = array.fill_null(INPUT_DEFAULTS[name])
+    return array.to_numpy(zero_copy_only=False).astype(bool, copy=False)
+
+
+def arrow_regions(array):
+    """
+    Region column as a null-free dictionary<int32, string> Arrow array
+
+    Labels are kept as they are (subregions and unknown labels included);
+    nulls take the Inputs default region, as in estimate().
+
+    Args:
+        array: pyarrow string / large_string / dictionary Array
+
+    Returns:
+        pyarrow.DictionaryArray
+    """
+    pa = _pyarrow()
+    if not pa.types.is_dictionary(array.type):
+        array = array.dictionary_encode()
+    dictionary = array.dictionary.cast(pa.string())
+    indices = array.indices.cast(pa.int32())
+    if indices.null_count:
+        labels = dictionary.to_pylist()
+        default = INPUT_DEFAULTS["region"]
+        if default not in labels:
+            labels.append(default)
+            dictionary = pa.array(labels, type=pa.string())
+        indices = indices.fill_null(labels.index(default))
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def _default_regions(n):
+    pa = _pyarrow()
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(n, dtype=np.int32)), pa.array([INPUT_DEFAULTS["region"]], type=pa.string())
+    )
+
+
+def _region_labels(regions):
+    """Per-row label array of a dictionary array (one lookup per distinct label)"""
+    labels = np.asarray(regions.dictionary.to_numpy(zero_copy_only=False), dtype=str)
+    return labels[regions.indices.to_numpy(zero_copy_only=True)]
+
+
+def arrow_to_columns(batch):
+    """
+    estimate_batch() input columns from an Arrow record batch
+
+    Columns not named after Inputs fields (site_id, ...) are ignored, and
+    missing fields take the Inputs defaults.
+
+    Args:
+        batch: pyarrow.RecordBatch
+
+    Returns:
+        Dictionary of Inputs field name -> np.ndarray (float columns are views
+        of the Arrow buffers; region holds the labels)
+    """
+    columns, regions = _arrow_columns(batch)
+    if regions is not None:
+        columns["region"] = _region_labels(regions)
+    return columns
+
+
+def _arrow_columns(batch):
+    """Input columns without region, plus the arrow_regions() array (None without a region column)"""
+    columns, regions = {}, None
+    for name in ARROW_INPUT_FIELDS:
+        index = batch.schema.get_field_index(name)
+        if index < 0:
+            continue
+        array = batch.column(index)
+        if name in FLOAT_FIELDS:
+            columns[name] = _float_view(array, name)
+        elif name in BOOL_FIELDS:
+            columns[name] = _bool_values(array, name)
+        else:
+            regions = arrow_regions(array)
+    return columns, regions
+
+
+# === Results ===
+
+def results_to_arrow(results, regions=None, keep=None):
+    """
+    Wrap estimate_batch() result columns in a result_schema() record batch
+
+    Args:
+        results: estimate_batch() result dictionary
+        regions: Optional Region column as an arrow_regions() dictionary
+            array (default: dictionary-encode results["Region"])
+        keep: Optional mapping of extra column name -> pyarrow Array to append
+
+    Returns:
+        pyarrow.RecordBatch whose float columns share the NumPy buffers
+    """
+    pa = _pyarrow()
+    schema = result_schema()
+    if regions is None:
+        regions = arrow_regions(pa.array(results["Region"], type=pa.string()))
+    arrays = [
+        regions if name == "Region" else pa.array(results[name], type=pa.float64())
+        for name in RESULT_COLUMNS
+    ]
+    for name, array in (keep or {}).items():
+        schema = schema.append(pa.field(name, array.type))
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _estimate_record_batch(batch, round_output, factor_set, keep):
+    columns, regions = _arrow_columns(batch)
+    if regions is None:
+        regions = _default_regions(batch.num_rows)
+    # The region labels always carry the row count, even if every other field is defaulted
+    columns["region"] = _region_labels(regions)
+    results = estimate_batch(columns, round_output=round_output, factor_set=factor_set)
+    return results_to_arrow(results, regions, {name: batch.column(name) for name in keep})
+
+
+def _output_schema(source_schema, keep):
+    schema = result_schema()
+    source_schema = getattr(source_schema, "schema", source_schema)
+    for name in keep:
+        schema = schema.append(source_schema.field(name))
+    return schema
+
+
+def estimate_arrow(data, round_output=True, factor_set=None, keep=()):
+    """
+    Vectorized estimate() over Arrow data
+
+    Args:
+        data: pyarrow.RecordBatch, Table (processed batch by batch) or
+            RecordBatchReader (streamed lazily)
+        round_output: Round like estimate(); set False for raw float columns
+        factor_set: Optional factor-set version or FactorSet (emission_factors)
+        keep: Input columns to carry over unchanged (e.g. ("site_id",))
+
+    Returns:
+        Same kind of object as data, with result_schema() columns followed by
+        the kept columns
+    """
+    pa = _pyarrow()
+    keep = tuple(keep)
+    if isinstance(data, pa.RecordBatch):
+        return _estimate_record_batch(data, round_output, factor_set, keep)
+    if isinstance(data, pa.Table):
+        return pa.Table.from_batches(
+            [_estimate_record_batch(batch, round_output, factor_set, keep) for batch in data.to_batches()],
+            schema=_output_schema(data, keep),
+        )
+    if isinstance(data, pa.RecordBatchReader):
+        batches = (_estimate_record_batch(batch, round_output, factor_set, keep) for batch in data)
+        return pa.RecordBatchReader.from_batches(_output_schema(data.schema, keep), batches)
+    raise TypeError(f"Expected a pyarrow RecordBatch, Table or RecordBatchReader, got {type(data).__name__}")
+
+
+# === pandas ===
+
+def dataframe_to_columns(frame):
+    """
+    estimate_batch() input columns from a pandas DataFrame
+
+    float64 columns are passed as views of the DataFrame's arrays; Categorical
+    (or string) regions are mapped to labels per category, not per row.
+
+    Args:
+        frame: pandas.DataFrame with columns named after Inputs fields
+
+    Returns:
+        Dictionary of Inputs field name -> np.ndarray (region as labels)
+    """
+    columns = {}
+    for name in ARROW_INPUT_FIELDS:
+        if name not in frame.columns:
+            continue
+        series = frame[name]
+        if name in FLOAT_FIELDS:
+            default = INPUT_DEFAULTS[name]
+            values = series.to_numpy() if series.dtype == np.float64 else \
+                series.to_numpy(dtype=np.float64, na_value=np.nan)
+            if default is not None and name not in OPTIONAL_FLOAT_FIELDS and np.isnan(values).any():
+                values = np.where(np.isnan(values), float(default), values)
+            columns[name] = values
+        elif name in BOOL_FIELDS:
+            columns[name] = series.fillna(INPUT_DEFAULTS[name]).to_numpy(dtype=bool)
+        else:
+            categories, codes = _frame_regions(series)
+            columns[name] = np.asarray(categories, dtype=str)[codes]
+    return columns
+
+
+def _frame_regions(series):
+    """(category labels, code per row) of a region Series; missing values take the default region"""
+    pd = _pandas()
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype("category")
+    categories = [str(label) for label in series.cat.categories]
+    codes = series.cat.codes.to_numpy()
+    if (codes < 0).any():
+        default = INPUT_DEFAULTS["region"]
+        if default not in categories:
+            categories.append(default)
+        codes = np.where(codes < 0, categories.index(default), codes)
+    return categories, codes
+
+
+def estimate_dataframe(frame, round_output=True, factor_set=None, keep=()):
+    """
+    Vectorized estimate() over a pandas DataFrame
+
+    Args:
+        frame: pandas.DataFrame with columns named after Inputs fields
+        round_output: Round like estimate(); set False for raw float columns
+        factor_set: Optional factor-set version or FactorSet (emission_factors)
+        keep: Input columns to carry over unchanged (e.g. ("site_id",))
+
+    Returns:
+        pandas.DataFrame of RESULT_COLUMNS (Region as a Categorical) plus the
+        kept columns, sharing the result arrays and the frame's index
+    """
+    pd = _pandas()
+    columns = dataframe_to_columns(frame)
+    if "region" in frame.columns:
+        categories, codes = _frame_regions(frame["region"])
+    else:
+        categories, codes = [INPUT_DEFAULTS["region"]], np.zeros(len(frame), dtype=np.int8)
+        columns["region"] = np.full(len(frame), INPUT_DEFAULTS["region"])
+    results = estimate_batch(columns, round_output=round_output, factor_set=factor_set)
+    data = {
+        name: pd.Categorical.from_codes(codes, categories=categories) if name == "Region"
+        else results[name]
+        for name in RESULT_COLUMNS
+    }
+    data.update({name: frame[name] for name in keep})
+    return pd.DataFrame(data, index=frame.index, copy=False)
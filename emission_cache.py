@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Cache Module
+----------------------------
+Opt-in memoization for estimate() and the UI helper functions.
+Results are cached under a canonical key that keeps only the Inputs fields
+that can change the result, with LRU + TTL eviction and automatic
+invalidation whenever the emission-factor tables or factor-set values change.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import emission_calc
+from emission_calc import detailed_inputs, quick_inputs_from_monthly_bill
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "expirations", "invalidations", "currsize", "maxsize"]
+)
+
+# Digits kept when normalizing floats, so 0.1 + 0.2 and 0.3 share a key
+FLOAT_DIGITS = 9
+
+
+def _norm(value):
+    """Normalize a float field for use in a cache key"""
+    if value is None:
+        return None
+    return round(float(value), FLOAT_DIGITS)
+
+
+def canonical_key(inputs, ef_grid=None):
+    """
+    Canonical, hashable form of Inputs for memoization
+
+    Only fields that can change estimate() output are kept:
+    - mode never affects the result
+    - monthly bill / price are ignored when annual_kwh is given
+    - car / motorcycle counts are ignored when fuel liters are given, and
+      fuel liters are ignored (None == 0) when the fleet heuristic is used
+    - refrigerant GWP is ignored when there is no leakage
+    - water / waste are ignored when Scope 3 is not included
+    - all Scope 1 inputs are ignored when the rule of thumb overrides them
+      (only when Scope 2 is actually positive under the grid factor in use)
+
+    Args:
+        inputs: Inputs dataclass
+        ef_grid: Grid emission factor estimate() will use (default: the region's)
+
+    Returns:
+        Tuple usable as a dictionary key
+    """
+    if inputs.annual_kwh:
+        electricity = ("kwh", _norm(inputs.annual_kwh))
+    elif inputs.monthly_bill_ntd:
+        electricity = ("bill", _norm(inputs.monthly_bill_ntd), _norm(inputs.price_per_kwh_ntd))
+    else:
+        electricity = None
+
+    rule_of_thumb = False
+    if inputs.use_rule_of_thumb:
+        try:
+            s2 = emission_calc.compute_scope2(
+                inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region, ef_grid
+            )
+        except ZeroDivisionError:
+            s2 = 0.0  # estimate() raises the same error; the key is never stored
+        rule_of_thumb = s2 > 0
+
+    if rule_of_thumb:
+        scope1 = "rule_of_thumb"
+    else:
+        if inputs.gasoline_liters_year or inputs.diesel_liters_year:
+            vehicles = ("fuel", _norm(inputs.gasoline_liters_year or 0), _norm(inputs.diesel_liters_year or 0))
+        else:
+            vehicles = ("fleet", _norm(inputs.car_count), _norm(inputs.motorcycles))
+        leak = _norm(inputs.refrigerant_leak_kg)
+        scope1 = (vehicles, leak, _norm(inputs.refrigerant_gwp) if leak else None)
+
+    scope3 = (_norm(inputs.water_m3_year), _norm(inputs.waste_ton_year)) if inputs.include_scope3 else None
+
+    return (inputs.region, electricity, scope1, scope3)
+
+
+def factor_fingerprint():
+    """
+    Snapshot of every emission-factor table and constant estimate() reads
+
+    Returns:
+        Hashable tuple that changes whenever a factor changes
+    """
+    return (
+        tuple(emission_calc.GRID_EMISSION_FACTORS.items()),
+        emission_calc.EF_GASOLINE,
+        emission_calc.EF_DIESEL,
+        emission_calc.CAR_T_CO2E_PER_YEAR,
+        emission_calc.BIKE_EQ,
+        emission_calc.EF_WATER_T_PER_M3,
+        emission_calc.EF_WASTE_T_PER_TON,
+    )
+
+
+def _copy_result(result):
+    """Copy a result so callers cannot mutate the cached value"""
+    return {**result, "Share_Percent": dict(result["Share_Percent"])}
+
+
+class EstimateCache:
+    """
+    Bounded LRU cache of estimate() results
+
+    Example:
+        cache = EstimateCache(maxsize=256, ttl=600)
+        result = cache.estimate(inputs)
+        cache.cache_info()
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        """
+        Args:
+            maxsize: Maximum number of cached results (LRU eviction beyond it)
+            ttl: Seconds a result stays valid, or None for no expiry
+            clock: Monotonic time source (injectable for tests)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._fingerprint = factor_fingerprint()
+        self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+
+    def estimate(self, inputs, factor_set=None):
+        """
+        Cached estimate()
+
+        Args:
+            inputs: Inputs dataclass
+            factor_set: Optional factor-set version or FactorSet
+
+        Returns:
+            Copy of the estimate() result dictionary
+        """
+        if factor_set is not None:
+            from emission_factors import resolve_factor_set
+            factor_set = resolve_factor_set(factor_set)
+        _, ef_grid = emission_calc.resolve_factors(inputs, factor_set)
+        # Keyed on the set's version and its registry's content hash, so a
+        # rebuilt registry with edited values never serves an older result
+        content = None if factor_set is None else (factor_set.version, factor_set.registry.fingerprint)
+        key = (canonical_key(inputs, ef_grid), content)
+        fingerprint = factor_fingerprint()
+        now = self._clock()
+
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._entries.clear()
+                self._fingerprint = fingerprint
+                self._invalidations += 1
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is None or now < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _copy_result(result)
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+
+        result = emission_calc.estimate(inputs, factor_set)
+        expires_at = None if self.ttl is None else now + self.ttl
+
+        with self._lock:
+            # Factors may have changed while computing; don't store stale results
+            if fingerprint == self._fingerprint:
+                self._entries[key] = (expires_at, _copy_result(result))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return result
+
+    def quick_estimate_from_monthly_bill(self, monthly_bill_ntd, car_count=0, motorcycles=0, region="TW"):
+        """Cached emission_calc.quick_estimate_from_monthly_bill()"""
+        return self.estimate(quick_inputs_from_monthly_bill(monthly_bill_ntd, car_count, motorcycles, region))
+
+    def detailed_estimate(self, annual_kwh, gasoline_liters=0, diesel_liters=0, refrigerant_kg=0,
+                          refrigerant_gwp=1000, water_m3=0, waste_ton=0, region="TW"):
+        """Cached emission_calc.detailed_estimate()"""
+        return self.estimate(detailed_inputs(
+            annual_kwh, gasoline_liters, diesel_liters, refrigerant_kg,
+            refrigerant_gwp, water_m3, waste_ton, region
+        ))
+
+    def cache_info(self):
+        """
+        Hit / miss statistics
+
+        Returns:
+            CacheInfo named tuple
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions, self._expirations,
+                self._invalidations, len(self._entries), self.maxsize,
+            )
+
+    def cache_clear(self):
+        """Drop every cached result and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
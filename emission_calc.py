@@ -9,7 +9,8 @@ Author: Rolling Paths Co.
 Version: 1.0 (English)
 """
 
-from dataclasses import dataclass
+import struct
+from dataclasses import asdict, dataclass
 from typing import Optional, Literal
 
 # === Regional Emission Factors ===
@@ -65,6 +66,30 @@ BIKE_EQ = 0.5  # Motorcycle equivalent to car
 EF_WATER_T_PER_M3 = 0.0004  # Water consumption
 EF_WASTE_T_PER_TON = 0.33   # Waste generation
 
+# Grid subregions are "<country>-<subregion>" (e.g. "US-CAMX"); without a
+# factor of their own they use the country's
+SUBREGION_SEPARATOR = "-"
+
+
+def parent_region(region):
+    """Country code of a subregion label ("US-CAMX" -> "US"); country codes are returned unchanged"""
+    return str(region).split(SUBREGION_SEPARATOR, 1)[0]
+
+
+def grid_factor(region):
+    """
+    Built-in grid emission factor for a region or subregion label
+    
+    Falls back to the parent country, then to TW.
+    
+    Returns:
+        Grid emission factor (kg CO2/kWh)
+    """
+    ef_grid = GRID_EMISSION_FACTORS.get(region)
+    if ef_grid is None:
+        ef_grid = GRID_EMISSION_FACTORS.get(parent_region(region), GRID_EMISSION_FACTORS["TW"])
+    return ef_grid
+
 
 @dataclass
 class Inputs:
@@ -72,7 +97,8 @@ class Inputs:
     Input parameters for carbon emission estimation
     
     Attributes:
-        region: Geographic region for grid emission factor (TW/US/EU/CN/JP)
+        region: Geographic region for grid emission factor (TW/US/EU/CN/JP), or a
+            grid subregion such as "US-CAMX" (see emission_subregions)
         mode: Calculation mode - "quick" or "detail"
         monthly_bill_ntd: Monthly electricity bill (NTD)
         price_per_kwh_ntd: Price per kWh (NTD)
@@ -105,7 +131,41 @@ class Inputs:
     use_rule_of_thumb: bool = False
 
 
-def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
+@dataclass(frozen=True, slots=True)
+class FrozenInputs:
+    """
+    Immutable, slotted variant of Inputs for holding millions of site records
+
+    Same fields and defaults as Inputs, but without a per-instance __dict__
+    and hashable. Accepted anywhere Inputs is.
+    """
+    region: Literal["TW", "US", "EU", "CN", "JP"] = "TW"
+    mode: Literal["quick", "detail"] = "quick"
+    monthly_bill_ntd: Optional[float] = None
+    price_per_kwh_ntd: float = 4.4
+    annual_kwh: Optional[float] = None
+    car_count: float = 0.0
+    motorcycles: float = 0.0
+    gasoline_liters_year: Optional[float] = None
+    diesel_liters_year: Optional[float] = None
+    refrigerant_leak_kg: float = 0.0
+    refrigerant_gwp: float = 1000.0
+    include_scope3: bool = False
+    water_m3_year: float = 0.0
+    waste_ton_year: float = 0.0
+    use_rule_of_thumb: bool = False
+
+    @classmethod
+    def from_inputs(cls, inputs: Inputs):
+        """Freeze an Inputs instance"""
+        return cls(**asdict(inputs))
+
+    def to_inputs(self) -> Inputs:
+        """Mutable Inputs copy of this record"""
+        return Inputs(**asdict(self))
+
+
+def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW", ef_grid=None):
     """
     Calculate Scope 2 emissions (Purchased Electricity)
     
@@ -114,11 +174,13 @@ def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
         monthly_bill: Monthly electricity bill (NTD)
         price_per_kwh: Price per kWh (NTD)
         region: Geographic region (TW/US/EU/CN/JP)
+        ef_grid: Grid emission factor override (kg CO2/kWh); defaults to the region's
     
     Returns:
         Scope 2 emissions in tCO2e
     """
-    ef_grid = GRID_EMISSION_FACTORS.get(region, GRID_EMISSION_FACTORS["TW"])
+    if ef_grid is None:
+        ef_grid = grid_factor(region)
     
     if annual_kwh:
         return annual_kwh * ef_grid / 1000
@@ -128,7 +190,7 @@ def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
     return 0.0
 
 
-def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters):
+def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters, ef_gasoline=None, ef_diesel=None):
     """
     Calculate Scope 1 emissions from vehicles
     
@@ -137,16 +199,25 @@ def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters):
         mc: Number of motorcycles
         gas_liters: Annual gasoline consumption (liters)
         diesel_liters: Annual diesel consumption (liters)
+        ef_gasoline: Gasoline factor override (kg CO2/L), also used for the fleet heuristic
+        ef_diesel: Diesel factor override (kg CO2/L)
     
     Returns:
         Vehicle emissions in tCO2e
     """
+    ef_diesel = EF_DIESEL if ef_diesel is None else ef_diesel
+    if ef_gasoline is None:
+        ef_gasoline = EF_GASOLINE
+        car_t_per_year = CAR_T_CO2E_PER_YEAR
+    else:
+        car_t_per_year = (DEFAULT_CAR_KM_PER_YEAR / DEFAULT_CAR_KM_PER_L) * ef_gasoline / 1000
+
     if gas_liters or diesel_liters:
-        return (gas_liters or 0) * EF_GASOLINE / 1000 + (diesel_liters or 0) * EF_DIESEL / 1000
+        return (gas_liters or 0) * ef_gasoline / 1000 + (diesel_liters or 0) * ef_diesel / 1000
     
     # Use vehicle count estimation
     car_equiv = car + mc * BIKE_EQ
-    return car_equiv * CAR_T_CO2E_PER_YEAR
+    return car_equiv * car_t_per_year
 
 
 def compute_scope1_refrigerant(leak_kg, gwp):
@@ -163,57 +234,60 @@ def compute_scope1_refrigerant(leak_kg, gwp):
     return leak_kg * gwp / 1000
 
 
-def compute_minor_scope3(water, waste):
+def compute_minor_scope3(water, waste, ef_water=None, ef_waste=None):
     """
     Calculate minor Scope 3 emissions (water and waste)
     
     Args:
         water: Annual water consumption (m³)
         waste: Annual waste generation (tons)
+        ef_water: Water factor override (tCO2e/m³)
+        ef_waste: Waste factor override (tCO2e/ton)
     
     Returns:
         Minor Scope 3 emissions in tCO2e
     """
-    return water * EF_WATER_T_PER_M3 + waste * EF_WASTE_T_PER_TON
+    ef_water = EF_WATER_T_PER_M3 if ef_water is None else ef_water
+    ef_waste = EF_WASTE_T_PER_TON if ef_waste is None else ef_waste
+    return water * ef_water + waste * ef_waste
 
 
-def estimate(inputs: Inputs):
+# Instrumentation hook; emission_metrics.enable() installs an object with an
+# estimate(inputs, factor_set) method. None keeps estimate() on the plain path.
+_instrumentation = None
+
+
+def resolve_factors(inputs: Inputs, factor_set=None):
     """
-    Main estimation function for carbon emissions
+    Resolve the factors used by one estimate
     
     Args:
-        inputs: Inputs dataclass with all parameters
+        inputs: Inputs dataclass
+        factor_set: Optional factor-set version or FactorSet
     
     Returns:
-        Dictionary containing:
-        - Scope2_Electricity: Scope 2 emissions (tCO2e)
-        - Scope1_Vehicles: Vehicle emissions (tCO2e)
-        - Scope1_Refrigerant: Refrigerant emissions (tCO2e)
-        - Scope1_Total: Total Scope 1 emissions (tCO2e)
-        - Total_S1S2: Total Scope 1 + 2 emissions (tCO2e)
-        - Scope3_Minor: Minor Scope 3 emissions (tCO2e)
-        - Total_With_S3: Total including Scope 3 (tCO2e)
-        - Share_Percent: Percentage breakdown
-        - Region: Selected region
-        - Grid_EF: Grid emission factor used (kg CO2/kWh)
+        Tuple of (factor override dictionary, grid emission factor)
     """
+    # Module constants, or a versioned set from the registry
+    factors = {}
+    if factor_set is not None:
+        from emission_factors import resolve_factor_set
+        factors = resolve_factor_set(factor_set).factors_for(inputs.region)
+
     # Get grid emission factor for selected region
-    ef_grid = GRID_EMISSION_FACTORS.get(inputs.region, GRID_EMISSION_FACTORS["TW"])
-    
-    # Calculate Scope 2 (Electricity)
-    s2 = compute_scope2(inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region)
-    
-    # Calculate Scope 1 (Vehicles)
-    s1v = compute_scope1_vehicle(
-        inputs.car_count, 
-        inputs.motorcycles, 
-        inputs.gasoline_liters_year, 
-        inputs.diesel_liters_year
-    )
-    
-    # Calculate Scope 1 (Refrigerant)
-    s1r = compute_scope1_refrigerant(inputs.refrigerant_leak_kg, inputs.refrigerant_gwp)
+    ef_grid = factors.get("grid")
+    if ef_grid is None:
+        ef_grid = grid_factor(inputs.region)
+    return factors, ef_grid
+
+
+def _combine_totals(s2, s1v, s1r, use_rule_of_thumb):
+    """
+    Combine component emissions into Scope 1 and Scope 1 + 2 totals
     
+    Returns:
+        Tuple of (s1v, s1r, s1, total) after the optional rule of thumb
+    """
     # Total Scope 1
     s1 = s1v + s1r
     
@@ -221,19 +295,22 @@ def estimate(inputs: Inputs):
     total = s1 + s2
 
     # Apply rule of thumb if requested (Scope 1 ≈ 10% of Scope 2)
-    if inputs.use_rule_of_thumb and s2 > 0:
+    if use_rule_of_thumb and s2 > 0:
         total = s2 * 1.1
         s1 = total - s2
         s1v = s1 * 0.9
         s1r = s1 * 0.1
+    return s1v, s1r, s1, total
 
+
+def _build_result(region, ef_grid, s2, s1v, s1r, s1, total, s3_minor):
+    """
+    Round components and compute shares into the estimate() result dictionary
+    """
     # Calculate percentage shares
     share_s2 = s2 / total * 100 if total else 0
     share_s1v = s1v / total * 100 if total else 0
     share_s1r = s1r / total * 100 if total else 0
-    
-    # Calculate minor Scope 3 if requested
-    s3_minor = compute_minor_scope3(inputs.water_m3_year, inputs.waste_ton_year) if inputs.include_scope3 else 0
 
     # Total including Scope 3
     total_with_s3 = total + s3_minor
@@ -251,16 +328,324 @@ def estimate(inputs: Inputs):
             "Vehicles": round(share_s1v, 1), 
             "Refrigerant": round(share_s1r, 1)
         },
-        "Region": inputs.region,
+        "Region": region,
         "Grid_EF": ef_grid
     }
 
 
+# Result keys in estimate() order; Share_Percent is the nested dictionary
+RESULT_KEYS = (
+    "Scope2_Electricity", "Scope1_Vehicles", "Scope1_Refrigerant", "Scope1_Total", "Total_S1S2",
+    "Scope3_Minor", "Total_With_S3", "Share_Percent", "Region", "Grid_EF",
+)
+
+# Fixed-decimal JSON: '%.2f' rounds exactly like round(x, 2), so json.loads()
+# of the text equals estimate()'s dictionary
+_JSON_TEMPLATE = (
+    '{"Scope2_Electricity": %.2f, "Scope1_Vehicles": %.2f, "Scope1_Refrigerant": %.2f, "Scope1_Total": %.2f, '
+    '"Total_S1S2": %.2f, "Scope3_Minor": %.2f, "Total_With_S3": %.2f, '
+    '"Share_Percent": {"Electricity": %.1f, "Vehicles": %.1f, "Refrigerant": %.1f}, "Region": %s, "Grid_EF": %r}'
+)
+_JSON_REGIONS = {region: '"%s"' % region for region in GRID_EMISSION_FACTORS}
+
+
+def _msgpack_str(text):
+    """msgpack str header + UTF-8 bytes"""
+    data = text.encode("utf-8")
+    if len(data) < 32:
+        return bytes([0xa0 | len(data)]) + data
+    if len(data) < 0x100:
+        return b"\xd9" + struct.pack(">B", len(data)) + data
+    if len(data) < 0x10000:
+        return b"\xda" + struct.pack(">H", len(data)) + data
+    return b"\xdb" + struct.pack(">I", len(data)) + data
+
+
+# msgpack of the estimate() dictionary as fixed byte runs (map headers, keys,
+# float64 markers) interleaved with the ten rounded numbers, then the region
+_MSGPACK_RUNS = tuple(
+    prefix + _msgpack_str(key) + b"\xcb" for prefix, key in zip(
+        (b"\x8a",) + (b"",) * 6 + (_msgpack_str("Share_Percent") + b"\x83",) + (b"",) * 2,
+        RESULT_KEYS[:7] + ("Electricity", "Vehicles", "Refrigerant"),
+    )
+)
+_MSGPACK_BODY = struct.Struct(">" + "".join(f"{len(run)}sd" for run in _MSGPACK_RUNS))
+_MSGPACK_REGION = _msgpack_str("Region")
+_MSGPACK_GRID_EF = struct.Struct(">%dsd" % (len(_msgpack_str("Grid_EF")) + 1))
+_MSGPACK_GRID_EF_KEY = _msgpack_str("Grid_EF") + b"\xcb"
+_MSGPACK_ROUNDING = "%.2f " * 7 + "%.1f " * 3
+_MSGPACK_REGIONS = {region: _msgpack_str(region) for region in GRID_EMISSION_FACTORS}
+
+
+class EstimateResult:
+    """
+    Lightweight estimate() result
+
+    Holds the unrounded components only. The rounded fields and share
+    percentages of the estimate() dictionary are computed when read, and
+    result["Total_S1S2"] works as with the dictionary. to_dict() returns the
+    exact estimate() format.
+    """
+
+    __slots__ = ("region", "grid_ef", "s2", "s1v", "s1r", "s1", "total", "s3_minor")
+
+    def __init__(self, region, grid_ef, s2, s1v, s1r, s1, total, s3_minor):
+        self.region = region
+        self.grid_ef = grid_ef
+        self.s2 = s2
+        self.s1v = s1v
+        self.s1r = s1r
+        self.s1 = s1
+        self.total = total
+        self.s3_minor = s3_minor
+
+    @property
+    def Scope2_Electricity(self):
+        return round(self.s2, 2)
+
+    @property
+    def Scope1_Vehicles(self):
+        return round(self.s1v, 2)
+
+    @property
+    def Scope1_Refrigerant(self):
+        return round(self.s1r, 2)
+
+    @property
+    def Scope1_Total(self):
+        return round(self.s1, 2)
+
+    @property
+    def Total_S1S2(self):
+        return round(self.total, 2)
+
+    @property
+    def Scope3_Minor(self):
+        return round(self.s3_minor, 2)
+
+    @property
+    def Total_With_S3(self):
+        return round(self.total + self.s3_minor, 2)
+
+    @property
+    def Share_Percent(self):
+        total = self.total
+        return {
+            "Electricity": round(self.s2 / total * 100 if total else 0, 1),
+            "Vehicles": round(self.s1v / total * 100 if total else 0, 1),
+            "Refrigerant": round(self.s1r / total * 100 if total else 0, 1)
+        }
+
+    @property
+    def Region(self):
+        return self.region
+
+    @property
+    def Grid_EF(self):
+        return self.grid_ef
+
+    def __getitem__(self, key):
+        if key not in RESULT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self):
+        return RESULT_KEYS
+
+    def __repr__(self):
+        return f"EstimateResult(Region={self.region!r}, Total_S1S2={self.Total_S1S2!r})"
+
+    def to_dict(self):
+        """The estimate() dictionary for this result"""
+        return _build_result(self.region, self.grid_ef, self.s2, self.s1v, self.s1r, self.s1, self.total,
+                             self.s3_minor)
+
+    def to_json(self):
+        """
+        JSON text of the estimate() dictionary, formatted without building it
+
+        Numbers are written with fixed decimals ("2.50" where json.dumps writes
+        "2.5"); json.loads() of the text equals to_dict().
+        """
+        total = self.total
+        s2, s1v, s1r, s3_minor = self.s2, self.s1v, self.s1r, self.s3_minor
+        values = (
+            s2, s1v, s1r, self.s1, total, s3_minor, total + s3_minor,
+            s2 / total * 100 if total else 0, s1v / total * 100 if total else 0, s1r / total * 100 if total else 0,
+        )
+        region = _JSON_REGIONS.get(self.region)
+        grid_ef = float(self.grid_ef)
+        # NaN / inf and unlisted regions take the json module path
+        if region is None or not -1e308 < sum(values) + grid_ef < 1e308:
+            import json
+            return json.dumps(self.to_dict())
+        return _JSON_TEMPLATE % (values + (region, grid_ef))
+
+    def to_msgpack(self):
+        """
+        msgpack encoding of the estimate() dictionary, packed from the slots
+
+        Numbers are written as float64; msgpack.unpackb() of the bytes equals
+        to_dict().
+        """
+        if not isinstance(self.region, str):
+            try:
+                import msgpack
+            except ImportError:
+                raise ImportError("to_msgpack() of a non-string region requires msgpack (pip install msgpack)") from None
+            return msgpack.packb(self.to_dict())
+        total = self.total
+        s2, s1v, s1r, s3_minor = self.s2, self.s1v, self.s1r, self.s3_minor
+        values = (
+            s2, s1v, s1r, self.s1, total, s3_minor, total + s3_minor,
+            s2 / total * 100 if total else 0, s1v / total * 100 if total else 0, s1r / total * 100 if total else 0,
+        )
+        fields = [None] * 20
+        fields[0::2] = _MSGPACK_RUNS
+        # One formatting pass rounds all ten numbers exactly like round() (see _JSON_TEMPLATE)
+        fields[1::2] = map(float, (_MSGPACK_ROUNDING % values).split())
+        region = _MSGPACK_REGIONS.get(self.region) or _msgpack_str(self.region)
+        return (_MSGPACK_BODY.pack(*fields) + _MSGPACK_REGION + region
+                + _MSGPACK_GRID_EF.pack(_MSGPACK_GRID_EF_KEY, self.grid_ef))
+
+
+def _estimate_components(inputs: Inputs, factor_set=None):
+    """
+    Unrounded components of one estimate
+    
+    Args:
+        inputs: Inputs dataclass
+        factor_set: Optional factor-set version or FactorSet
+    
+    Returns:
+        Tuple of (region, ef_grid, s2, s1v, s1r, s1, total, s3_minor)
+    """
+    factors, ef_grid = resolve_factors(inputs, factor_set)
+    
+    # Calculate Scope 2 (Electricity)
+    s2 = compute_scope2(inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region, ef_grid)
+    
+    # Calculate Scope 1 (Vehicles)
+    s1v = compute_scope1_vehicle(
+        inputs.car_count, 
+        inputs.motorcycles, 
+        inputs.gasoline_liters_year, 
+        inputs.diesel_liters_year,
+        factors.get("gasoline"),
+        factors.get("diesel")
+    )
+    
+    # Calculate Scope 1 (Refrigerant)
+    s1r = compute_scope1_refrigerant(inputs.refrigerant_leak_kg, inputs.refrigerant_gwp)
+    
+    # Calculate minor Scope 3 if requested
+    s3_minor = compute_minor_scope3(
+        inputs.water_m3_year, inputs.waste_ton_year, factors.get("water"), factors.get("waste")
+    ) if inputs.include_scope3 else 0
+
+    s1v, s1r, s1, total = _combine_totals(s2, s1v, s1r, inputs.use_rule_of_thumb)
+    return inputs.region, ef_grid, s2, s1v, s1r, s1, total, s3_minor
+
+
+def _timed_components(inputs: Inputs, factor_set, mark):
+    """
+    _estimate_components() calling mark() after each stage
+    
+    Kept separate so the plain path carries no per-stage checks; the two
+    must stay in step. emission_metrics times the stages with it.
+    
+    Args:
+        inputs: Inputs dataclass
+        factor_set: Optional factor-set version or FactorSet
+        mark: Callable run after each stage (factors, scope2,
+            scope1_vehicle, scope1_refrigerant, scope3_minor, totals)
+    
+    Returns:
+        Tuple of (region, ef_grid, s2, s1v, s1r, s1, total, s3_minor)
+    """
+    factors, ef_grid = resolve_factors(inputs, factor_set)
+    mark()
+    
+    # Calculate Scope 2 (Electricity)
+    s2 = compute_scope2(inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region, ef_grid)
+    mark()
+    
+    # Calculate Scope 1 (Vehicles)
+    s1v = compute_scope1_vehicle(
+        inputs.car_count, 
+        inputs.motorcycles, 
+        inputs.gasoline_liters_year, 
+        inputs.diesel_liters_year,
+        factors.get("gasoline"),
+        factors.get("diesel")
+    )
+    mark()
+    
+    # Calculate Scope 1 (Refrigerant)
+    s1r = compute_scope1_refrigerant(inputs.refrigerant_leak_kg, inputs.refrigerant_gwp)
+    mark()
+    
+    # Calculate minor Scope 3 if requested
+    s3_minor = compute_minor_scope3(
+        inputs.water_m3_year, inputs.waste_ton_year, factors.get("water"), factors.get("waste")
+    ) if inputs.include_scope3 else 0
+    mark()
+
+    s1v, s1r, s1, total = _combine_totals(s2, s1v, s1r, inputs.use_rule_of_thumb)
+    mark()
+    return inputs.region, ef_grid, s2, s1v, s1r, s1, total, s3_minor
+
+
+def estimate(inputs: Inputs, factor_set=None):
+    """
+    Main estimation function for carbon emissions
+    
+    Args:
+        inputs: Inputs dataclass with all parameters
+        factor_set: Optional factor-set version (e.g. "builtin:2024") or FactorSet
+            from emission_factors; None uses the module-level factor constants
+    
+    Returns:
+        Dictionary containing:
+        - Scope2_Electricity: Scope 2 emissions (tCO2e)
+        - Scope1_Vehicles: Vehicle emissions (tCO2e)
+        - Scope1_Refrigerant: Refrigerant emissions (tCO2e)
+        - Scope1_Total: Total Scope 1 emissions (tCO2e)
+        - Total_S1S2: Total Scope 1 + 2 emissions (tCO2e)
+        - Scope3_Minor: Minor Scope 3 emissions (tCO2e)
+        - Total_With_S3: Total including Scope 3 (tCO2e)
+        - Share_Percent: Percentage breakdown
+        - Region: Selected region
+        - Grid_EF: Grid emission factor used (kg CO2/kWh)
+    """
+    if _instrumentation is not None:
+        return _instrumentation.estimate(inputs, factor_set)
+    return _build_result(*_estimate_components(inputs, factor_set))
+
+
+def estimate_record(inputs: Inputs, factor_set=None):
+    """
+    estimate() returning an EstimateResult instead of a dictionary
+    
+    Use when only a few fields are read or the result is serialized straight
+    away; rounding and shares are computed on access. The metrics hook
+    (emission_metrics) covers estimate() only.
+    
+    Args:
+        inputs: Inputs dataclass with all parameters
+        factor_set: Optional factor-set version or FactorSet
+    
+    Returns:
+        EstimateResult
+    """
+    return EstimateResult(*_estimate_components(inputs, factor_set))
+
+
 # === Helper Functions for UI Integration ===
 
-def quick_estimate_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0, motorcycles: int = 0, region: str = "TW"):
+def quick_inputs_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0, motorcycles: int = 0, region: str = "TW"):
     """
-    Quick estimation using only monthly electricity bill
+    Build the Inputs used by quick_estimate_from_monthly_bill()
     
     Args:
         monthly_bill_ntd: Monthly electricity bill (NTD)
@@ -269,9 +654,9 @@ def quick_estimate_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0
         region: Geographic region (TW/US/EU/CN/JP)
     
     Returns:
-        Simplified emission results
+        Inputs for a quick-mode estimate
     """
-    inputs = Inputs(
+    return Inputs(
         region=region,
         mode="quick",
         monthly_bill_ntd=monthly_bill_ntd,
@@ -279,10 +664,25 @@ def quick_estimate_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0
         motorcycles=float(motorcycles),
         use_rule_of_thumb=True
     )
-    return estimate(inputs)
 
 
-def detailed_estimate(
+def quick_estimate_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0, motorcycles: int = 0, region: str = "TW"):
+    """
+    Quick estimation using only monthly electricity bill
+    
+    Args:
+        monthly_bill_ntd: Monthly electricity bill (NTD)
+        car_count: Number of company cars
+        motorcycles: Number of motorcycles
+        region: Geographic region (TW/US/EU/CN/JP)
+    
+    Returns:
+        Simplified emission results
+    """
+    return estimate(quick_inputs_from_monthly_bill(monthly_bill_ntd, car_count, motorcycles, region))
+
+
+def detailed_inputs(
     annual_kwh: float,
     gasoline_liters: float = 0,
     diesel_liters: float = 0,
@@ -293,7 +693,7 @@ def detailed_estimate(
     region: str = "TW"
 ):
     """
-    Detailed estimation with all parameters
+    Build the Inputs used by detailed_estimate()
     
     Args:
         annual_kwh: Annual electricity consumption (kWh)
@@ -306,9 +706,9 @@ def detailed_estimate(
         region: Geographic region (TW/US/EU/CN/JP)
     
     Returns:
-        Detailed emission results
+        Inputs for a detail-mode estimate
     """
-    inputs = Inputs(
+    return Inputs(
         region=region,
         mode="detail",
         annual_kwh=annual_kwh,
@@ -320,4 +720,35 @@ def detailed_estimate(
         water_m3_year=water_m3,
         waste_ton_year=waste_ton
     )
-    return estimate(inputs)
+
+
+def detailed_estimate(
+    annual_kwh: float,
+    gasoline_liters: float = 0,
+    diesel_liters: float = 0,
+    refrigerant_kg: float = 0,
+    refrigerant_gwp: float = 1000,
+    water_m3: float = 0,
+    waste_ton: float = 0,
+    region: str = "TW"
+):
+    """
+    Detailed estimation with all parameters
+    
+    Args:
+        annual_kwh: Annual electricity consumption (kWh)
+        gasoline_liters: Annual gasoline consumption (liters)
+        diesel_liters: Annual diesel consumption (liters)
+        refrigerant_kg: Refrigerant leakage (kg/year)
+        refrigerant_gwp: Global Warming Potential
+        water_m3: Annual water consumption (m³)
+        waste_ton: Annual waste generation (tons)
+        region: Geographic region (TW/US/EU/CN/JP)
+    
+    Returns:
+        Detailed emission results
+    """
+    return estimate(detailed_inputs(
+        annual_kwh, gasoline_liters, diesel_liters, refrigerant_kg,
+        refrigerant_gwp, water_m3, waste_ton, region
+    ))
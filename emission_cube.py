@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Aggregate Cube
+------------------------------
+Materialized totals of the result store for dashboard queries. One cube cell
+per (factor_version, region, year, mode) holds the row count and the sums of
+every emission column (Scope 2, the Scope 1 vehicle and refrigerant splits,
+Scope 3 minor and the totals). SQLite triggers on the estimates table keep
+the cells current on every insert, update and delete. Any writer therefore
+maintains them, including other processes and ResultStore.copy_rows().
+
+A cube has at most versions x regions x years x modes cells, so roll-ups and
+drill-downs over it are small GROUP BY queries, whatever the number of stored
+estimates. Drilling below the cube's grain (to site_id or period) falls back
+to ResultStore.aggregate() over the raw rows with the same filters.
+
+Example:
+    with ResultStore("emissions.db") as store:
+        cube = AggregateCube(store)                  # creates and backfills once
+        cube.rollup(by=("region", "year"), factor_version="builtin:2024")
+        cube.drill_down(("region",), "mode", region="TW")
+        cube.by_scope(by=("year",))                  # long format: one row per scope
+"""
+
+import numpy as np
+
+from emission_batch import EMISSION_COLUMNS
+from emission_store import TABLE
+
+CUBE_TABLE = f"{TABLE}_cube"
+CUBE_DIMENSIONS = ("factor_version", "region", "year", "mode")
+CUBE_FILTERS = ("factor_version", "region", "year", "mode")
+# Additive components reported by by_scope()
+SCOPE_COLUMNS = ("Scope2_Electricity", "Scope1_Vehicles", "Scope1_Refrigerant", "Scope3_Minor")
+
+_KEY = ", ".join(CUBE_DIMENSIONS)
+_MEASURES = ", ".join(EMISSION_COLUMNS)
+
+
+def _match(row):
+    return " AND ".join(f"{name} = {row}.{name}" for name in CUBE_DIMENSIONS)
+
+
+def _add(row):
+    """Trigger statement adding one estimates row to its cell"""
+    values = ", ".join([f"{row}.{name}" for name in CUBE_DIMENSIONS] + ["1"] +
+                       [f"COALESCE({row}.{name}, 0)" for name in EMISSION_COLUMNS])
+    updates = ", ".join(["rows = rows + 1"] + [f"{name} = {name} + excluded.{name}" for name in EMISSION_COLUMNS])
+    return (f"INSERT INTO {CUBE_TABLE} ({_KEY}, rows, {_MEASURES}) VALUES ({values}) "
+            f"ON CONFLICT ({_KEY}) DO UPDATE SET {updates};")
+
+
+def _remove(row):
+    """Trigger statements removing one estimates row from its cell (empty cells are dropped)"""
+    updates = ", ".join(["rows = rows - 1"] + [f"{name} = {name} - COALESCE({row}.{name}, 0)"
+                                               for name in EMISSION_COLUMNS])
+    return (f"UPDATE {CUBE_TABLE} SET {updates} WHERE {_match(row)}; "
+            f"DELETE FROM {CUBE_TABLE} WHERE {_match(row)} AND rows <= 0;")
+
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {CUBE_TABLE} (
+    factor_version TEXT NOT NULL,
+    region TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    {", ".join(f"{name} REAL NOT NULL" for name in EMISSION_COLUMNS)},
+    PRIMARY KEY ({_KEY})
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN
+    {_add("NEW")}
+END;
+CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN
+    {_remove("OLD")}
+END;
+CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_update AFTER UPDATE OF {_KEY}, {_MEASURES} ON {TABLE} BEGIN
+    {_remove("OLD")}
+    {_add("NEW")}
+END;
+"""
+
+
+class AggregateCube:
+    """
+    Trigger-maintained region x year x mode x factor-version totals of a ResultStore
+    """
+
+    def __init__(self, store):
+        """
+        Args:
+            store: ResultStore; the cube table and triggers are created in its
+                database (and backfilled from existing rows) on first use
+        """
+        self.store = store
+        self.conn = store.conn
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CUBE_TABLE,)
+        ).fetchone()
+        if not exists:
+            self.conn.executescript(SCHEMA)
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Recompute every cell from the raw rows
+
+        Incremental updates add and subtract floats, so a rebuild also clears
+        any accumulated rounding drift.
+
+        Returns:
+            Number of cells
+        """
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {CUBE_TABLE}")
+            self.conn.execute(
+                f"INSERT INTO {CUBE_TABLE} ({_KEY}, rows, {_MEASURES}) "
+                f"SELECT {_KEY}, COUNT(*), {', '.join(f'TOTAL({name})' for name in EMISSION_COLUMNS)} "
+                f"FROM {TABLE} GROUP BY {_KEY}"
+            )
+        return self.cells()
+
+    def cells(self):
+        """Number of non-empty cells"""
+        return self.conn.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+
+    @staticmethod
+    def _check_filters(filters):
+        unknown = set(filters) - set(CUBE_FILTERS)
+        if unknown:
+            raise ValueError(f"Cannot filter the cube by {sorted(unknown)}; use {CUBE_FILTERS}")
+
+    def rollup(self, by=("region",), measures=EMISSION_COLUMNS, **filters):
+        """
+        Totals grouped by any subset of the cube dimensions
+
+        Args:
+            by: Grouping columns from CUBE_DIMENSIONS (() for one grand total)
+            measures: Emission columns to sum
+            **filters: factor_version, region (one or many), year, mode
+
+        Returns:
+            Dictionary shaped like ResultStore.aggregate(): the group columns,
+            "Sites" (row count) and one np.ndarray of sums per measure
+        """
+        bad = [name for name in by if name not in CUBE_DIMENSIONS] + \
+              [name for name in measures if name not in EMISSION_COLUMNS]
+        if bad:
+            raise ValueError(f"Cannot group or sum the cube by {bad}")
+        self._check_filters(filters)
+        # Only cube columns are filtered, so the store's WHERE builder applies as is
+        where, params = self.store._where(**filters)
+        group = ", ".join(by)
+        select = ", ".join(tuple(by) + ("TOTAL(rows)",) + tuple(f"TOTAL({name})" for name in measures))
+        sql = f"SELECT {select} FROM {CUBE_TABLE}{where}" + (f" GROUP BY {group} ORDER BY {group}" if by else "")
+        rows = self.conn.execute(sql, params).fetchall()
+        data = list(zip(*rows)) if rows else [()] * (len(by) + 1 + len(measures))
+        out = {name: np.array(values, dtype=np.int64 if name == "year" else str) for name, values in zip(by, data)}
+        out["Sites"] = np.array(data[len(by)], dtype=np.int64)
+        for name, values in zip(measures, data[len(by) + 1:]):
+            out[name] = np.array(values, dtype=np.float64)
+        return out
+
+    def drill_down(self, by, into, measures=EMISSION_COLUMNS, **filters):
+        """
+        Split each group of a roll-up by one more column
+
+        Args:
+            by: Current grouping columns
+            into: Column to add; a cube dimension is answered from the cube,
+                site_id or period from the raw rows via ResultStore.aggregate()
+            measures: Emission columns to sum
+            **filters: factor_version, region (one or many), year, mode
+
+        Returns:
+            Dictionary of columns as for rollup()
+        """
+        by = tuple(by) + (into,)
+        if into in CUBE_DIMENSIONS:
+            return self.rollup(by, measures, **filters)
+        self._check_filters(filters)
+        return self.store.aggregate(by=by, measures=measures, **filters)
+
+    def by_scope(self, by=("region",), **filters):
+        """
+        Totals in long format, one row per group and scope component
+
+        Args:
+            by: Grouping columns from CUBE_DIMENSIONS
+            **filters: factor_version, region (one or many), year, mode
+
+        Returns:
+            Dictionary with the group columns, "Scope" and "Emissions" (tCO2e)
+        """
+        wide = self.rollup(by, SCOPE_COLUMNS, **filters)
+        groups = wide["Sites"].size
+        out = {name: np.repeat(wide[name], len(SCOPE_COLUMNS)) for name in by}
+        out["Scope"] = np.tile(np.array(SCOPE_COLUMNS), groups)
+        out["Emissions"] = np.column_stack([wide[name] for name in SCOPE_COLUMNS]).ravel() if groups \
+            else np.empty(0)
+        return out
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Factor Registry
+-------------------------------
+Versioned emission factors indexed by (region, year, source, factor type).
+Values live in one dense float64 array, so a lookup is a handful of integer
+index operations and a batch lookup is one fancy-indexing pass. Registries
+are saved to a compact binary file and memory-mapped on load, so any number
+of worker processes share one copy through the OS page cache.
+
+A factor-set version is "<source>:<year>", e.g. "builtin:2024".
+"""
+
+import functools
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+import emission_calc
+
+FACTOR_TYPES = ("grid", "electricity_price", "gasoline", "diesel", "water", "waste")
+FACTOR_UNITS = {
+    "grid": "kg CO2/kWh",
+    "electricity_price": "local currency/kWh",
+    "gasoline": "kg CO2/L",
+    "diesel": "kg CO2/L",
+    "water": "tCO2e/m³",
+    "waste": "tCO2e/ton",
+}
+BUILTIN_SOURCE = "builtin"
+BUILTIN_YEAR = 2024
+FALLBACK_REGION = "TW"
+REGISTRY_ENV_VAR = "EMISSION_FACTOR_REGISTRY"
+# (region, year, source) lookups memoized per registry
+FACTOR_MEMO_SIZE = 4096
+
+# Binary layout: magic, uint32 header length, JSON header, padding, float64 data
+FILE_MAGIC = b"EMFREG01"
+DATA_ALIGNMENT = 64
+
+
+def parse_version(version):
+    """
+    Split a factor-set version string
+
+    Args:
+        version: "<source>:<year>"
+
+    Returns:
+        (source, year) tuple
+    """
+    source, sep, year = str(version).rpartition(":")
+    if not sep or not source:
+        raise ValueError(f"Factor-set version must look like 'source:year', got {version!r}")
+    return source, int(year)
+
+
+class FactorRegistry:
+    """
+    Dense (region, year, source, factor type) table of emission factors
+
+    Missing combinations are stored as NaN. Years form a contiguous range
+    starting at first_year.
+    """
+
+    def __init__(self, values, regions, first_year, sources, factor_types=FACTOR_TYPES, path=None):
+        """
+        Args:
+            values: Array of shape (regions, years, sources, factor types)
+            regions: Region codes along axis 0
+            first_year: Year at index 0 of axis 1
+            sources: Source names along axis 2
+            factor_types: Factor types along axis 3
+            path: File the values are memory-mapped from, if any
+        """
+        # A read-only view: edits go through a new registry, never in place
+        self.values = values.view()
+        self.values.flags.writeable = False
+        self.regions = tuple(regions)
+        self.first_year = int(first_year)
+        self.sources = tuple(sources)
+        self.factor_types = tuple(factor_types)
+        self.path = path
+        expected = (len(self.regions), values.shape[1], len(self.sources), len(self.factor_types))
+        if values.shape != expected:
+            raise ValueError(f"Factor table has shape {values.shape}, expected {expected}")
+        self._region_index = {r: i for i, r in enumerate(self.regions)}
+        self._source_index = {s: i for i, s in enumerate(self.sources)}
+        self._type_index = {t: i for i, t in enumerate(self.factor_types)}
+        # The table is read-only, so lookups can be memoized for the registry's lifetime
+        self._factors_for = functools.lru_cache(maxsize=FACTOR_MEMO_SIZE)(self._lookup_factors)
+
+    @functools.cached_property
+    def fingerprint(self):
+        """Content hash of the axes and values (computed once; the table is read-only)"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps([self.regions, self.first_year, self.sources, self.factor_types]).encode("utf-8"))
+        digest.update(np.ascontiguousarray(self.values, dtype="<f8").data)
+        return digest.hexdigest()
+
+    # --- Construction ---
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a registry from (region, year, source, factor_type, value) records
+
+        Args:
+            records: Iterable of 5-tuples
+
+        Returns:
+            FactorRegistry
+        """
+        records = list(records)
+        if not records:
+            raise ValueError("No factor records")
+        regions = list(dict.fromkeys(r[0] for r in records))
+        sources = list(dict.fromkeys(r[2] for r in records))
+        years = [int(r[1]) for r in records]
+        first_year = min(years)
+
+        unknown = {r[3] for r in records} - set(FACTOR_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown factor types: {sorted(unknown)}")
+
+        values = np.full((len(regions), max(years) - first_year + 1, len(sources), len(FACTOR_TYPES)), np.nan)
+        region_index = {r: i for i, r in enumerate(regions)}
+        source_index = {s: i for i, s in enumerate(sources)}
+        type_index = {t: i for i, t in enumerate(FACTOR_TYPES)}
+        for region, year, source, factor_type, value in records:
+            values[region_index[region], int(year) - first_year, source_index[source], type_index[factor_type]] = value
+        return cls(values, regions, first_year, sources)
+
+    @classmethod
+    def builtin(cls):
+        """
+        Registry holding the module-level constants of emission_calc
+
+        Returns:
+            FactorRegistry with a single "builtin:2024" factor set
+        """
+        records = []
+        for region, ef_grid in emission_calc.GRID_EMISSION_FACTORS.items():
+            price = emission_calc.REGION_ELECTRICITY_PRICES.get(region, {}).get("price", np.nan)
+            for factor_type, value in (
+                ("grid", ef_grid),
+                ("electricity_price", price),
+                ("gasoline", emission_calc.EF_GASOLINE),
+                ("diesel", emission_calc.EF_DIESEL),
+                ("water", emission_calc.EF_WATER_T_PER_M3),
+                ("waste", emission_calc.EF_WASTE_T_PER_TON),
+            ):
+                records.append((region, BUILTIN_YEAR, BUILTIN_SOURCE, factor_type, value))
+        return cls.from_records(records)
+
+    def records(self):
+        """
+        Recorded factors as (region, year, source, factor_type, value) records
+
+        Returns:
+            List of 5-tuples (NaN entries are skipped); from_records() inverts it
+        """
+        values = np.asarray(self.values)
+        return [
+            (self.regions[r], self.first_year + y, self.sources[s], self.factor_types[t], float(values[r, y, s, t]))
+            for r, y, s, t in zip(*(axis.tolist() for axis in np.nonzero(~np.isnan(values))))
+        ]
+
+    # --- Persistence ---
+
+    def save(self, path):
+        """
+        Write the registry to a compact binary file
+
+        Args:
+            path: Destination file path
+        """
+        header = json.dumps({
+            "regions": self.regions,
+            "first_year": self.first_year,
+            "sources": self.sources,
+            "factor_types": self.factor_types,
+            "shape": list(self.values.shape),
+        }).encode("utf-8")
+        prefix = len(FILE_MAGIC) + 4 + len(header)
+        padding = b"\0" * (-prefix % DATA_ALIGNMENT)
+        with open(path, "wb") as f:
+            f.write(FILE_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(padding)
+            f.write(np.ascontiguousarray(self.values, dtype="<f8").tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a registry file (read-only, shared between processes)
+
+        Args:
+            path: File written by save()
+
+        Returns:
+            FactorRegistry backed by np.memmap
+        """
+        path = os.fspath(path)
+        with open(path, "rb") as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f"{path} is not an emission factor registry file")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+        prefix = len(FILE_MAGIC) + 4 + header_len
+        offset = prefix + (-prefix % DATA_ALIGNMENT)
+        values = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=tuple(header["shape"]))
+        return cls(values, header["regions"], header["first_year"], header["sources"], header["factor_types"], path)
+
+    def __reduce__(self):
+        # File-backed registries travel to worker processes as a path and are
+        # re-mapped there, instead of pickling the whole table
+        if self.path is not None:
+            return (load_registry, (self.path,))
+        return (FactorRegistry, (np.asarray(self.values), self.regions, self.first_year, self.sources, self.factor_types))
+
+    # --- Lookup ---
+
+    @property
+    def years(self):
+        """Years covered by the table"""
+        return tuple(range(self.first_year, self.first_year + self.values.shape[1]))
+
+    def versions(self):
+        """
+        Factor-set versions that hold at least one value
+
+        Returns:
+            List of "<source>:<year>" strings
+        """
+        present = ~np.isnan(np.asarray(self.values)).all(axis=(0, 3))
+        years, sources = np.nonzero(present)
+        return [f"{self.sources[s]}:{self.first_year + y}" for y, s in zip(years.tolist(), sources.tolist())]
+
+    def _year_index(self, year):
+        index = int(year) - self.first_year
+        if not 0 <= index < self.values.shape[1]:
+            raise KeyError(f"No factors for year {year}")
+        return index
+
+    def _fallback_index(self, region, default=None):
+        """Index of a region, else of its parent country (subregions), else of TW"""
+        index = self._region_index.get(region)
+        if index is None:
+            index = self._region_index.get(emission_calc.parent_region(region))
+        if index is None:
+            index = self._region_index.get(FALLBACK_REGION, default)
+        return index
+
+    def lookup(self, region, year, source, factor_type):
+        """
+        Single factor lookup (unknown subregions fall back to their country, other regions to TW)
+
+        Args:
+            region: Region code
+            year: Factor year
+            source: Factor source
+            factor_type: One of FACTOR_TYPES
+
+        Returns:
+            Factor value, NaN when not recorded
+        """
+        region_index = self._fallback_index(region)
+        if region_index is None:
+            raise KeyError(f"No factors for region {region!r}")
+        return float(self.values[
+            region_index, self._year_index(year), self._source_index[source], self._type_index[factor_type]
+        ])
+
+    def factors_for(self, region, year, source):
+        """
+        Every recorded factor for one region / year / source (memoized)
+
+        Args:
+            region: Region code
+            year: Factor year
+            source: Factor source
+
+        Returns:
+            Dictionary of factor type -> value, without missing (NaN) entries
+        """
+        return self._factors_for(region, year, source)
+
+    def _lookup_factors(self, region, year, source):
+        factors = {}
+        for factor_type in self.factor_types:
+            value = self.lookup(region, year, source, factor_type)
+            if value == value:
+                factors[factor_type] = value
+        return factors
+
+    def region_index(self, regions):
+        """
+        Encode region labels as indices into this registry (fallback: parent country, then TW)
+
+        Args:
+            regions: Array-like of region labels
+
+        Returns:
+            np.ndarray of int indices
+        """
+        unique, inverse = np.unique(np.asarray(regions, dtype=str), return_inverse=True)
+        codes = np.array([self._fallback_index(label, -1) for label in unique.tolist()], dtype=np.intp)
+        if np.any(codes < 0):
+            raise KeyError(f"No factors for regions {sorted(set(unique[codes < 0]))}")
+        return codes[inverse.reshape(-1)]
+
+    def lookup_batch(self, region_index, years, source, factor_type):
+        """
+        Vectorized O(1)-per-row lookup
+
+        Args:
+            region_index: Indices from region_index()
+            years: Factor year per row (or one scalar year)
+            source: Factor source
+            factor_type: One of FACTOR_TYPES
+
+        Returns:
+            np.ndarray of factor values (NaN when not recorded)
+        """
+        year_index = np.asarray(years, dtype=np.intp) - self.first_year
+        if np.any((year_index < 0) | (year_index >= self.values.shape[1])):
+            raise KeyError(f"Years outside {self.years[0]}-{self.years[-1]}")
+        plane = self.values[:, :, self._source_index[source], self._type_index[factor_type]]
+        return np.asarray(plane[region_index, year_index])
+
+    def factor_set(self, version):
+        """
+        Select one factor-set version
+
+        Args:
+            version: "<source>:<year>"
+
+        Returns:
+            FactorSet
+        """
+        source, year = parse_version(version)
+        if source not in self._source_index:
+            raise KeyError(f"Unknown factor source {source!r}")
+        self._year_index(year)
+        return FactorSet(self, source, year)
+
+
+@dataclass(frozen=True)
+class FactorSet:
+    """
+    One versioned set of factors (a registry source + year)
+
+    Factor types without a recorded value fall back to the emission_calc
+    module constants.
+    """
+    registry: FactorRegistry
+    source: str
+    year: int
+
+    @property
+    def version(self):
+        return f"{self.source}:{self.year}"
+
+    def factors_for(self, region):
+        """
+        Factors for one region, as used by emission_calc.estimate()
+
+        Args:
+            region: Region code
+
+        Returns:
+            Dictionary of factor type -> value
+        """
+        return self.registry.factors_for(region, self.year, self.source)
+
+    def batch_factors(self, regions, years=None):
+        """
+        Per-row factor arrays for the batch engine
+
+        Args:
+            regions: Array-like of region labels
+            years: Optional per-row factor years (same source), default self.year
+
+        Returns:
+            Dictionary of factor type -> np.ndarray (module constants fill gaps)
+        """
+        regions = np.asarray(regions)
+        region_index = self.registry.region_index(regions)
+        years = self.year if years is None else years
+        fallbacks = {
+            "gasoline": emission_calc.EF_GASOLINE,
+            "diesel": emission_calc.EF_DIESEL,
+            "water": emission_calc.EF_WATER_T_PER_M3,
+            "waste": emission_calc.EF_WASTE_T_PER_TON,
+        }
+        factors = {}
+        for factor_type in ("grid",) + tuple(fallbacks):
+            values = np.broadcast_to(
+                self.registry.lookup_batch(region_index, years, self.source, factor_type), regions.shape
+            )
+            missing = np.isnan(values)
+            if np.any(missing):
+                if factor_type == "grid":
+                    from emission_batch import grid_factors_for
+                    values = np.where(missing, grid_factors_for(regions), values)
+                else:
+                    values = np.where(missing, fallbacks[factor_type], values)
+            factors[factor_type] = values
+        return factors
+
+
+# === Default Registry ===
+
+_LOADED = {}
+_DEFAULT = None
+
+
+def load_registry(path):
+    """
+    Load (once per process) a memory-mapped registry file
+
+    Args:
+        path: Registry file path
+
+    Returns:
+        FactorRegistry
+    """
+    path = os.fspath(path)
+    registry = _LOADED.get(path)
+    if registry is None:
+        registry = _LOADED[path] = FactorRegistry.load(path)
+    return registry
+
+
+def default_registry():
+    """
+    Registry used to resolve version strings
+
+    Loaded from the file named by $EMISSION_FACTOR_REGISTRY if set, otherwise
+    built from the emission_calc constants.
+
+    Returns:
+        FactorRegistry
+    """
+    global _DEFAULT
+    if _DEFAULT is None:
+        path = os.environ.get(REGISTRY_ENV_VAR)
+        _DEFAULT = load_registry(path) if path else FactorRegistry.builtin()
+    return _DEFAULT
+
+
+def set_default_registry(registry):
+    """
+    Replace the default registry
+
+    Args:
+        registry: FactorRegistry, a registry file path, or None to reset
+    """
+    global _DEFAULT
+    if registry is not None and not isinstance(registry, FactorRegistry):
+        registry = load_registry(registry)
+    _DEFAULT = registry
+
+
+def resolve_factor_set(factor_set):
+    """
+    Turn a version string or FactorSet into a FactorSet
+
+    Args:
+        factor_set: "<source>:<year>" string or FactorSet
+
+    Returns:
+        FactorSet
+    """
+    if isinstance(factor_set, FactorSet):
+        return factor_set
+    return default_registry().factor_set(factor_set)
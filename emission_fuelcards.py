@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Fuel-Card Ingestion
+-----------------------------------
+Streaming aggregation of fuel-card transactions into gasoline and diesel
+liters per period, site, vehicle and fuel type. Transactions are read in
+fixed-size chunks and grouped with NumPy, so memory holds only the running
+totals plus the transaction-id hashes of periods that are still open.
+
+Duplicates (same transaction id, or the same time / site / vehicle / fuel /
+liters when there is no id column) are dropped while their period is open.
+A period closes once the newest transaction seen is more than the allowed
+lateness past the period's end, which frees its dedup state. Later rows for a
+closed period (e.g. an export grouped by card rather than by time) are still
+added to the totals, but counted as late because they can no longer be
+checked for duplicates. Transactions dated more than the allowed
+lateness after the current time are rejected as future-dated, so a year typo
+cannot close every open period.
+
+Usage:
+    python emission_fuelcards.py transactions.csv.gz -o site_fuel.csv --year 2024
+    python emission_fuelcards.py cards.jsonl -o site_fuel.csv --map card_site=site_id --lateness-days 14
+
+Example:
+    cards = FuelCardAggregator(period="month", allowed_lateness_days=7)
+    ingest_file("transactions.csv.gz", cards)
+    columns = cards.apply_to_columns(columns, site_ids, year=2024)
+    estimate_batch(columns)
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from emission_stream import (
+    DEFAULT_CHUNK_SIZE,
+    _open_text,
+    _parse_column_map,
+    detect_format,
+    iter_chunks,
+    read_rows,
+)
+
+TRANSACTION_FIELDS = ("transaction_id", "timestamp", "site_id", "vehicle_id", "fuel_type", "liters")
+FUELS = ("gasoline", "diesel")
+# Exact labels after lower-casing and collapsing whitespace; anything else is invalid
+FUEL_ALIASES = {
+    "gasoline": "gasoline", "petrol": "gasoline", "gas": "gasoline", "unleaded": "gasoline",
+    "92": "gasoline", "95": "gasoline", "98": "gasoline",
+    "unleaded 92": "gasoline", "unleaded 95": "gasoline", "unleaded 98": "gasoline",
+    "92 unleaded": "gasoline", "95 unleaded": "gasoline", "98 unleaded": "gasoline",
+    "super unleaded": "gasoline", "premium unleaded": "gasoline", "premium gasoline": "gasoline",
+    "diesel": "diesel", "gasoil": "diesel", "gas oil": "diesel", "gas oil 10ppm": "diesel",
+    "premium diesel": "diesel", "ulsd": "diesel", "ultra low sulfur diesel": "diesel",
+    "diesel b7": "diesel", "b7": "diesel",
+}
+PERIOD_UNITS = {"month": "M", "year": "Y"}
+DEFAULT_LATENESS_DAYS = 7
+COUNTERS = ("rows", "accepted", "duplicates", "late", "future", "invalid")
+
+
+def fuel_codes(fuel_types):
+    """
+    Map raw fuel-type labels onto FUELS indices
+
+    Args:
+        fuel_types: Array-like of labels ("Diesel", "Unleaded 95", ...)
+
+    Returns:
+        np.ndarray of int8 codes (-1 for labels not in FUEL_ALIASES, e.g.
+        "LPG", "Natural Gas" or "Diesel Exhaust Fluid")
+    """
+    labels = np.asarray(fuel_types, dtype=str)
+    unique, inverse = np.unique(labels, return_inverse=True)
+    codes = np.empty(unique.size, dtype=np.int8)
+    for i, label in enumerate(unique.tolist()):
+        fuel = FUEL_ALIASES.get(" ".join(label.lower().split()))
+        codes[i] = FUELS.index(fuel) if fuel else -1
+    return codes[inverse.ravel()]
+
+
+def parse_timestamps(values):
+    """
+    ISO dates / datetimes as datetime64[s]; unparseable cells become NaT
+
+    Args:
+        values: Sequence of strings ("2024-03-05", "2024-03-05 10:22:00", ...)
+
+    Returns:
+        np.ndarray of datetime64[s]
+    """
+    try:
+        return np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        parsed = np.empty(len(values), dtype="datetime64[s]")
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = np.datetime64(value, "s")
+            except ValueError:
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+
+def _parse_liters(values):
+    """Liters column as float64; unparseable cells become NaN"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    out = np.empty(len(values))
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+
+def _hash_strings(values):
+    """Process-local 64-bit hashes of a string sequence"""
+    return np.fromiter(map(hash, values), dtype=np.int64, count=len(values))
+
+
+class FuelCardAggregator:
+    """
+    Running liters per (period, site, vehicle, fuel) with bounded-memory deduplication
+
+    Attributes:
+        counts: Dictionary of COUNTERS -> rows seen so far
+        watermark: Newest accepted transaction time (datetime64[s]), NaT before the first row
+        late_liters: Liters in late rows (added to the totals without deduplication)
+    """
+
+    def __init__(self, period="month", allowed_lateness_days=DEFAULT_LATENESS_DAYS, column_map=None, now=None):
+        """
+        Args:
+            period: "month" or "year" aggregation period
+            allowed_lateness_days: Days after a period ends during which its
+                transactions are still deduplicated (later ones are summed as late)
+            column_map: Optional mapping of source column -> TRANSACTION_FIELDS name
+            now: Reference time for rejecting future-dated transactions (any
+                datetime64-compatible value; default: the system clock at each
+                chunk). Rows later than now + allowed lateness are counted as
+                "future" and never advance the watermark.
+        """
+        if period not in PERIOD_UNITS:
+            raise ValueError(f"period must be one of {tuple(PERIOD_UNITS)}, got {period!r}")
+        self.period = period
+        self.unit = PERIOD_UNITS[period]
+        self.lateness = np.timedelta64(int(allowed_lateness_days * 86400), "s")
+        self.now = None if now is None else np.datetime64(now, "s")
+        self.sources = {field: field for field in TRANSACTION_FIELDS}
+        for source, field in (column_map or {}).items():
+            if field not in TRANSACTION_FIELDS:
+                raise ValueError(f"Unknown transaction field in column map: {field!r}")
+            self.sources[field] = source
+
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.watermark = np.datetime64("NaT", "s")
+        self.late_liters = 0.0
+        # (period index, site, vehicle, fuel code) -> [liters, transactions]
+        self._totals = {}
+        # Open period index -> sorted int64 hashes of accepted transactions
+        self._seen = {}
+        # Periods below this index are closed
+        self._first_open = None
+
+    # === Ingestion ===
+
+    def add_rows(self, rows):
+        """
+        Aggregate one chunk of raw transaction rows
+
+        Args:
+            rows: List of row dictionaries (CSV / JSONL records)
+
+        Returns:
+            Dictionary of COUNTERS for this chunk
+        """
+        src = self.sources
+        # JSON lines may omit keys row by row, so look at the whole chunk
+        present = set().union(*(row.keys() for row in rows))
+        missing = [src[field] for field in TRANSACTION_FIELDS[1:] if src[field] not in present]
+        if rows and missing:
+            raise ValueError(f"Fuel-card rows are missing columns: {missing}")
+        column = {field: [row.get(src[field]) for row in rows] for field in TRANSACTION_FIELDS}
+        ids = column["transaction_id"] if src["transaction_id"] in present else None
+        return self.add_arrays(
+            column["timestamp"], column["site_id"], column["vehicle_id"], column["fuel_type"],
+            _parse_liters(column["liters"]), transaction_ids=ids,
+        )
+
+    def add_arrays(self, timestamps, site_ids, vehicle_ids, fuel_types, liters, transaction_ids=None):
+        """
+        Aggregate one chunk of transaction columns
+
+        Args:
+            timestamps: ISO strings or datetime64 values
+            site_ids: Site identifier per transaction
+            vehicle_ids: Vehicle (card) identifier per transaction
+            fuel_types: Fuel label per transaction
+            liters: Liters per transaction
+            transaction_ids: Optional unique id per transaction; without it
+                duplicates are detected on all the other fields
+
+        Returns:
+            Dictionary of COUNTERS for this chunk
+        """
+        stamps = parse_timestamps(timestamps) if not np.issubdtype(np.asarray(timestamps).dtype, np.datetime64) \
+            else np.asarray(timestamps, dtype="datetime64[s]")
+        sites = np.asarray(site_ids, dtype=str)
+        vehicles = np.asarray(vehicle_ids, dtype=str)
+        fuels = fuel_codes(fuel_types)
+        liters = np.asarray(liters, dtype=np.float64)
+        n = stamps.size
+        counts = dict.fromkeys(COUNTERS, 0)
+        counts["rows"] = n
+
+        valid = ~np.isnat(stamps) & (fuels >= 0) & np.isfinite(liters) & (liters > 0) & (sites != "")
+        counts["invalid"] = int(n - valid.sum())
+        periods = stamps.astype(f"datetime64[{self.unit}]").astype(np.int64)
+
+        now = np.datetime64("now", "s") if self.now is None else self.now
+        future = valid & (stamps > now + self.lateness)
+        counts["future"] = int(future.sum())
+        valid &= ~future
+
+        late = np.zeros(n, dtype=bool)
+        if self._first_open is not None:
+            # Closed periods have no dedup state left: sum their rows as they come
+            late = valid & (periods < self._first_open)
+            counts["late"] = int(late.sum())
+            self.late_liters += float(liters[late].sum())
+
+        keep = np.flatnonzero(valid & ~late)
+        if transaction_ids is not None:
+            hashes = _hash_strings(np.asarray(transaction_ids, dtype=str)[keep].tolist())
+        else:
+            hashes = _hash_strings(list(zip(
+                stamps[keep].astype(np.int64).tolist(), sites[keep].tolist(), vehicles[keep].tolist(),
+                fuels[keep].tolist(), liters[keep].tolist(),
+            )))
+        fresh = self._deduplicate(periods[keep], hashes)
+        counts["duplicates"] = int(keep.size - fresh.size)
+        keep = np.sort(np.concatenate([keep[fresh], np.flatnonzero(late)]))
+        counts["accepted"] = int(keep.size)
+
+        self._accumulate(periods[keep], sites[keep], vehicles[keep], fuels[keep], liters[keep])
+
+        if keep.size:
+            newest = stamps[keep].max()
+            if np.isnat(self.watermark) or newest > self.watermark:
+                self.watermark = newest
+            self._close_periods()
+
+        for name, value in counts.items():
+            self.counts[name] += value
+        return counts
+
+    def _deduplicate(self, periods, hashes):
+        """Positions of first-seen transactions; records their hashes per open period"""
+        keep = []
+        for period in np.unique(periods).tolist():
+            rows = np.flatnonzero(periods == period)
+            unique, first = np.unique(hashes[rows], return_index=True)
+            seen = self._seen.get(period)
+            if seen is not None and seen.size:
+                position = np.minimum(np.searchsorted(seen, unique), seen.size - 1)
+                new = seen[position] != unique
+                unique, first = unique[new], first[new]
+                self._seen[period] = np.insert(seen, np.searchsorted(seen, unique), unique)
+            else:
+                self._seen[period] = unique
+            keep.append(rows[first])
+        return np.sort(np.concatenate(keep)) if keep else np.empty(0, dtype=np.int64)
+
+    def _accumulate(self, periods, sites, vehicles, fuels, liters):
+        """Group one chunk with np.unique / np.bincount, then merge the groups into the totals"""
+        if not periods.size:
+            return
+        site_names, site_index = np.unique(sites, return_inverse=True)
+        vehicle_names, vehicle_index = np.unique(vehicles, return_inverse=True)
+        period_values, period_index = np.unique(periods, return_inverse=True)
+        key = ((period_index.ravel() * site_names.size + site_index.ravel()) * vehicle_names.size
+               + vehicle_index.ravel()) * len(FUELS) + fuels
+        groups, inverse = np.unique(key, return_inverse=True)
+        group_liters = np.bincount(inverse.ravel(), weights=liters)
+        group_count = np.bincount(inverse.ravel())
+
+        fuel = groups % len(FUELS)
+        rest = groups // len(FUELS)
+        vehicle = rest % vehicle_names.size
+        rest //= vehicle_names.size
+        site = rest % site_names.size
+        period = rest // site_names.size
+
+        totals = self._totals
+        for g in zip(period_values[period].tolist(), site_names[site].tolist(), vehicle_names[vehicle].tolist(),
+                     fuel.tolist(), group_liters.tolist(), group_count.tolist()):
+            entry = totals.get(g[:4])
+            if entry is None:
+                totals[g[:4]] = [g[4], g[5]]
+            else:
+                entry[0] += g[4]
+                entry[1] += g[5]
+
+    def _close_periods(self):
+        """Drop the dedup state of periods that ended more than the allowed lateness ago"""
+        # A period is closed once the next one started before watermark - lateness
+        first_open = int((self.watermark - self.lateness).astype(f"datetime64[{self.unit}]").astype(np.int64))
+        if self._first_open is None or first_open > self._first_open:
+            self._first_open = first_open
+            for period in [p for p in self._seen if p < first_open]:
+                del self._seen[period]
+
+    def open_periods(self):
+        """Labels of the periods still deduplicating transactions"""
+        return [self.period_label(p) for p in sorted(self._seen)]
+
+    def period_label(self, period):
+        """ "2024-03" (month) or "2024" (year) for an internal period index"""
+        return str(np.datetime64(int(period), self.unit))
+
+    # === Outputs ===
+
+    def vehicle_totals(self):
+        """
+        Aggregated liters per period, site, vehicle and fuel
+
+        Returns:
+            Dictionary of columns: period, site_id, vehicle_id, fuel_type,
+            liters, transactions (sorted by period, site, vehicle, fuel)
+        """
+        keys = sorted(self._totals)
+        return {
+            "period": np.array([self.period_label(k[0]) for k in keys], dtype=str),
+            "site_id": np.array([k[1] for k in keys], dtype=str),
+            "vehicle_id": np.array([k[2] for k in keys], dtype=str),
+            "fuel_type": np.array([FUELS[k[3]] for k in keys], dtype=str),
+            "liters": np.array([self._totals[k][0] for k in keys], dtype=np.float64),
+            "transactions": np.array([self._totals[k][1] for k in keys], dtype=np.int64),
+        }
+
+    def site_liters(self, year=None):
+        """
+        Gasoline and diesel liters per site, summed over vehicles and periods
+
+        Args:
+            year: Only count periods in this calendar year (default: all)
+
+        Returns:
+            Dictionary with site_id (sorted) and the estimate_batch() columns
+            gasoline_liters_year / diesel_liters_year
+        """
+        liters = {}
+        for (period, site, _, fuel), (value, _) in self._totals.items():
+            if year is not None and int(self.period_label(period)[:4]) != year:
+                continue
+            row = liters.get(site)
+            if row is None:
+                row = liters[site] = [0.0, 0.0]
+            row[fuel] += value
+        sites = sorted(liters)
+        values = np.array([liters[site] for site in sites], dtype=np.float64).reshape(-1, len(FUELS))
+        return {
+            "site_id": np.array(sites, dtype=str),
+            "gasoline_liters_year": values[:, 0],
+            "diesel_liters_year": values[:, 1],
+        }
+
+    def apply_to_columns(self, columns, site_ids, year=None):
+        """
+        Fill the fuel-liter columns of estimate_batch() input from the card data
+
+        Sites with card transactions get their gasoline and diesel liters (0
+        for a fuel they never bought, so the fleet heuristic is not used);
+        other sites keep whatever the columns already hold.
+
+        Args:
+            columns: estimate_batch() input columns
+            site_ids: Site identifier per input row
+            year: Calendar year to total (default: all periods)
+
+        Returns:
+            New dictionary of columns
+        """
+        cards = self.site_liters(year)
+        site_ids = np.asarray(site_ids, dtype=str)
+        n = site_ids.size
+        out = dict(columns)
+        if not cards["site_id"].size:
+            return out
+        position = np.minimum(np.searchsorted(cards["site_id"], site_ids), cards["site_id"].size - 1)
+        matched = cards["site_id"][position] == site_ids
+        for name in ("gasoline_liters_year", "diesel_liters_year"):
+            current = columns.get(name)
+            values = np.full(n, np.nan) if current is None else \
+                np.array(np.broadcast_to(np.asarray(current, dtype=np.float64), (n,)))
+            values[matched] = cards[name][position[matched]]
+            out[name] = values
+        return out
+
+
+def ingest_file(path, aggregator, chunk_size=DEFAULT_CHUNK_SIZE, input_format=None, progress=None):
+    """
+    Stream a CSV/JSONL transaction export (optionally .gz) into an aggregator
+
+    Args:
+        path: Transaction file
+        aggregator: FuelCardAggregator
+        chunk_size: Rows per chunk
+        input_format: "csv" or "jsonl" (default: from the file extension)
+        progress: Optional callback(rows_done, seconds_elapsed) after each chunk
+
+    Returns:
+        The aggregator's cumulative counts plus seconds and rows_per_sec
+    """
+    started = time.perf_counter()
+    with _open_text(path, "r") as handle:
+        for chunk in iter_chunks(read_rows(handle, input_format or detect_format(path)), chunk_size):
+            aggregator.add_rows(chunk)
+            if progress is not None:
+                progress(aggregator.counts["rows"], time.perf_counter() - started)
+    seconds = time.perf_counter() - started
+    stats = dict(aggregator.counts)
+    stats["seconds"] = round(seconds, 3)
+    stats["rows_per_sec"] = stats["rows"] / seconds if seconds else 0.0
+    return stats
+
+
+# === Command Line ===
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate fuel-card transactions into liters per site")
+    parser.add_argument("input", help="Transaction file (.csv / .jsonl, optionally .gz)")
+    parser.add_argument("-o", "--output", required=True, help="Output CSV of site_id, gasoline / diesel liters")
+    parser.add_argument("--year", type=int, help="Only total transactions in this year")
+    parser.add_argument("--by-vehicle", action="store_true", help="Write per period / site / vehicle / fuel totals")
+    parser.add_argument("--period", choices=sorted(PERIOD_UNITS), default="month", help="Aggregation period")
+    parser.add_argument("--lateness-days", type=float, default=DEFAULT_LATENESS_DAYS,
+                        help="Days after a period ends that its transactions are still deduplicated")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--map", action="append", metavar="SOURCE=FIELD", help="Map a source column to a transaction field")
+    args = parser.parse_args(argv)
+
+    aggregator = FuelCardAggregator(args.period, args.lateness_days, _parse_column_map(args.map))
+    stats = ingest_file(args.input, aggregator, chunk_size=args.chunk_size)
+    table = aggregator.vehicle_totals() if args.by_vehicle else aggregator.site_liters(args.year)
+
+    with _open_text(args.output, "w") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(list(table))
+        writer.writerows(zip(*(
+            (np.round(values, 3) if values.dtype.kind == "f" else values).tolist() for values in table.values()
+        )))
+
+    print(
+        f"✅ {stats['rows']:,} transactions in {stats['seconds']}s ({stats['rows_per_sec']:,.0f} rows/s): "
+        f"{stats['accepted']:,} accepted, {stats['duplicates']:,} duplicates, "
+        f"{stats['late']:,} late, {stats['future']:,} future-dated, {stats['invalid']:,} invalid",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Hierarchy Module
+--------------------------------
+Organizational rollups (company -> business unit -> country -> site).
+Per-node component emissions and subtotals are held in NumPy arrays indexed by
+node. Changing one site adds the delta to the nodes on its path to the root
+only (O(depth)); share percentages are recomputed lazily behind dirty flags.
+
+Example:
+    tree = EmissionHierarchy.from_paths(
+        [("Acme", "Retail", "TW", "Store-001"), ("Acme", "Retail", "JP", "Store-002")],
+        levels=("company", "business_unit", "country", "site"),
+    )
+    tree.set_sites(tree.leaves(), columns)          # bulk load via estimate_batch()
+    tree.update_site(("Acme", "Retail", "TW", "Store-001"), Inputs(annual_kwh=90000))
+    tree.result(("Acme",))                           # estimate()-style subtotal
+    tree.rollup("country")                           # one row per country
+"""
+
+import numpy as np
+
+import emission_calc
+from emission_batch import estimate_batch, round_like_python
+
+# Additive components; every other result column is derived from these
+COMPONENTS = ("Scope2_Electricity", "Scope1_Vehicles", "Scope1_Refrigerant", "Scope3_Minor")
+S2, S1V, S1R, S3 = range(len(COMPONENTS))
+
+
+def site_components(inputs, factor_set=None):
+    """
+    Unrounded additive components of one site's estimate()
+
+    Args:
+        inputs: Inputs dataclass
+        factor_set: Optional factor-set version or FactorSet
+
+    Returns:
+        np.ndarray of COMPONENTS (tCO2e), after the optional rule of thumb
+    """
+    _, _, s2, s1v, s1r, _, _, s3 = emission_calc._estimate_components(inputs, factor_set)
+    return np.array((s2, s1v, s1r, s3), dtype=np.float64)
+
+
+class EmissionHierarchy:
+    """
+    Tree of organizational nodes with incrementally maintained subtotals
+
+    Attributes:
+        keys: Node keys (path tuples from the root), by node index
+        parent: np.ndarray of parent node index (-1 for roots)
+        depth: np.ndarray of node depth (0 for roots)
+        own: np.ndarray (nodes, COMPONENTS) of emissions recorded on the node itself
+        subtotal: np.ndarray (nodes, COMPONENTS) of own + all descendants
+        levels: Optional level names by depth
+    """
+
+    def __init__(self, keys, parent, levels=None):
+        """
+        Args:
+            keys: Sequence of hashable node keys
+            parent: Parent index per node (-1 for roots); parents need not precede children
+            levels: Optional level names by depth (e.g. ("company", ..., "site"))
+        """
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.parent = np.asarray(parent, dtype=np.int64)
+        n = len(self.keys)
+        if self.parent.shape != (n,):
+            raise ValueError("parent must have one entry per key")
+        self.levels = tuple(levels) if levels else None
+
+        self.depth = self._depths()
+        # Children as CSR: children of i are child_index[child_ptr[i]:child_ptr[i + 1]]
+        has_parent = np.flatnonzero(self.parent >= 0)
+        order = has_parent[np.argsort(self.parent[has_parent], kind="stable")]
+        self.child_index = order
+        self.child_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.parent[has_parent], minlength=n))))
+
+        self.own = np.zeros((n, len(COMPONENTS)))
+        self.subtotal = np.zeros((n, len(COMPONENTS)))
+        self._shares = np.zeros((n, 3))
+        self._dirty = np.ones(n, dtype=bool)
+        # Plain-list copy of parent for the O(depth) Python walk in update paths
+        self._parent_list = self.parent.tolist()
+
+    @classmethod
+    def from_paths(cls, paths, levels=None):
+        """
+        Build a tree from root-to-leaf paths
+
+        Args:
+            paths: Iterable of tuples, e.g. ("Acme", "Retail", "TW", "Store-001");
+                every prefix becomes a node keyed by that prefix tuple
+            levels: Optional level names by depth
+
+        Returns:
+            EmissionHierarchy
+        """
+        index = {}
+        keys = []
+        parent = []
+        for path in paths:
+            path = tuple(path)
+            up = -1
+            for depth in range(1, len(path) + 1):
+                key = path[:depth]
+                node = index.get(key)
+                if node is None:
+                    node = index[key] = len(keys)
+                    keys.append(key)
+                    parent.append(up)
+                up = node
+        return cls(keys, parent, levels)
+
+    def _depths(self):
+        depth = np.full(len(self.keys), -1, dtype=np.int64)
+        depth[self.parent < 0] = 0
+        # Resolve one level per pass; passes = tree height
+        while (depth < 0).any():
+            pending = np.flatnonzero(depth < 0)
+            parent_depth = depth[self.parent[pending]]
+            ready = parent_depth >= 0
+            if not ready.any():
+                raise ValueError("parent links contain a cycle")
+            depth[pending[ready]] = parent_depth[ready] + 1
+        return depth
+
+    # === Lookup ===
+
+    def node(self, key):
+        """Node index for a key (an int is returned unchanged)"""
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        return self.index[tuple(key) if isinstance(key, list) else key]
+
+    def children(self, key):
+        """Child node indices of a node"""
+        i = self.node(key)
+        return self.child_index[self.child_ptr[i]:self.child_ptr[i + 1]]
+
+    def leaves(self):
+        """Indices of nodes without children"""
+        return np.flatnonzero(np.diff(self.child_ptr) == 0)
+
+    def path_to_root(self, key):
+        """Node indices from a node up to its root"""
+        path = []
+        i = self.node(key)
+        parent = self._parent_list
+        while i >= 0:
+            path.append(i)
+            i = parent[i]
+        return path
+
+    # === Updates ===
+
+    def set_components(self, key, components):
+        """
+        Replace a node's own emissions and propagate the delta to the root
+
+        Args:
+            key: Node key or index
+            components: Sequence of COMPONENTS values (tCO2e)
+        """
+        i = self.node(key)
+        new = np.asarray(components, dtype=np.float64)
+        delta = new - self.own[i]
+        self.own[i] = new
+        parent = self._parent_list
+        subtotal = self.subtotal
+        dirty = self._dirty
+        while i >= 0:
+            subtotal[i] += delta
+            dirty[i] = True
+            i = parent[i]
+
+    def update_site(self, key, inputs, factor_set=None):
+        """
+        Re-estimate one site and update the subtotals on its path
+
+        Args:
+            key: Site node key or index
+            inputs: New Inputs for the site
+            factor_set: Optional factor-set version or FactorSet
+        """
+        self.set_components(key, site_components(inputs, factor_set))
+
+    def set_sites(self, nodes, columns, factor_set=None):
+        """
+        Bulk-load many sites through estimate_batch() and rebuild all subtotals
+
+        Args:
+            nodes: Node indices (or keys), one per input row
+            columns: estimate_batch() input columns
+            factor_set: Optional factor-set version or FactorSet
+        """
+        index = np.array([self.node(key) for key in nodes], dtype=np.int64) \
+            if not isinstance(nodes, np.ndarray) else nodes.astype(np.int64)
+        results = estimate_batch(columns, round_output=False, factor_set=factor_set)
+        self.own[index] = np.column_stack([results[name] for name in COMPONENTS])
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recompute every subtotal from the own values, deepest level first
+
+        Also clears floating-point drift accumulated by many delta updates.
+        """
+        self.subtotal = self.own.copy()
+        for depth in range(int(self.depth.max(initial=0)), 0, -1):
+            nodes = np.flatnonzero(self.depth == depth)
+            np.add.at(self.subtotal, self.parent[nodes], self.subtotal[nodes])
+        self._dirty[:] = True
+
+    # === Results ===
+
+    def shares(self, key):
+        """
+        Electricity / Vehicles / Refrigerant shares (%) of a node's Scope 1 + 2 total
+
+        Recomputed only when the node's subtotal changed since the last call.
+
+        Returns:
+            np.ndarray of three unrounded percentages
+        """
+        i = self.node(key)
+        if self._dirty[i]:
+            s2, s1v, s1r, _ = self.subtotal[i]
+            total = s2 + s1v + s1r
+            self._shares[i] = (s2 / total * 100, s1v / total * 100, s1r / total * 100) if total else 0.0
+            self._dirty[i] = False
+        return self._shares[i]
+
+    def share_of_parent(self, key):
+        """Node's Scope 1 + 2 total as a percentage of its parent's (100 for roots)"""
+        i = self.node(key)
+        up = self._parent_list[i]
+        if up < 0:
+            return 100.0
+        total = self.subtotal[up, :S3].sum()
+        return self.subtotal[i, :S3].sum() / total * 100 if total else 0.0
+
+    def result(self, key):
+        """
+        estimate()-style rounded result for a node's subtotal
+
+        Args:
+            key: Node key or index
+
+        Returns:
+            Dictionary with the estimate() emission fields, Share_Percent,
+            Share_Of_Parent and Node
+        """
+        i = self.node(key)
+        s2, s1v, s1r, s3 = self.subtotal[i].tolist()
+        s1 = s1v + s1r
+        total = s1 + s2
+        share_s2, share_s1v, share_s1r = self.shares(i).tolist()
+        return {
+            "Scope2_Electricity": round(s2, 2),
+            "Scope1_Vehicles": round(s1v, 2),
+            "Scope1_Refrigerant": round(s1r, 2),
+            "Scope1_Total": round(s1, 2),
+            "Total_S1S2": round(total, 2),
+            "Scope3_Minor": round(s3, 2),
+            "Total_With_S3": round(total + s3, 2),
+            "Share_Percent": {
+                "Electricity": round(share_s2, 1),
+                "Vehicles": round(share_s1v, 1),
+                "Refrigerant": round(share_s1r, 1)
+            },
+            "Share_Of_Parent": round(self.share_of_parent(i), 1),
+            "Node": self.keys[i],
+        }
+
+    def rollup(self, level):
+        """
+        Rounded subtotals for every node at one level
+
+        Args:
+            level: Depth (int) or level name from `levels`
+
+        Returns:
+            Dictionary with "Node" (list of keys) and one np.ndarray per
+            emission column, plus Share_Of_Parent
+        """
+        depth = self.levels.index(level) if isinstance(level, str) else level
+        nodes = np.flatnonzero(self.depth == depth)
+        sub = self.subtotal[nodes]
+        s1 = sub[:, S1V] + sub[:, S1R]
+        total = s1 + sub[:, S2]
+        parents = self.parent[nodes]
+        parent_total = np.where(parents >= 0, self.subtotal[parents, :S3].sum(axis=1), total)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share_of_parent = np.where(parent_total != 0, total / parent_total * 100, 0.0)
+        return {
+            "Node": [self.keys[i] for i in nodes],
+            "Scope2_Electricity": round_like_python(sub[:, S2], 2),
+            "Scope1_Vehicles": round_like_python(sub[:, S1V], 2),
+            "Scope1_Refrigerant": round_like_python(sub[:, S1R], 2),
+            "Scope1_Total": round_like_python(s1, 2),
+            "Total_S1S2": round_like_python(total, 2),
+            "Scope3_Minor": round_like_python(sub[:, S3], 2),
+            "Total_With_S3": round_like_python(total + sub[:, S3], 2),
+            "Share_Of_Parent": round_like_python(share_of_parent, 1),
+        }
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Hourly Module
+-----------------------------
+Hourly (8760/8784) location-based Scope 2 from interval meter data.
+Hourly or 15/30-minute load profiles are multiplied by an hourly grid-factor
+profile of the same year. Factor profiles are .npy files opened memory-mapped,
+and site loads may be a memory-mapped (sites x intervals) matrix: sites are
+processed in blocks, so thousands of profiles never sit in memory at once.
+
+Profiles are in local standard time and start at January 1st 00:00.
+
+Example:
+    profiles = HourlyFactorProfiles("factor_profiles/")        # TW_2024.npy, ...
+    loads = np.load("site_loads_15min.npy", mmap_mode="r")     # (sites, 35136)
+    results = hourly_scope2(loads, "TW", 2024, profiles)
+    results["Scope2_Electricity"], results["Monthly_Scope2"], results["Peak_Hour"]
+"""
+
+import calendar
+from pathlib import Path
+
+import numpy as np
+
+import emission_calc
+
+SUPPORTED_INTERVALS = (60, 30, 15)   # minutes
+DEFAULT_BLOCK_SITES = 512
+
+
+# === Calendar ===
+
+def hours_in_year(year):
+    """8784 for leap years, 8760 otherwise"""
+    return 8784 if calendar.isleap(year) else 8760
+
+
+def hour_timestamps(year):
+    """
+    Hour-beginning timestamps of one year
+
+    Args:
+        year: Calendar year
+
+    Returns:
+        np.ndarray of datetime64[h], length hours_in_year(year)
+    """
+    return np.arange(f"{year}-01-01T00", f"{year + 1}-01-01T00", dtype="datetime64[h]")
+
+
+def month_start_hours(year):
+    """
+    Hour index at which each month starts
+
+    Args:
+        year: Calendar year
+
+    Returns:
+        np.ndarray of 12 hour offsets (for np.add.reduceat)
+    """
+    starts = np.arange(f"{year}-01", f"{year + 1}-01", dtype="datetime64[M]").astype("datetime64[h]")
+    return (starts - np.datetime64(f"{year}-01-01T00", "h")).astype(np.int64)
+
+
+# === Factor Profiles ===
+
+def save_profile(directory, region, year, values):
+    """
+    Write one hourly grid-factor profile
+
+    Args:
+        directory: Profile directory
+        region: Region code (TW/US/EU/CN/JP)
+        year: Calendar year
+        values: Hourly grid factors (kg CO2/kWh), one per hour of the year
+
+    Returns:
+        Path of the written .npy file
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape != (hours_in_year(year),):
+        raise ValueError(f"{region} {year} profile needs {hours_in_year(year)} hourly values, got {values.shape}")
+    path = Path(directory) / f"{region}_{year}.npy"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, values)
+    return path
+
+
+def flat_profile(region, year):
+    """
+    Hourly profile that repeats the region's annual grid factor
+
+    Args:
+        region: Region code
+        year: Calendar year
+
+    Returns:
+        np.ndarray of hours_in_year(year) identical factors (kg CO2/kWh)
+    """
+    return np.full(hours_in_year(year), emission_calc.grid_factor(region))
+
+
+class HourlyFactorProfiles:
+    """
+    Directory of memory-mapped hourly grid-factor profiles named REGION_YEAR.npy
+    """
+
+    def __init__(self, directory, fallback_flat=False):
+        """
+        Args:
+            directory: Directory holding REGION_YEAR.npy files
+            fallback_flat: Use flat_profile() for missing (region, year) pairs
+                instead of raising KeyError
+        """
+        self.directory = Path(directory)
+        self.fallback_flat = fallback_flat
+        self._profiles = {}
+
+    def available(self):
+        """
+        Profiles present on disk
+
+        Returns:
+            Sorted list of (region, year) tuples
+        """
+        pairs = []
+        for path in self.directory.glob("*_*.npy"):
+            region, _, year = path.stem.rpartition("_")
+            if year.isdigit():
+                pairs.append((region, int(year)))
+        return sorted(pairs)
+
+    def profile(self, region, year):
+        """
+        Hourly grid factors for one region and year
+
+        Args:
+            region: Region code
+            year: Calendar year
+
+        Returns:
+            Read-only np.ndarray (np.memmap when loaded from disk) of kg CO2/kWh
+        """
+        key = (region, year)
+        cached = self._profiles.get(key)
+        if cached is not None:
+            return cached
+
+        path = self.directory / f"{region}_{year}.npy"
+        if path.exists():
+            values = np.load(path, mmap_mode="r")
+            if values.shape != (hours_in_year(year),):
+                raise ValueError(f"{path} has shape {values.shape}, expected ({hours_in_year(year)},)")
+        elif self.fallback_flat:
+            values = flat_profile(region, year)
+            values.flags.writeable = False
+        else:
+            raise KeyError(f"No hourly factor profile for {region} {year} in {self.directory}")
+        self._profiles[key] = values
+        return values
+
+
+# === Load Profiles ===
+
+def to_hourly(load, year):
+    """
+    Aggregate interval load data to hourly kWh
+
+    Args:
+        load: kWh per interval, shape (intervals,) or (sites, intervals); the
+            interval (60/30/15 minutes) is inferred from the length
+        year: Calendar year of the data
+
+    Returns:
+        np.ndarray of hourly kWh, shape (hours,) or (sites, hours)
+    """
+    load = np.asarray(load, dtype=np.float64)
+    hours = hours_in_year(year)
+    intervals = load.shape[-1]
+    per_hour = intervals // hours
+    if intervals % hours or per_hour not in [60 // minutes for minutes in SUPPORTED_INTERVALS]:
+        raise ValueError(
+            f"{intervals} intervals do not match {year} at 60/30/15-minute resolution "
+            f"({hours}, {hours * 2} or {hours * 4})"
+        )
+    if per_hour == 1:
+        return load
+    return load.reshape(load.shape[:-1] + (hours, per_hour)).sum(axis=-1)
+
+
+def _site_block(load, start, stop):
+    """One block of sites as an in-memory 2-D array"""
+    return np.asarray(load[start:stop], dtype=np.float64)
+
+
+# === Engine ===
+
+def hourly_scope2(load, region, year, profiles=None, block_sites=DEFAULT_BLOCK_SITES):
+    """
+    Hourly location-based Scope 2 for one site or a matrix of sites
+
+    Args:
+        load: Interval kWh, shape (intervals,) for one site or (sites, intervals);
+            may be an np.memmap, read block by block
+        region: Region code for every site, or a sequence with one code per site
+        year: Calendar year of the data
+        profiles: HourlyFactorProfiles (default: flat profiles from the annual factors)
+        block_sites: Sites aggregated per block
+
+    Returns:
+        Dictionary of arrays (scalars / 1-D for a single site):
+        - Scope2_Electricity: Annual Scope 2 (tCO2e), shape (sites,)
+        - Annual_kWh: Annual consumption (kWh), shape (sites,)
+        - Monthly_Scope2: Scope 2 per calendar month (tCO2e), shape (sites, 12)
+        - Peak_Hour: Hour with the highest emissions (datetime64[h]), shape (sites,)
+        - Peak_Hour_Scope2: Emissions in that hour (tCO2e), shape (sites,)
+        - Effective_Grid_EF: Load-weighted grid factor (kg CO2/kWh), shape (sites,)
+    """
+    single = np.ndim(load) == 1
+    if single:
+        load = np.asarray(load)[np.newaxis, :]
+    n = load.shape[0]
+
+    regions = np.broadcast_to(np.asarray(region, dtype=str), (n,))
+    timestamps = hour_timestamps(year)
+    months = month_start_hours(year)
+
+    annual = np.empty(n)
+    annual_kwh = np.empty(n)
+    monthly = np.empty((n, 12))
+    peak_index = np.empty(n, dtype=np.int64)
+    peak = np.empty(n)
+
+    for code in np.unique(regions):
+        factors = (profiles.profile(code, year) if profiles is not None else flat_profile(code, year))
+        factors = np.asarray(factors, dtype=np.float64)
+        sites = np.flatnonzero(regions == code)
+        contiguous = sites.size == n
+        for start in range(0, sites.size, block_sites):
+            index = sites[start:start + block_sites]
+            block = _site_block(load, index[0], index[-1] + 1) if contiguous else np.asarray(load[index])
+            hourly_kwh = to_hourly(block, year)
+            hourly_t = hourly_kwh * factors / 1000
+
+            annual_kwh[index] = hourly_kwh.sum(axis=1)
+            annual[index] = hourly_t.sum(axis=1)
+            monthly[index] = np.add.reduceat(hourly_t, months, axis=1)
+            peak_index[index] = hourly_t.argmax(axis=1)
+            peak[index] = hourly_t[np.arange(index.size), peak_index[index]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        effective = np.where(annual_kwh > 0, annual * 1000 / annual_kwh, 0.0)
+
+    results = {
+        "Scope2_Electricity": annual,
+        "Annual_kWh": annual_kwh,
+        "Monthly_Scope2": monthly,
+        "Peak_Hour": timestamps[peak_index],
+        "Peak_Hour_Scope2": peak,
+        "Effective_Grid_EF": effective,
+    }
+    if single:
+        results = {name: values[0] for name, values in results.items()}
+    return results
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Background Jobs
+-------------------------------
+Bulk estimation of uploaded site files on a background thread.
+The upload (CSV / JSONL, optionally gzipped, or XLSX) is streamed in chunks
+through the vectorized batch engine into a gzipped CSV, while the job exposes
+progress counters and small result previews for the UI to poll.
+
+Example:
+    job = BulkJob(uploaded.getvalue(), "sites.xlsx", keep=("site_id",)).start()
+    job.progress, job.head_preview, job.latest_preview
+    job.result_bytes()    # gzipped CSV once job.status == "done"
+"""
+
+import csv
+import gzip
+import io
+import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import numpy as np
+
+from emission_batch import RESULT_COLUMNS
+from emission_stream import DEFAULT_CHUNK_SIZE, CsvResultWriter, detect_format, estimate_stream, read_rows
+
+XLSX_SUFFIXES = (".xlsx", ".xlsm")
+UPLOAD_SUFFIXES = ("csv", "gz", "jsonl", "ndjson", "xlsx", "xlsm")
+PREVIEW_ROWS = 20
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside the worker when a job is cancelled"""
+
+
+# === Upload Readers ===
+
+def _binary(source):
+    """Binary file object for a path or raw bytes"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return open(source, "rb")
+
+
+def read_xlsx_rows(handle):
+    """
+    Lazily yield one dictionary per worksheet row (first sheet, first row is the header)
+
+    Args:
+        handle: Binary file object or path of an .xlsx workbook
+
+    Yields:
+        Dictionary of column name -> cell value
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx uploads requires openpyxl (pip install openpyxl)") from None
+
+    workbook = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) if name is not None else "" for name in next(rows, ())]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def count_rows(source, name):
+    """
+    Number of data rows in an upload, when it can be known cheaply
+
+    Args:
+        source: Raw bytes or file path
+        name: File name (used for format detection)
+
+    Returns:
+        Row count, or None for compressed uploads
+    """
+    suffix = Path(name).suffix.lower()
+    if suffix == ".gz":
+        return None
+    if suffix in XLSX_SUFFIXES:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            return None
+        with _binary(source) as handle:
+            workbook = load_workbook(handle, read_only=True)
+            sheet = workbook.worksheets[0]
+            total = max((sheet.max_row or 1) - 1, 0)
+            workbook.close()
+            return total
+
+    with _binary(source) as handle:
+        text = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+        if detect_format(name) == "jsonl":
+            return sum(1 for line in text if line.strip())
+        # Parsed rows, not newlines: quoted CSV fields may span lines
+        return max(sum(1 for row in csv.reader(text) if row) - 1, 0)
+
+
+def iter_upload_rows(handle, name):
+    """
+    Yield row dictionaries from an uploaded file
+
+    Args:
+        handle: Binary file object
+        name: File name (.csv / .jsonl / .xlsx, CSV and JSONL optionally .gz)
+
+    Yields:
+        Dictionary of column name -> raw value
+    """
+    if Path(name).suffix.lower() in XLSX_SUFFIXES:
+        yield from read_xlsx_rows(handle)
+        return
+    if Path(name).suffix.lower() == ".gz":
+        handle = gzip.GzipFile(fileobj=handle)
+    # utf-8-sig strips the byte-order mark Excel puts in front of CSV exports
+    text = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+    yield from read_rows(text, detect_format(name))
+
+
+# === Jobs ===
+
+class _PreviewWriter:
+    """CsvResultWriter wrapper that keeps previews and honours cancellation"""
+
+    def __init__(self, writer, job):
+        self.writer = writer
+        self.job = job
+
+    def write(self, rows, results):
+        if self.job._cancel.is_set():
+            raise JobCancelled
+        self.writer.write(rows, results)
+        job = self.job
+        count = min(len(rows), job.preview_rows)
+        latest = _preview_records(rows[-count:], results, slice(len(rows) - count, len(rows)), job.keep)
+        with job._lock:
+            if len(job.head_preview) < job.preview_rows:
+                missing = job.preview_rows - len(job.head_preview)
+                job.head_preview += _preview_records(rows[:missing], results, slice(0, missing), job.keep)
+            job.latest_preview = latest
+
+
+def _preview_records(rows, results, rows_slice, keep):
+    """Flat result records (kept columns first) for a slice of one chunk"""
+    values = [np.asarray(results[name])[rows_slice].tolist() for name in RESULT_COLUMNS]
+    return [
+        {**{name: row.get(name) for name in keep}, **dict(zip(RESULT_COLUMNS, record))}
+        for row, record in zip(rows, zip(*values))
+    ]
+
+
+def _remove_file(path):
+    Path(path).unlink(missing_ok=True)
+
+
+class BulkJob:
+    """
+    Estimate every site of an uploaded file on a background thread
+
+    Attributes:
+        status: One of JOB_STATUSES
+        rows_done: Rows scored so far
+        total_rows: Rows in the upload, or None when unknown (gzip)
+        head_preview: First preview_rows result records
+        latest_preview: Last preview_rows result records of the latest chunk
+        error: Error message when status == "failed"
+        output_path: Gzipped CSV with the full result set (deleted when the
+            job fails, is cancelled, discarded or garbage-collected)
+    """
+
+    def __init__(self, source, name, chunk_size=DEFAULT_CHUNK_SIZE, column_map=None, keep=(),
+                 output_dir=None, preview_rows=PREVIEW_ROWS):
+        """
+        Args:
+            source: Raw upload bytes or a file path
+            name: Original file name (selects the reader)
+            chunk_size: Rows per vectorized chunk
+            column_map: Optional mapping of source column -> Inputs field name
+            keep: Source columns copied through to the output (e.g. site_id)
+            output_dir: Directory for the result file (default: system temp dir)
+            preview_rows: Rows kept in each preview
+        """
+        self.source = bytes(source) if isinstance(source, (bytearray, memoryview)) else source
+        self.name = name
+        self.chunk_size = chunk_size
+        self.column_map = column_map
+        self.keep = tuple(keep)
+        self.preview_rows = preview_rows
+
+        fd, path = tempfile.mkstemp(prefix="emission_bulk_", suffix=".csv.gz", dir=output_dir)
+        os.close(fd)
+        self.output_path = path
+        # Deletes the result file on discard(), when the job is garbage-collected
+        # (e.g. its Streamlit session is evicted) or at interpreter exit
+        self._remove_output = weakref.finalize(self, _remove_file, path)
+
+        self.status = "queued"
+        self.rows_done = 0
+        self.total_rows = None
+        self.head_preview = []
+        self.latest_preview = []
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the background worker
+
+        Returns:
+            self, for chaining
+        """
+        self._thread = threading.Thread(target=self._run, name=f"BulkJob[{self.name}]", daemon=True)
+        self.status = "running"
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the worker to stop after the current chunk"""
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        """Wait for the worker to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self
+
+    @property
+    def running(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def progress(self):
+        """Fraction of rows done (0-1), or None when the total is unknown"""
+        if self.status == "done":
+            return 1.0
+        if not self.total_rows:
+            return None
+        return min(self.rows_done / self.total_rows, 1.0)
+
+    @property
+    def rows_per_sec(self):
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0
+        return self.rows_done / elapsed if elapsed > 0 else 0.0
+
+    def previews(self):
+        """
+        Consistent copy of both previews
+
+        Returns:
+            Tuple of (head_preview, latest_preview)
+        """
+        with self._lock:
+            return list(self.head_preview), list(self.latest_preview)
+
+    def result_bytes(self):
+        """
+        Gzipped CSV with the full result set
+
+        Returns:
+            Bytes of the .csv.gz file
+        """
+        if self.status != "done":
+            raise RuntimeError(f"Job is {self.status}, results are not ready")
+        return Path(self.output_path).read_bytes()
+
+    def discard(self):
+        """Cancel the job and delete its result file"""
+        self.cancel()
+        self.join()
+        self._remove_output()
+
+    def _progress(self, done, seconds):
+        self.rows_done = done
+
+    def _run(self):
+        try:
+            self.total_rows = count_rows(self.source, self.name)
+            with _binary(self.source) as handle, \
+                    gzip.open(self.output_path, "wt", encoding="utf-8", newline="") as sink:
+                writer = _PreviewWriter(CsvResultWriter(sink, keep=self.keep), self)
+                estimate_stream(iter_upload_rows(handle, self.name), writer, self.chunk_size,
+                                self.column_map, self._progress)
+            self.status = "done"
+        except JobCancelled:
+            self.status = "cancelled"
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+            if self.status != "done":
+                # Partial output of a failed or cancelled job is never served
+                self._remove_output()
+
+
+def read_result_csv(data):
+    """
+    Parse a job's gzipped CSV back into row dictionaries (for checks and tests)
+
+    Args:
+        data: Bytes from BulkJob.result_bytes()
+
+    Returns:
+        List of dictionaries of column name -> string value
+    """
+    with gzip.open(io.BytesIO(data), "rt", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
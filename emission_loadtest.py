@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Load Test
+-------------------------
+Hammer a running emission_service with concurrent keep-alive connections and
+report throughput and latency percentiles.
+
+Usage:
+    python emission_service.py --port 8080 &
+    python emission_loadtest.py --port 8080 --connections 64 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+REGIONS = ("TW", "US", "EU", "CN", "JP")
+
+
+def _random_site(rng):
+    return {
+        "region": rng.choice(REGIONS),
+        "annual_kwh": round(rng.uniform(1e4, 2e6), 1),
+        "car_count": rng.randint(0, 20),
+        "refrigerant_leak_kg": round(rng.uniform(0, 10), 2),
+        "refrigerant_gwp": rng.choice((675, 1430, 2088)),
+    }
+
+
+async def _worker(host, port, path, deadline, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps(_random_site(rng)).encode("utf-8")
+            request = (
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors.append(status_line.decode("latin-1").strip())
+    finally:
+        writer.close()
+
+
+async def run_load(host="127.0.0.1", port=8080, connections=64, duration=10.0, path="/estimate", seed=0):
+    """
+    Drive the service for a fixed duration
+
+    Args:
+        host: Service host
+        port: Service port
+        connections: Concurrent keep-alive connections
+        duration: Seconds to run
+        path: Endpoint to call
+        seed: Random seed for request payloads
+
+    Returns:
+        Dictionary with requests, errors, rps and latency percentiles (ms)
+    """
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(host, port, path, deadline, random.Random(seed + i), latencies, errors)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    cuts = statistics.quantiles(ms, n=100) if len(ms) >= 2 else ms * 99
+    return {
+        "requests": len(ms),
+        "errors": len(errors),
+        "rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(cuts[49], 2) if cuts else None,
+        "p95_ms": round(cuts[94], 2) if cuts else None,
+        "p99_ms": round(cuts[98], 2) if cuts else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for emission_service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", default="/estimate")
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run_load(args.host, args.port, args.connections, args.duration, args.path))
+    print(json.dumps(stats, indent=2))
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Market-Based Scope 2
+------------------------------------
+Allocates renewable certificates (RECs, GOs, I-RECs) and PPAs to site
+electricity consumption, then reports location-based and market-based
+Scope 2 side by side.
+
+Contracts match sites on market region and vintage. A contract issued for a
+subregion ("US-CAMX") serves only that subregion; a country contract ("US")
+serves every site in the country. Its vintage must fall within the window
+[year - vintage_before, year + vintage_after] of the site's reporting year.
+
+Allocation is greedy and runs in bulk. Contracts are sorted by (region,
+vintage, emission factor), so every (region, year) pool is a contiguous
+slice found with np.searchsorted. Within a pool the oldest, cleanest
+contracts go first, and sites are served in input order. Filling sites
+from contracts is a merge of the two cumulative-sum vectors, so a pool of
+n sites and m contracts costs O((n + m) log(n + m)) NumPy work. Years are
+processed in ascending order, so older vintages are used before they
+expire. Consumption left uncovered is charged at the residual-mix factor,
+which defaults to the location-based grid factor.
+
+Example:
+    contracts = read_contracts("contracts.csv")   # contract_id,region,vintage,mwh[,ef,kind]
+    result = market_scope2_batch(columns, contracts, years=2024)
+    result.totals()   # {"Location_Based": ..., "Market_Based": ..., "Covered_Percent": ...}
+"""
+
+import csv
+
+import numpy as np
+
+import emission_calc
+from emission_batch import batch_factors, prepare_columns, round_like_python, scope2_batch
+
+CONTRACT_FIELDS = ("contract_id", "region", "vintage", "mwh", "ef", "kind")
+DEFAULT_VINTAGE_BEFORE = 1
+DEFAULT_VINTAGE_AFTER = 0
+
+
+def consumption_kwh(col):
+    """
+    Annual kWh per site, by the same rule as scope2_batch()
+
+    Args:
+        col: prepare_columns() output
+
+    Returns:
+        np.ndarray of kWh (annual_kwh first, then monthly bill / price x 12)
+    """
+    annual, bill, price = col["annual_kwh"], col["monthly_bill_ntd"], col["price_per_kwh_ntd"]
+    use_kwh = (annual == annual) & (annual != 0)
+    use_bill = ~use_kwh & (bill == bill) & (bill != 0)
+    if np.any(use_bill & (price == 0)):
+        raise ZeroDivisionError("price_per_kwh_ntd must be non-zero when monthly_bill_ntd is used")
+    billed = np.divide(bill, price, out=np.zeros(annual.shape), where=use_bill) * 12
+    return np.where(use_kwh, annual, np.where(use_bill, billed, 0.0))
+
+
+def read_contracts(path):
+    """
+    Read certificate / PPA contracts from a CSV
+
+    Columns: contract_id, region, vintage, mwh, and optionally ef
+    (kg CO2/kWh of the contracted supply, default 0) and kind.
+
+    Returns:
+        Dictionary of CONTRACT_FIELDS -> np.ndarray
+    """
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    return {
+        "contract_id": np.array([row["contract_id"] for row in rows], dtype=str),
+        "region": np.array([row["region"].strip() for row in rows], dtype=str),
+        "vintage": np.array([int(row["vintage"]) for row in rows], dtype=np.int64),
+        "mwh": np.array([float(row["mwh"]) for row in rows], dtype=np.float64),
+        "ef": np.array([float(row.get("ef") or 0.0) for row in rows], dtype=np.float64),
+        "kind": np.array([row.get("kind") or "" for row in rows], dtype=str),
+    }
+
+
+def _label_lookup(labels, mapping, default):
+    """Per-row values of mapping[label] (exact, then parent country), default where missing"""
+    unique, inverse = np.unique(labels, return_inverse=True)
+    values = np.array([
+        mapping.get(label, mapping.get(emission_calc.parent_region(label), np.nan)) for label in unique.tolist()
+    ], dtype=np.float64)[inverse.ravel()]
+    return np.where(np.isnan(values), default, values)
+
+
+def _fill(demand, supply):
+    """
+    Greedy sequential fill of demand from supply
+
+    Args:
+        demand: kWh wanted per site, in service order
+        supply: kWh available per contract, in use order
+
+    Returns:
+        (site, contract, kwh) arrays of the non-empty allocation segments
+    """
+    cum_demand = np.cumsum(demand)
+    cum_supply = np.cumsum(supply)
+    limit = min(cum_demand[-1], cum_supply[-1])
+    points = np.union1d(cum_demand, cum_supply)
+    points = np.concatenate(([0.0], points[points < limit], [limit]))
+    lengths = np.diff(points)
+    keep = lengths > 0
+    middle = (points[:-1] + lengths / 2)[keep]
+    site = np.searchsorted(cum_demand, middle, side="right")
+    contract = np.searchsorted(cum_supply, middle, side="right")
+    return site, contract, lengths[keep]
+
+
+class MarketAllocation:
+    """
+    Result of a market-based Scope 2 allocation
+
+    Per-site arrays (tCO2e / kWh):
+        kwh, location_based, market_based, covered_kwh, residual_kwh,
+        residual_ef
+    Allocation records:
+        site_index, contract_index, allocated_kwh
+    Per-contract arrays:
+        contract_used_mwh, contract_remaining_mwh
+    """
+
+    def __init__(self, **arrays):
+        for name, values in arrays.items():
+            setattr(self, name, values)
+
+    def totals(self):
+        """
+        Portfolio totals side by side
+
+        Returns:
+            Dictionary with Location_Based and Market_Based (tCO2e), kWh,
+            Covered_kWh and Covered_Percent
+        """
+        kwh = float(self.kwh.sum())
+        covered = float(self.covered_kwh.sum())
+        return {
+            "Location_Based": round(float(self.location_based.sum()), 2),
+            "Market_Based": round(float(self.market_based.sum()), 2),
+            "kWh": round(kwh, 2),
+            "Covered_kWh": round(covered, 2),
+            "Covered_Percent": round(covered / kwh * 100, 1) if kwh else 0.0,
+        }
+
+    def by_region(self, regions):
+        """
+        Location- and market-based totals per region label
+
+        Args:
+            regions: Region label per site (the columns' region)
+
+        Returns:
+            Dictionary of columns: Region, Location_Based, Market_Based, Covered_Percent
+        """
+        labels, inverse = np.unique(np.asarray(regions, dtype=str), return_inverse=True)
+        inverse = inverse.ravel()
+        kwh = np.bincount(inverse, weights=self.kwh, minlength=labels.size)
+        covered = np.bincount(inverse, weights=self.covered_kwh, minlength=labels.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(kwh > 0, covered / kwh * 100, 0.0)
+        return {
+            "Region": labels,
+            "Location_Based": round_like_python(np.bincount(inverse, weights=self.location_based,
+                                                            minlength=labels.size), 2),
+            "Market_Based": round_like_python(np.bincount(inverse, weights=self.market_based,
+                                                          minlength=labels.size), 2),
+            "Covered_Percent": round_like_python(share, 1),
+        }
+
+
+def allocate_contracts(regions, years, kwh, contracts, vintage_before=DEFAULT_VINTAGE_BEFORE,
+                       vintage_after=DEFAULT_VINTAGE_AFTER):
+    """
+    Greedy bulk allocation of contract volumes to site consumption
+
+    Args:
+        regions: Region label per site ("US", "US-CAMX", ...)
+        years: Reporting year per site (or one year for all)
+        kwh: Consumption per site (kWh)
+        contracts: Dictionary with region, vintage, mwh and optional ef columns
+        vintage_before: Years before the reporting year a vintage may be
+        vintage_after: Years after the reporting year a vintage may be
+
+    Returns:
+        (site_index, contract_index, allocated_kwh, contract_used_kwh) arrays;
+        contract_index refers to the caller's contract order
+    """
+    regions = np.asarray(regions, dtype=str)
+    n = regions.size
+    years = np.broadcast_to(np.asarray(years, dtype=np.int64), (n,))
+    kwh = np.asarray(kwh, dtype=np.float64)
+
+    c_region = np.asarray(contracts["region"], dtype=str)
+    m = c_region.size
+    c_vintage = np.asarray(contracts["vintage"], dtype=np.int64)
+    c_kwh = np.asarray(contracts["mwh"], dtype=np.float64) * 1000
+    c_ef = np.asarray(contracts.get("ef", np.zeros(m)), dtype=np.float64)
+    c_ef = np.broadcast_to(c_ef, (m,))
+    if np.any(c_kwh < 0) or np.any(kwh < 0):
+        raise ValueError("Contract volumes and consumption must be non-negative")
+
+    # Region / vintage index: contracts sorted so each pool is one slice
+    order = np.lexsort((c_ef, c_vintage, c_region))
+    s_region, s_vintage = c_region[order], c_vintage[order]
+    remaining = c_kwh[order].copy()
+    need = kwh.copy()
+
+    sites_out, contracts_out, kwh_out = [], [], []
+    labels, inverse = np.unique(regions, return_inverse=True)
+    parents = np.array([emission_calc.parent_region(label) for label in labels.tolist()], dtype=str)
+
+    # Pass 1 matches the site's own label, pass 2 its country's contracts
+    for keys in (regions, parents[inverse.ravel()] if n else regions):
+        for year in np.unique(years).tolist():
+            in_year = years == year
+            for region in np.unique(keys[in_year]).tolist():
+                lo, hi = np.searchsorted(s_region, region, "left"), np.searchsorted(s_region, region, "right")
+                if lo == hi:
+                    continue
+                lo, hi = lo + np.searchsorted(s_vintage[lo:hi], year - vintage_before, "left"), \
+                    lo + np.searchsorted(s_vintage[lo:hi], year + vintage_after, "right")
+                pool = np.arange(lo, hi)[remaining[lo:hi] > 0]
+                sites = np.flatnonzero(in_year & (keys == region) & (need > 0))
+                if not pool.size or not sites.size:
+                    continue
+                site, contract, amount = _fill(need[sites], remaining[pool])
+                site, contract = sites[site], pool[contract]
+                need -= np.bincount(site, weights=amount, minlength=n)
+                remaining -= np.bincount(contract, weights=amount, minlength=m)
+                sites_out.append(site)
+                contracts_out.append(contract)
+                kwh_out.append(amount)
+
+    site_index = np.concatenate(sites_out) if sites_out else np.empty(0, dtype=np.int64)
+    contract_index = order[np.concatenate(contracts_out)] if contracts_out else np.empty(0, dtype=np.int64)
+    allocated = np.concatenate(kwh_out) if kwh_out else np.empty(0)
+    used = np.bincount(contract_index, weights=allocated, minlength=m)
+    return site_index, contract_index, allocated, used
+
+
+def market_scope2_batch(columns, contracts, years, residual_mix=None, factor_set=None,
+                        vintage_before=DEFAULT_VINTAGE_BEFORE, vintage_after=DEFAULT_VINTAGE_AFTER):
+    """
+    Location-based and market-based Scope 2 for a portfolio
+
+    Args:
+        columns: estimate_batch() input columns (region, annual_kwh or
+            monthly bill / price)
+        contracts: Dictionary with region, vintage, mwh and optional ef
+            (kg CO2/kWh, default 0) columns, e.g. from read_contracts()
+        years: Reporting year per site (or one year for all)
+        residual_mix: Optional mapping of region label -> residual-mix factor
+            (kg CO2/kWh); subregions fall back to their country, and regions
+            without one use the location-based grid factor
+        factor_set: Optional factor-set version or FactorSet for the grid factors
+        vintage_before: Years before the reporting year a vintage may be
+        vintage_after: Years after the reporting year a vintage may be
+
+    Returns:
+        MarketAllocation
+    """
+    col = prepare_columns(columns)
+    regions = np.asarray(col["region"], dtype=str)
+    kwh = consumption_kwh(col)
+    grid = np.broadcast_to(batch_factors(regions, factor_set)["grid"], kwh.shape)
+    location = scope2_batch(col["annual_kwh"], col["monthly_bill_ntd"], col["price_per_kwh_ntd"], grid)
+
+    site_index, contract_index, allocated, used = allocate_contracts(
+        regions, years, kwh, contracts, vintage_before, vintage_after
+    )
+    m = np.asarray(contracts["region"]).size
+    c_ef = np.broadcast_to(np.asarray(contracts.get("ef", np.zeros(m)), dtype=np.float64), (m,))
+    covered = np.bincount(site_index, weights=allocated, minlength=kwh.size)
+    contracted_t = np.bincount(site_index, weights=allocated * c_ef[contract_index], minlength=kwh.size) / 1000
+
+    residual_ef = grid if residual_mix is None else _label_lookup(regions, residual_mix, grid)
+    # Clip float noise so fully covered sites have exactly zero residual
+    residual = np.where(np.isclose(covered, kwh, rtol=1e-12, atol=1e-9), 0.0, kwh - covered)
+    market = contracted_t + residual * residual_ef / 1000
+
+    total_mwh = np.asarray(contracts["mwh"], dtype=np.float64)
+    return MarketAllocation(
+        kwh=kwh,
+        location_based=location,
+        market_based=market,
+        covered_kwh=covered,
+        residual_kwh=residual,
+        residual_ef=np.asarray(residual_ef, dtype=np.float64),
+        site_index=site_index,
+        contract_index=contract_index,
+        allocated_kwh=allocated,
+        contract_used_mwh=used / 1000,
+        contract_remaining_mwh=np.maximum(total_mwh - used / 1000, 0.0),
+    )
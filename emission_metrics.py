@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Metrics Module
+------------------------------
+Opt-in instrumentation for estimate(): per-stage timers and counters,
+call-volume and latency histograms by region and mode, Prometheus text export,
+structured JSON logs and a sampling profiler hook.
+While disabled, estimate() pays only a single `is not None` check.
+
+Example:
+    metrics = enable(log_every=1000, profile_every=10_000, profile_sink=print_stats)
+    ...
+    print(metrics.to_prometheus())
+    disable()
+"""
+
+import cProfile
+import json
+import logging
+import threading
+import time
+
+import emission_calc
+
+STAGES = (
+    "factors",             # factor-set resolution and grid factor lookup
+    "scope2",              # compute_scope2()
+    "scope1_vehicle",      # compute_scope1_vehicle()
+    "scope1_refrigerant",  # compute_scope1_refrigerant()
+    "scope3_minor",        # compute_minor_scope3()
+    "totals",              # Scope 1 / 1+2 totals and the rule of thumb
+    "result",              # shares, rounding and result-dict construction
+)
+# Latency histogram bucket upper bounds (seconds)
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3, 1e-2)
+LOGGER_NAME = "emission.metrics"
+
+
+class EstimateMetrics:
+    """
+    Per-stage timing of estimate()'s own pipeline (via
+    emission_calc._timed_components, the marked copy of the plain pipeline)
+
+    Attributes:
+        stage_seconds: Dictionary of stage -> cumulative seconds
+        stage_calls: Dictionary of stage -> times the stage ran
+        calls: Dictionary of (region, mode) -> [count, seconds, bucket counts...]
+        errors: Dictionary of (region, mode, exception name) -> count
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, log_every=0, logger=None, profile_every=0, profile_sink=None,
+                 clock=time.perf_counter):
+        """
+        Args:
+            buckets: Latency histogram bucket upper bounds in seconds
+            log_every: Emit a structured JSON log line for every Nth call (0 = never)
+            logger: logging.Logger for structured logs (default "emission.metrics")
+            profile_every: Run every Nth call under cProfile (0 = never)
+            profile_sink: Callable receiving the cProfile.Profile of a sampled call
+            clock: Timer returning seconds
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.log_every = log_every
+        self.logger = logger or logging.getLogger(LOGGER_NAME)
+        self.profile_every = profile_every
+        self.profile_sink = profile_sink
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        with self._lock:
+            self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+            self.stage_calls = dict.fromkeys(STAGES, 0)
+            self.calls = {}
+            self.errors = {}
+            self.total_calls = 0
+
+    # === Instrumented Path ===
+
+    def estimate(self, inputs, factor_set=None):
+        """
+        estimate() with per-stage timing
+
+        Args:
+            inputs: Inputs dataclass
+            factor_set: Optional factor-set version or FactorSet
+
+        Returns:
+            The estimate() result dictionary
+        """
+        with self._lock:
+            self.total_calls += 1
+            seq = self.total_calls
+        if self.profile_every and seq % self.profile_every == 0 and self.profile_sink is not None:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(self._timed_estimate, inputs, factor_set, seq)
+            self.profile_sink(profiler)
+            return result
+        return self._timed_estimate(inputs, factor_set, seq)
+
+    def _timed_estimate(self, inputs, factor_set, seq):
+        clock = self.clock
+        marks = [clock()]
+
+        def mark():
+            marks.append(clock())
+
+        try:
+            components = emission_calc._timed_components(inputs, factor_set, mark)
+            result = emission_calc._build_result(*components)
+            marks.append(clock())
+        except Exception as exc:
+            marks.append(clock())
+            self._record(inputs, marks, seq, type(exc).__name__)
+            raise
+        self._record(inputs, marks, seq)
+        return result
+
+    def _record(self, inputs, marks, seq, error=None):
+        # Stages completed before an exception are attributed; the failing one is not
+        timings = [end - begin for begin, end in zip(marks, marks[1:] if error is None else marks[1:-1])]
+        elapsed = marks[-1] - marks[0]
+        key = (inputs.region, inputs.mode)
+        with self._lock:
+            for stage, seconds in zip(STAGES, timings):
+                self.stage_seconds[stage] += seconds
+                self.stage_calls[stage] += 1
+            series = self.calls.get(key)
+            if series is None:
+                series = self.calls[key] = [0, 0.0] + [0] * len(self.buckets)
+            series[0] += 1
+            series[1] += elapsed
+            for i, bound in enumerate(self.buckets):
+                if elapsed <= bound:
+                    series[2 + i] += 1
+                    break
+            if error:
+                error_key = key + (error,)
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+        if self.log_every and seq % self.log_every == 0:
+            self.logger.info(json.dumps({
+                "event": "estimate",
+                "seq": seq,
+                "region": inputs.region,
+                "mode": inputs.mode,
+                "seconds": elapsed,
+                "stages": dict(zip(STAGES, timings)),
+                "error": error,
+            }))
+
+    # === Export ===
+
+    def snapshot(self):
+        """
+        Point-in-time copy of every metric
+
+        Returns:
+            JSON-serializable dictionary
+        """
+        with self._lock:
+            return {
+                "total_calls": self.total_calls,
+                "stages": {
+                    stage: {"calls": self.stage_calls[stage], "seconds": self.stage_seconds[stage]}
+                    for stage in STAGES
+                },
+                "calls": [
+                    {"region": region, "mode": mode, "count": series[0], "seconds": series[1],
+                     "buckets": dict(zip(self.buckets, series[2:]))}
+                    for (region, mode), series in sorted(self.calls.items())
+                ],
+                "errors": [
+                    {"region": region, "mode": mode, "error": error, "count": count}
+                    for (region, mode, error), count in sorted(self.errors.items())
+                ],
+            }
+
+    def log_snapshot(self):
+        """Emit the current snapshot as one structured JSON log line"""
+        self.logger.info(json.dumps({"event": "metrics_snapshot", **self.snapshot()}))
+
+    def to_prometheus(self):
+        """
+        Render metrics in the Prometheus text exposition format
+
+        Returns:
+            Exposition text (ends with a newline)
+        """
+        snap = self.snapshot()
+        lines = [
+            "# HELP emission_stage_seconds_total Cumulative seconds spent in each estimate() stage",
+            "# TYPE emission_stage_seconds_total counter",
+        ]
+        lines += [f'emission_stage_seconds_total{{stage="{stage}"}} {values["seconds"]!r}'
+                  for stage, values in snap["stages"].items()]
+        lines += [
+            "# HELP emission_stage_calls_total Times each estimate() stage ran",
+            "# TYPE emission_stage_calls_total counter",
+        ]
+        lines += [f'emission_stage_calls_total{{stage="{stage}"}} {values["calls"]}'
+                  for stage, values in snap["stages"].items()]
+        lines += [
+            "# HELP emission_estimate_seconds estimate() latency by region and mode",
+            "# TYPE emission_estimate_seconds histogram",
+        ]
+        for series in snap["calls"]:
+            labels = f'region="{series["region"]}",mode="{series["mode"]}"'
+            cumulative = 0
+            for bound, count in series["buckets"].items():
+                cumulative += count
+                lines.append(f'emission_estimate_seconds_bucket{{{labels},le="{bound!r}"}} {cumulative}')
+            lines.append(f'emission_estimate_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f'emission_estimate_seconds_sum{{{labels}}} {series["seconds"]!r}')
+            lines.append(f'emission_estimate_seconds_count{{{labels}}} {series["count"]}')
+        lines += [
+            "# HELP emission_estimate_errors_total estimate() calls that raised",
+            "# TYPE emission_estimate_errors_total counter",
+        ]
+        lines += [
+            f'emission_estimate_errors_total{{region="{e["region"]}",mode="{e["mode"]}",error="{e["error"]}"}} '
+            f'{e["count"]}'
+            for e in snap["errors"]
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# === Switch ===
+
+def enable(metrics=None, **kwargs):
+    """
+    Route estimate() through an EstimateMetrics instance
+
+    Args:
+        metrics: Existing EstimateMetrics to install (default: a new one)
+        **kwargs: EstimateMetrics arguments when creating a new instance
+
+    Returns:
+        The installed EstimateMetrics
+    """
+    if metrics is None:
+        metrics = EstimateMetrics(**kwargs)
+    emission_calc._instrumentation = metrics
+    return metrics
+
+
+def disable():
+    """Restore the uninstrumented estimate() path"""
+    emission_calc._instrumentation = None
+
+
+def current():
+    """The installed EstimateMetrics, or None while disabled"""
+    return emission_calc._instrumentation
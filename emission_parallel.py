@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Parallel Module
+-------------------------------
+Process-pool portfolio estimation.
+estimate() is a pure function, so a portfolio can be split into chunks and
+scored on every core; results come back in input order.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from emission_calc import estimate
+
+# Below this many sites the pool start-up costs more than it saves
+DEFAULT_MIN_PARALLEL = 20_000
+CHUNKS_PER_WORKER = 4
+
+
+def _estimate_chunk(chunk, factor_set=None):
+    """Worker entry point: score one chunk of Inputs in order"""
+    return [estimate(inputs, factor_set) for inputs in chunk]
+
+
+def default_workers():
+    """
+    Number of worker processes to use by default
+
+    Returns:
+        CPUs available to this process
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def split_chunks(sites, chunk_size):
+    """
+    Split a sequence into consecutive chunks
+
+    Args:
+        sites: Sequence of Inputs
+        chunk_size: Sites per chunk
+
+    Returns:
+        List of list slices, in input order
+    """
+    return [sites[i:i + chunk_size] for i in range(0, len(sites), chunk_size)]
+
+
+def estimate_portfolio(sites, workers=None, chunk_size=None, min_parallel=DEFAULT_MIN_PARALLEL, factor_set=None):
+    """
+    Estimate a large list of sites across a process pool
+
+    Args:
+        sites: Sequence of Inputs dataclasses
+        workers: Worker processes (default: available CPUs)
+        chunk_size: Sites per task (default: ~4 chunks per worker)
+        min_parallel: Portfolios smaller than this run in-process
+        factor_set: Optional factor-set version or FactorSet; file-backed
+            registries are re-mapped in each worker, not copied
+
+    Returns:
+        List of estimate() result dictionaries, in input order
+    """
+    sites = list(sites)
+    workers = workers or default_workers()
+
+    if workers <= 1 or len(sites) < min_parallel:
+        return _estimate_chunk(sites, factor_set)
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(sites) // (workers * CHUNKS_PER_WORKER)))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Executor.map yields chunk results in submission order
+        worker = partial(_estimate_chunk, factor_set=factor_set)
+        for chunk_results in pool.map(worker, split_chunks(sites, chunk_size)):
+            results.extend(chunk_results)
+    return results
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Refrigerant Catalog
+-----------------------------------
+Built-in refrigerant gases with 100-year GWPs from the IPCC Fourth, Fifth and
+Sixth Assessment Reports (AR4 / AR5 / AR6), plus blends computed from their
+mass composition (e.g. R-410A = 50% R-32 + 50% R-125). Names are held in a
+sorted NumPy array, so resolving an equipment inventory of millions of rows is
+one np.searchsorted pass instead of a dictionary lookup per row.
+
+Example:
+    catalog = default_catalog()
+    catalog.gwp("R-410A")                                  # 2087.5 (AR4)
+    catalog.lookup(inventory["refrigerant"], report="AR6") # np.ndarray of GWPs
+    columns = with_refrigerant_gwp(columns, report="AR5")  # fills refrigerant_gwp
+"""
+
+import numpy as np
+
+import emission_calc
+
+REPORTS = ("AR4", "AR5", "AR6")
+# AR4 matches the values long quoted in the calculator (R-134a 1430, R-32 675)
+DEFAULT_REPORT = "AR4"
+
+# Pure gases: (AR4, AR5, AR6) 100-year GWP
+GASES = {
+    "R-32": (675, 677, 771),
+    "R-125": (3500, 3170, 3740),
+    "R-134a": (1430, 1300, 1530),
+    "R-143a": (4470, 4800, 5810),
+    "R-152a": (124, 138, 164),
+    "R-227ea": (3220, 3350, 3600),
+    "R-23": (14800, 12400, 14600),
+    "R-22": (1810, 1760, 1960),
+    "R-1234yf": (4, 1, 0.501),
+    "CO2": (1, 1, 1),
+    "NH3": (0, 0, 0),
+}
+
+# Blends: component -> mass fraction
+BLENDS = {
+    "R-410A": {"R-32": 0.50, "R-125": 0.50},
+    "R-404A": {"R-125": 0.44, "R-143a": 0.52, "R-134a": 0.04},
+    "R-407C": {"R-32": 0.23, "R-125": 0.25, "R-134a": 0.52},
+    "R-507A": {"R-125": 0.50, "R-143a": 0.50},
+}
+
+# Alternative names accepted by lookups
+ALIASES = {
+    "R-744": "CO2",
+    "R-717": "NH3",
+}
+
+
+def normalize_names(names):
+    """
+    Canonical lookup keys: upper case, without dashes or spaces
+
+    Args:
+        names: String or array-like of strings
+
+    Returns:
+        np.ndarray of normalized strings ("R-410a " -> "R410A")
+    """
+    keys = np.char.upper(np.char.strip(np.asarray(names, dtype=str)))
+    return np.char.replace(np.char.replace(keys, "-", ""), " ", "")
+
+
+def report_index(report):
+    """Column of an assessment report in the GWP table"""
+    try:
+        return REPORTS.index(report)
+    except ValueError:
+        raise ValueError(f"Unknown assessment report {report!r}; expected one of {REPORTS}") from None
+
+
+def blend_gwp(composition, gases=GASES):
+    """
+    GWP of a blend as the mass-weighted sum of its components
+
+    Args:
+        composition: Mapping of component gas -> mass fraction (must sum to 1)
+        gases: Mapping of gas -> (AR4, AR5, AR6) GWP
+
+    Returns:
+        np.ndarray of the blend's GWP per report
+    """
+    fractions = np.array(list(composition.values()), dtype=np.float64)
+    if not np.isclose(fractions.sum(), 1.0):
+        raise ValueError(f"Blend fractions must sum to 1, got {fractions.sum():g}")
+    missing = [name for name in composition if name not in gases]
+    if missing:
+        raise KeyError(f"Unknown blend components: {missing}")
+    return fractions @ np.array([gases[name] for name in composition], dtype=np.float64)
+
+
+def _search(index, keys):
+    """Rows of keys in a (sorted keys, rows) index, plus a found mask"""
+    sorted_keys, rows = index
+    position = np.minimum(np.searchsorted(sorted_keys, keys), sorted_keys.size - 1)
+    return rows[position], sorted_keys[position] == keys
+
+
+class RefrigerantCatalog:
+    """
+    Sorted table of refrigerant names and their GWP per assessment report
+
+    Attributes:
+        names: Display names, in catalog order
+        gwp_table: np.ndarray (names, REPORTS) of GWP values
+    """
+
+    def __init__(self, gases=GASES, blends=BLENDS, aliases=ALIASES):
+        """
+        Args:
+            gases: Mapping of gas -> (AR4, AR5, AR6) GWP
+            blends: Mapping of blend -> {component gas: mass fraction}
+            aliases: Mapping of alternative name -> catalog name
+        """
+        self.names = list(gases) + list(blends)
+        self.gwp_table = np.vstack([
+            np.array(list(gases.values()), dtype=np.float64).reshape(-1, len(REPORTS)),
+            np.array([blend_gwp(parts, gases) for parts in blends.values()]).reshape(-1, len(REPORTS)),
+        ])
+        self.compositions = {name: dict(parts) for name, parts in blends.items()}
+
+        # Sorted keys -> row of gwp_table, once as spelled and once normalized
+        keys = np.array(list(self.names) + list(aliases), dtype=str)
+        rows = np.array(list(range(len(self.names))) + [self.names.index(target) for target in aliases.values()],
+                        dtype=np.int64)
+        normalized = normalize_names(keys)
+        if np.unique(normalized).size != normalized.size:
+            raise ValueError("Refrigerant names collide after normalization")
+        order = np.argsort(keys)
+        self._exact = (keys[order], rows[order])
+        order = np.argsort(normalized)
+        self._normalized = (normalized[order], rows[order])
+
+    def __contains__(self, name):
+        return bool(_search(self._normalized, normalize_names([name]))[1][0])
+
+    def find(self, names):
+        """
+        Catalog rows for an array of names
+
+        Names spelled exactly as in the catalog (the common case) are resolved
+        by a single searchsorted pass; only the distinct remaining spellings
+        are normalized and searched again.
+
+        Args:
+            names: np.ndarray of refrigerant names
+
+        Returns:
+            (rows, found) arrays of the same shape as names
+        """
+        rows, found = _search(self._exact, names)
+        if not found.all():
+            unique, inverse = np.unique(names[~found], return_inverse=True)
+            retry_rows, retry_found = _search(self._normalized, normalize_names(unique))
+            rows[~found] = retry_rows[inverse.ravel()]
+            found[~found] = retry_found[inverse.ravel()]
+        return rows, found
+
+    def gwp(self, name, report=DEFAULT_REPORT):
+        """
+        GWP of one refrigerant
+
+        Args:
+            name: Gas, blend or alias name (case, dashes and spaces ignored)
+            report: "AR4", "AR5" or "AR6"
+
+        Returns:
+            GWP as a float
+        """
+        return float(self.lookup([name], report)[0])
+
+    def lookup(self, names, report=DEFAULT_REPORT, default=None):
+        """
+        Vectorized GWP lookup for an equipment inventory
+
+        Args:
+            names: Array-like of refrigerant names, one per row
+            report: "AR4", "AR5" or "AR6"
+            default: GWP for unknown names (default: raise KeyError)
+
+        Returns:
+            np.ndarray of GWP values (float64), one per row
+        """
+        column = report_index(report)
+        names = np.asarray(names, dtype=str)
+        if names.size == 0:
+            return np.empty(names.shape)
+        rows, found = self.find(names)
+        values = self.gwp_table[rows, column]
+        if not found.all():
+            if default is None:
+                raise KeyError(f"Unknown refrigerants: {np.unique(names[~found])[:10].tolist()}")
+            values[~found] = float(default)
+        return values
+
+    def table(self, report=DEFAULT_REPORT):
+        """
+        Catalog as display rows
+
+        Args:
+            report: "AR4", "AR5" or "AR6"
+
+        Returns:
+            List of dictionaries with Refrigerant, GWP and Composition
+        """
+        column = report_index(report)
+        return [
+            {
+                "Refrigerant": name,
+                "GWP": round(float(self.gwp_table[i, column]), 3),
+                "Composition": " + ".join(f"{fraction:.0%} {part}"
+                                          for part, fraction in self.compositions.get(name, {}).items()),
+            }
+            for i, name in enumerate(self.names)
+        ]
+
+
+_default_catalog = None
+
+
+def default_catalog():
+    """Shared catalog of the built-in gases and blends"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = RefrigerantCatalog()
+    return _default_catalog
+
+
+def with_refrigerant_gwp(columns, report=DEFAULT_REPORT, name_column="refrigerant", catalog=None):
+    """
+    Fill refrigerant_gwp from a refrigerant-name column
+
+    Rows with an empty name keep their refrigerant_gwp (or get the Inputs
+    default if the column is absent).
+
+    Args:
+        columns: Dictionary of estimate_batch() input columns plus name_column
+        report: "AR4", "AR5" or "AR6"
+        name_column: Column holding refrigerant names
+        catalog: RefrigerantCatalog (default: default_catalog())
+
+    Returns:
+        New dictionary of columns with refrigerant_gwp resolved
+    """
+    catalog = catalog or default_catalog()
+    names = np.asarray(columns[name_column], dtype=str)
+    named = np.char.strip(names) != ""
+    current = columns.get("refrigerant_gwp")
+    gwp = np.full(names.shape, float(emission_calc.Inputs.refrigerant_gwp)) if current is None else \
+        np.array(np.broadcast_to(np.asarray(current, dtype=np.float64), names.shape))
+    if named.any():
+        gwp[named] = catalog.lookup(names[named], report)
+    out = {name: values for name, values in columns.items() if name != name_column}
+    out["refrigerant_gwp"] = gwp
+    return out
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Factor Revisions
+--------------------------------
+Incremental recompute of stored history when emission factors are revised.
+The old and new factor sets are compared region by region, and a dependency
+index maps each (region, factor type) to the stored rows that use it: grid
+rows with electricity consumption, gasoline rows with gasoline or a fleet,
+and so on. Only those rows are re-estimated. With a new version label, the
+untouched rows are copied inside SQLite. The change report gives old and new
+totals per site, per region, and per node of an organizational hierarchy.
+
+Example:
+    with ResultStore("emissions.db") as store:
+        report = revise_factors(store, "moenv:2024", "moenv:2025")
+        report.changes        # Region, Factor, Old, New
+        report.sites          # site_id, period, region, Old_Total, New_Total, Change, Change_Percent
+        report.by_region()
+        report.apply_to_hierarchy(tree, period="2024")
+"""
+
+import numpy as np
+
+from emission_batch import INPUT_FIELDS, batch_factors, estimate_batch, round_like_python
+from emission_hierarchy import COMPONENTS, S3
+from emission_store import TABLE, factor_version_of
+
+# Factor type -> SQL test for rows whose results use it (NULL inputs never match)
+DEPENDENCIES = {
+    "grid": "(annual_kwh != 0 OR monthly_bill_ntd != 0)",
+    # The fleet heuristic's tCO2e per car is derived from the gasoline factor
+    "gasoline": "(gasoline_liters_year != 0 OR car_count != 0 OR motorcycles != 0)",
+    "diesel": "(diesel_liters_year != 0)",
+    "water": "(include_scope3 != 0 AND water_m3_year != 0)",
+    "waste": "(include_scope3 != 0 AND waste_ton_year != 0)",
+}
+REVISED_FACTORS = tuple(DEPENDENCIES)
+
+
+def diff_factor_sets(old, new, regions):
+    """
+    Effective factors that differ between two factor sets
+
+    Fallbacks (subregion -> country -> TW, module constants for missing
+    types) are applied first, so a label counts as changed exactly when its
+    estimates would change.
+
+    Args:
+        old: Factor-set version, FactorSet, or None for the module constants
+        new: Factor-set version, FactorSet, or None for the module constants
+        regions: Region labels to compare
+
+    Returns:
+        Dictionary of columns: Region, Factor, Old, New (one row per change)
+    """
+    regions = np.unique(np.asarray(regions, dtype=str))
+    before = batch_factors(regions, old)
+    after = batch_factors(regions, new)
+    out = {"Region": [], "Factor": [], "Old": [], "New": []}
+    for factor in REVISED_FACTORS:
+        old_values = np.broadcast_to(np.asarray(before[factor], dtype=np.float64), regions.shape)
+        new_values = np.broadcast_to(np.asarray(after[factor], dtype=np.float64), regions.shape)
+        changed = np.flatnonzero(old_values != new_values)
+        out["Region"] += regions[changed].tolist()
+        out["Factor"] += [factor] * changed.size
+        out["Old"] += old_values[changed].tolist()
+        out["New"] += new_values[changed].tolist()
+    return {
+        "Region": np.array(out["Region"], dtype=str),
+        "Factor": np.array(out["Factor"], dtype=str),
+        "Old": np.array(out["Old"], dtype=np.float64),
+        "New": np.array(out["New"], dtype=np.float64),
+    }
+
+
+class FactorDependencyIndex:
+    """
+    (region, factor type) -> ids of the stored rows that depend on it
+
+    Built with one SQL pass over a factor version's rows that reads only the
+    id, region and dependency flags. It can be reused to evaluate several
+    candidate revisions.
+
+    Attributes:
+        factor_version: Version of the indexed rows
+        regions: Distinct region labels among them
+    """
+
+    def __init__(self, factor_version, ids, region_codes, regions, flags):
+        self.factor_version = factor_version
+        self.regions = regions
+        self._rows = {}
+        for column, factor in enumerate(REVISED_FACTORS):
+            depends = flags[:, column]
+            codes, row_ids = region_codes[depends], ids[depends]
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(regions.size + 1))
+            for code, (lo, hi) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+                if hi > lo:
+                    self._rows[(regions[code], factor)] = row_ids[order[lo:hi]]
+
+    @classmethod
+    def build(cls, store, factor_version):
+        """
+        Index the rows of one factor version
+
+        Args:
+            store: ResultStore
+            factor_version: Stored factor-set version label
+
+        Returns:
+            FactorDependencyIndex
+        """
+        flags = ", ".join(f"COALESCE({test}, 0)" for test in DEPENDENCIES.values())
+        rows = store.conn.execute(
+            f"SELECT id, region, {flags} FROM {TABLE} WHERE factor_version = ?", (factor_version,)
+        ).fetchall()
+        if not rows:
+            return cls(factor_version, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                       np.empty(0, dtype=str), np.zeros((0, len(DEPENDENCIES)), dtype=bool))
+        data = list(zip(*rows))
+        regions, codes = np.unique(np.array(data[1], dtype=str), return_inverse=True)
+        flags = np.array(data[2:], dtype=bool).T
+        return cls(factor_version, np.array(data[0], dtype=np.int64), codes.ravel(), regions, flags)
+
+    def rows(self, regions, factors):
+        """
+        Ids of the rows affected by changed (region, factor) pairs
+
+        Args:
+            regions: Region label per change
+            factors: Factor type per change
+
+        Returns:
+            Sorted np.ndarray of unique row ids
+        """
+        found = [self._rows.get(key) for key in zip(np.asarray(regions).tolist(), np.asarray(factors).tolist())]
+        found = [ids for ids in found if ids is not None]
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+
+class RevisionReport:
+    """
+    Outcome of revise_factors()
+
+    Attributes:
+        old_version, new_version: Factor-set version labels
+        changes: diff_factor_sets() columns
+        sites: Per recomputed row: site_id, period, region, Old_Total,
+            New_Total, Change, Change_Percent (Total_S1S2, tCO2e)
+        recomputed: Rows re-estimated
+        carried: Rows copied unchanged to the new version
+    """
+
+    def __init__(self, old_version, new_version, changes, rows, results, carried):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.changes = changes
+        self.recomputed = rows["site_id"].size
+        self.carried = carried
+        self._old = np.column_stack([rows[name] for name in COMPONENTS]) if self.recomputed \
+            else np.zeros((0, len(COMPONENTS)))
+        self._new = np.column_stack([results[name] for name in COMPONENTS]) if self.recomputed \
+            else np.zeros((0, len(COMPONENTS)))
+        old_total, new_total = rows["Total_S1S2"], np.asarray(results["Total_S1S2"], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = np.where(old_total != 0, (new_total - old_total) / old_total * 100, 0.0)
+        self.sites = {
+            "site_id": rows["site_id"],
+            "period": rows["period"],
+            "region": rows["region"],
+            "Old_Total": old_total,
+            "New_Total": new_total,
+            "Change": round_like_python(new_total - old_total, 2),
+            "Change_Percent": round_like_python(percent, 1),
+        }
+
+    def by_region(self):
+        """
+        Old and new totals of the recomputed rows per region
+
+        Returns:
+            Dictionary of columns: Region, Rows, Old_Total, New_Total, Change
+        """
+        labels, inverse = np.unique(self.sites["region"], return_inverse=True)
+        inverse = inverse.ravel()
+        old = np.bincount(inverse, weights=self.sites["Old_Total"], minlength=labels.size)
+        new = np.bincount(inverse, weights=self.sites["New_Total"], minlength=labels.size)
+        return {
+            "Region": labels,
+            "Rows": np.bincount(inverse, minlength=labels.size),
+            "Old_Total": round_like_python(old, 2),
+            "New_Total": round_like_python(new, 2),
+            "Change": round_like_python(new - old, 2),
+        }
+
+    def apply_to_hierarchy(self, tree, period=None, site_nodes=None):
+        """
+        Push the revision into a loaded EmissionHierarchy and report its nodes
+
+        The tree is expected to hold the old results. Each changed site's
+        delta is added along its path to the root (O(depth) per site).
+
+        Args:
+            tree: EmissionHierarchy
+            period: Only apply rows of this period (a tree holds one period)
+            site_nodes: Optional mapping of site_id -> node key or index
+                (default: the leaf whose key ends with the site_id)
+
+        Returns:
+            Dictionary of columns for every node on a changed path: Level,
+            Node, Old_Total, New_Total, Change (Total_S1S2)
+        """
+        if site_nodes is None:
+            site_nodes = {tree.keys[i][-1]: int(i) for i in tree.leaves()}
+        keep = np.ones(self.recomputed, dtype=bool) if period is None else self.sites["period"] == str(period)
+        delta = self._new[keep] - self._old[keep]
+
+        touched = {}
+        for site_id, change in zip(self.sites["site_id"][keep].tolist(), delta):
+            node = tree.node(site_nodes[site_id])
+            for i in tree.path_to_root(node):
+                touched.setdefault(i, tree.subtotal[i, :S3].sum())
+            tree.set_components(node, tree.own[node] + change)
+
+        nodes = sorted(touched, key=lambda i: (int(tree.depth[i]), i))
+        old = np.array([touched[i] for i in nodes], dtype=np.float64)
+        new = np.array([tree.subtotal[i, :S3].sum() for i in nodes], dtype=np.float64)
+        depth = tree.depth[nodes] if nodes else np.empty(0, dtype=np.int64)
+        return {
+            "Level": [tree.levels[d] if tree.levels else d for d in depth.tolist()],
+            "Node": [tree.keys[i] for i in nodes],
+            "Old_Total": round_like_python(old, 2),
+            "New_Total": round_like_python(new, 2),
+            "Change": round_like_python(new - old, 2),
+        }
+
+
+def revise_factors(store, old, new, carry_unchanged=True, index=None):
+    """
+    Recompute only the stored rows affected by a factor revision
+
+    Args:
+        store: ResultStore holding rows computed with `old`
+        old: Factor-set version, FactorSet, or None (module constants) the
+            rows were stored under
+        new: Revised factor-set version, FactorSet, or None
+        carry_unchanged: With a new version label, copy the unaffected rows to
+            it as well, so the new version holds complete history
+        index: Optional prebuilt FactorDependencyIndex for `old`
+
+    Returns:
+        RevisionReport
+    """
+    old_version, new_version = factor_version_of(old), factor_version_of(new)
+    if index is None or index.factor_version != old_version:
+        index = FactorDependencyIndex.build(store, old_version)
+
+    changes = diff_factor_sets(old, new, index.regions)
+    ids = index.rows(changes["Region"], changes["Factor"])
+    names = ("id", "site_id", "period", "region", "Total_S1S2") + tuple(
+        name for name in INPUT_FIELDS if name != "region") + COMPONENTS
+    rows = store.query(names, ids=ids)
+
+    carried = 0
+    if carry_unchanged and new_version != old_version:
+        carried = store.copy_rows(old_version, new_version, exclude_ids=ids)
+    results = {name: np.empty(0) for name in COMPONENTS + ("Total_S1S2",)}
+    if ids.size:
+        columns = {name: rows[name] for name in INPUT_FIELDS}
+        results = estimate_batch(columns, factor_set=new)
+        store.save_batch(rows["site_id"], rows["period"], columns, results, new)
+    return RevisionReport(old_version, new_version, changes, rows, results, carried)
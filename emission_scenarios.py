@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Scenario Module
+-------------------------------
+What-if sweeps over parameter grids.
+Each axis (e.g. electricity price x grid factor x fleet size x GWP) becomes one
+dimension of the result cube. Every component is computed only over the axes
+that feed it and broadcast across the rest, so a GWP axis re-runs the
+refrigerant component alone.
+
+Example:
+    cube = sweep(Inputs(monthly_bill_ntd=5000, car_count=5), {
+        "price_per_kwh_ntd": [3.5, 4.4, 5.0],
+        "grid_ef": [0.45, 0.495],
+        "car_count": [0, 5, 10],
+        "refrigerant_gwp": [675, 1430, 2088],
+    })
+    cube["Total_S1S2"].shape     # (3, 2, 3, 3)
+    cube.to_records()            # tidy rows
+"""
+
+import csv
+from dataclasses import asdict
+
+import numpy as np
+
+from emission_batch import (
+    BOOL_FIELDS,
+    FLOAT_FIELDS,
+    combine_batch,
+    grid_factors_for,
+    minor_scope3_batch,
+    round_results,
+    scope1_refrigerant_batch,
+    scope1_vehicle_batch,
+    scope2_batch,
+)
+
+# Extra sweepable parameter beyond the Inputs fields
+GRID_EF_AXIS = "grid_ef"
+
+# Which parameters feed which component
+COMPONENT_INPUTS = {
+    "scope2": ("annual_kwh", "monthly_bill_ntd", "price_per_kwh_ntd", "region", GRID_EF_AXIS),
+    "scope1_vehicle": ("car_count", "motorcycles", "gasoline_liters_year", "diesel_liters_year"),
+    "scope1_refrigerant": ("refrigerant_leak_kg", "refrigerant_gwp"),
+    "scope3_minor": ("water_m3_year", "waste_ton_year", "include_scope3"),
+}
+SWEEPABLE = {name for names in COMPONENT_INPUTS.values() for name in names} | {"use_rule_of_thumb"}
+
+
+class ScenarioCube:
+    """
+    N-dimensional sweep result
+
+    Attributes:
+        axes: Dictionary of axis name -> np.ndarray of values, in cube order
+        results: Dictionary of result column -> np.ndarray shaped like the cube
+        component_cells: Cells evaluated per component (shows what was reused)
+    """
+
+    def __init__(self, axes, results, component_cells):
+        self.axes = axes
+        self.results = results
+        self.component_cells = component_cells
+
+    @property
+    def shape(self):
+        return tuple(len(values) for values in self.axes.values())
+
+    def __getitem__(self, column):
+        return self.results[column]
+
+    def to_records(self):
+        """
+        Flatten the cube into a tidy table
+
+        Returns:
+            List of dictionaries, one per scenario, with axis values then results
+        """
+        grids = np.meshgrid(*self.axes.values(), indexing="ij")
+        flat = {name: grid.ravel().tolist() for name, grid in zip(self.axes, grids)}
+        flat.update({name: np.broadcast_to(values, self.shape).ravel().tolist()
+                     for name, values in self.results.items()})
+        names = list(flat)
+        return [dict(zip(names, row)) for row in zip(*flat.values())]
+
+    def to_csv(self, path):
+        """
+        Write the tidy table to CSV
+
+        Args:
+            path: Destination file path
+        """
+        records = self.to_records()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.axes) + list(self.results))
+            writer.writeheader()
+            writer.writerows(records)
+
+
+def _axis_value(name, values):
+    """Typed array for one axis"""
+    if name in FLOAT_FIELDS or name == GRID_EF_AXIS:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if name in BOOL_FIELDS:
+        return np.asarray(values, dtype=bool)
+    return np.asarray(values, dtype=str)
+
+
+def sweep(base, axes, round_output=True):
+    """
+    Evaluate every combination of the given parameter axes
+
+    Args:
+        base: Inputs with the values of every parameter that is not swept
+        axes: Ordered mapping of parameter -> sequence of values. Parameters are
+            Inputs fields (see COMPONENT_INPUTS) or "grid_ef" to override the
+            regional grid factor.
+        round_output: Round like estimate()
+
+    Returns:
+        ScenarioCube
+    """
+    unknown = set(axes) - SWEEPABLE
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; choose from {sorted(SWEEPABLE)}")
+
+    axis_values = {name: _axis_value(name, values) for name, values in axes.items()}
+    ndim = len(axis_values)
+
+    # Base values are scalars; swept values are shaped to broadcast along their own axis
+    p = {name: np.nan if value is None else value for name, value in asdict(base).items()}
+    for dim, (name, values) in enumerate(axis_values.items()):
+        shape = [1] * ndim
+        shape[dim] = len(values)
+        p[name] = values.reshape(shape)
+
+    if GRID_EF_AXIS not in p:
+        region = np.asarray(p["region"])
+        p[GRID_EF_AXIS] = grid_factors_for(region.reshape(-1)).reshape(region.shape)
+
+    # Each component only spans the axes in COMPONENT_INPUTS that were swept
+    partial = {
+        "scope2": scope2_batch(p["annual_kwh"], p["monthly_bill_ntd"], p["price_per_kwh_ntd"], p[GRID_EF_AXIS]),
+        "scope1_vehicle": scope1_vehicle_batch(
+            p["car_count"], p["motorcycles"], p["gasoline_liters_year"], p["diesel_liters_year"]
+        ),
+        "scope1_refrigerant": scope1_refrigerant_batch(p["refrigerant_leak_kg"], p["refrigerant_gwp"]),
+        "scope3_minor": minor_scope3_batch(p["water_m3_year"], p["waste_ton_year"], p["include_scope3"]),
+    }
+    component_cells = {name: int(np.size(values)) for name, values in partial.items()}
+
+    results = combine_batch(
+        partial["scope2"], partial["scope1_vehicle"], partial["scope1_refrigerant"], partial["scope3_minor"],
+        p["use_rule_of_thumb"],
+    )
+    shape = tuple(len(values) for values in axis_values.values())
+    results = {name: np.broadcast_to(values, shape) for name, values in results.items()}
+    results["Grid_EF"] = np.broadcast_to(p[GRID_EF_AXIS], shape)
+    if round_output:
+        results = round_results(results)
+    return ScenarioCube(axis_values, results, component_cells)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine HTTP Service
+----------------------------
+Asyncio JSON-over-HTTP estimation service (standard library only).
+Concurrent single-site requests are collected into micro-batches and scored
+with the vectorized batch engine; a bounded queue provides backpressure.
+
+Endpoints:
+    POST /estimate   Inputs fields as a JSON object   -> estimate() result
+    POST /quick      quick_estimate_from_monthly_bill() arguments
+    POST /detailed   detailed_estimate() arguments
+    POST /bulk       {"sites": [Inputs objects]}       -> {"results": [...]}
+    GET  /healthz    liveness
+    GET  /readyz     readiness (503 while the queue is saturated)
+
+Usage:
+    python emission_service.py --port 8080 --max-batch 256 --max-delay-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import fields
+
+from emission_calc import Inputs, detailed_inputs, quick_inputs_from_monthly_bill
+from emission_batch import estimate_batch, inputs_to_columns, results_to_records
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY = 0.002      # seconds a request may wait for batch-mates
+DEFAULT_MAX_PENDING = 10_000   # queued requests before answering 503
+DEFAULT_MAX_BODY = 64 * 1024 * 1024
+READY_QUEUE_RATIO = 0.9
+
+INPUT_FIELD_NAMES = {f.name for f in fields(Inputs)}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    """Raised when the micro-batch queue is full"""
+
+
+class BadRequest(Exception):
+    """Raised for malformed request payloads"""
+
+
+# === Micro-Batching ===
+
+class MicroBatcher:
+    """
+    Collect concurrent single-site requests into vectorized batches
+
+    A batch is flushed when it reaches max_batch requests or when its first
+    request has waited max_delay seconds, whichever comes first.
+    """
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY, max_pending=DEFAULT_MAX_PENDING):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.batches = 0
+        self.requests = 0
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, inputs):
+        """
+        Queue one Inputs for the next batch
+
+        Args:
+            inputs: Inputs dataclass
+
+        Returns:
+            Future resolving to the estimate() result dictionary
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((inputs, future))
+        except asyncio.QueueFull:
+            raise Overloaded("estimation queue is full") from None
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        pending = [(inputs, future) for inputs, future in batch if not future.done()]
+        if not pending:
+            return
+        self.batches += 1
+        self.requests += len(pending)
+        try:
+            records = results_to_records(estimate_batch(inputs_to_columns([inputs for inputs, _ in pending])))
+        except Exception:
+            # A bad row (e.g. a bill with zero price) fails the vectorized call;
+            # score one by one so only that request gets the error
+            for inputs, future in pending:
+                try:
+                    future.set_result(results_to_records(estimate_batch(inputs_to_columns([inputs])))[0])
+                except Exception as exc:
+                    future.set_exception(exc)
+            return
+        for (_, future), record in zip(pending, records):
+            future.set_result(record)
+
+
+# === Payload Parsing ===
+
+def _parse_json(body):
+    try:
+        return json.loads(body or b"{}")
+    except ValueError as exc:
+        raise BadRequest(f"invalid JSON: {exc}") from None
+
+
+def _inputs_from(payload):
+    """Build Inputs from a JSON object, rejecting unknown fields"""
+    if not isinstance(payload, dict):
+        raise BadRequest("expected a JSON object of Inputs fields")
+    unknown = set(payload) - INPUT_FIELD_NAMES
+    if unknown:
+        raise BadRequest(f"unknown Inputs fields: {sorted(unknown)}")
+    return Inputs(**payload)
+
+
+def _call_builder(builder, payload):
+    if not isinstance(payload, dict):
+        raise BadRequest("expected a JSON object")
+    try:
+        return builder(**payload)
+    except TypeError as exc:
+        raise BadRequest(str(exc)) from None
+
+
+# === HTTP Server ===
+
+class EstimationService:
+    """Asyncio HTTP/1.1 server around a MicroBatcher"""
+
+    def __init__(self, host="127.0.0.1", port=8080, max_batch=DEFAULT_MAX_BATCH,
+                 max_delay=DEFAULT_MAX_DELAY, max_pending=DEFAULT_MAX_PENDING, max_body=DEFAULT_MAX_BODY):
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.batcher = MicroBatcher(max_batch, max_delay, max_pending)
+        self.server = None
+        self.started_at = None
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started_at = time.time()
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    @property
+    def ready(self):
+        return self.batcher.running and self.batcher.queue.qsize() < READY_QUEUE_RATIO * self.batcher.max_pending
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest("malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise BadRequest("invalid Content-Length") from None
+        if length < 0:
+            raise BadRequest("invalid Content-Length")
+        if length > self.max_body:
+            raise OverflowError
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], version, headers, body
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except BadRequest as exc:
+                    await self._respond(writer, 400, {"error": str(exc)}, keep_alive=False)
+                    return
+                except OverflowError:
+                    await self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, path, version, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, payload, extra = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            "/estimate": self._estimate,
+            "/quick": self._quick,
+            "/detailed": self._detailed,
+            "/bulk": self._bulk,
+        }
+        try:
+            if path == "/healthz":
+                return 200, {"status": "ok", "uptime_s": round(time.time() - self.started_at, 1)}, None
+            if path == "/readyz":
+                status = 200 if self.ready else 503
+                return status, {"ready": status == 200, "queued": self.batcher.queue.qsize()}, None
+            handler = routes.get(path)
+            if handler is None:
+                return 404, {"error": f"no route for {path}"}, None
+            if method != "POST":
+                return 405, {"error": "use POST"}, None
+            return 200, await handler(_parse_json(body)), None
+        except BadRequest as exc:
+            return 400, {"error": str(exc)}, None
+        except Overloaded as exc:
+            return 503, {"error": str(exc)}, {"Retry-After": "1"}
+        except (ValueError, TypeError, ZeroDivisionError) as exc:
+            return 400, {"error": str(exc)}, None
+        except Exception as exc:  # pragma: no cover - last-resort guard
+            return 500, {"error": repr(exc)}, None
+
+    async def _estimate(self, payload):
+        return await self.batcher.submit(_inputs_from(payload))
+
+    async def _quick(self, payload):
+        return await self.batcher.submit(_call_builder(quick_inputs_from_monthly_bill, payload))
+
+    async def _detailed(self, payload):
+        return await self.batcher.submit(_call_builder(detailed_inputs, payload))
+
+    async def _bulk(self, payload):
+        sites = payload.get("sites") if isinstance(payload, dict) else payload
+        if not isinstance(sites, list):
+            raise BadRequest('expected {"sites": [...]}')
+        columns = inputs_to_columns([_inputs_from(site) for site in sites])
+        # Large bulk requests run off the event loop so single requests keep flowing
+        results = await asyncio.get_running_loop().run_in_executor(None, estimate_batch, columns)
+        return {"results": results_to_records(results)}
+
+    async def _respond(self, writer, status, payload, keep_alive=True, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        headers += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carbon emission estimation HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Requests per micro-batch")
+    parser.add_argument("--max-delay-ms", type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help="Latency budget a request may wait for batch-mates")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Queued requests before answering 503")
+    args = parser.parse_args(argv)
+
+    service = EstimationService(args.host, args.port, args.max_batch, args.max_delay_ms / 1000, args.max_pending)
+    print(f"🌍 Serving on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Result Store
+----------------------------
+Persistent, indexed history of estimates in an embedded SQLite database.
+Each row keeps the site, reporting period, factor-set version, every Inputs
+field and the flat result columns. The database runs in WAL mode, so UI
+sessions can read while batch jobs write. Rows are inserted in bulk with one
+executemany per chunk, and indexes on site, period and region keep range and
+aggregate queries fast. Period labels may be years ("2024"), half years
+("2024-H1"), quarters ("2024-Q1") or months ("2024-03"); start / end filters
+compare the months they cover, so mixed granularities filter correctly.
+
+Example:
+    with ResultStore("emissions.db") as store:
+        store.estimate_and_save(site_ids, "2024", columns)
+        store.history("S-001")
+        store.aggregate(by=("region",), start="2024", end="2024-12")
+"""
+
+import json
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+from emission_batch import (
+    BOOL_FIELDS,
+    EMISSION_COLUMNS,
+    FLOAT_FIELDS,
+    INPUT_FIELDS,
+    RESULT_COLUMNS,
+    SHARE_COLUMNS,
+    batch_length,
+    estimate_batch,
+    prepare_columns,
+)
+from emission_factors import BUILTIN_SOURCE, BUILTIN_YEAR, resolve_factor_set
+
+TABLE = "estimates"
+KEY_COLUMNS = ("site_id", "period", "year", "factor_version", "created_at")
+# "Region" is already stored as the region input
+STORED_RESULT_COLUMNS = tuple(name for name in RESULT_COLUMNS if name != "Region")
+GROUP_COLUMNS = ("site_id", "period", "year", "region", "mode", "factor_version")
+UNIQUE_COLUMNS = ("site_id", "period", "factor_version")
+# Part of a period label after the year: "-Q1", "-H2" or "-03"
+_SUBPERIOD = re.compile(r"-([QqHh]?)(\d{1,2})")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    id INTEGER PRIMARY KEY,
+    site_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    factor_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    {", ".join(f"{name} {'REAL' if name in FLOAT_FIELDS else 'INTEGER' if name in BOOL_FIELDS else 'TEXT'}"
+               for name in INPUT_FIELDS)},
+    {", ".join(f"{name} REAL" for name in STORED_RESULT_COLUMNS)},
+    UNIQUE ({", ".join(UNIQUE_COLUMNS)})
+);
+CREATE INDEX IF NOT EXISTS idx_{TABLE}_site_period ON {TABLE} (site_id, period);
+CREATE INDEX IF NOT EXISTS idx_{TABLE}_period_region ON {TABLE} (period, region);
+CREATE INDEX IF NOT EXISTS idx_{TABLE}_region_year ON {TABLE} (region, year);
+CREATE INDEX IF NOT EXISTS idx_{TABLE}_version_region ON {TABLE} (factor_version, region);
+"""
+
+
+def factor_version_of(factor_set):
+    """Version label stored with each row ("builtin:2024" for the module constants)"""
+    if factor_set is None:
+        return f"{BUILTIN_SOURCE}:{BUILTIN_YEAR}"
+    return resolve_factor_set(factor_set).version
+
+
+def period_year(period):
+    """Reporting year of a period label such as "2024", "2024-Q1" or "2024-03" """
+    return int(str(period)[:4])
+
+
+def period_months(period):
+    """
+    First and last month ("YYYY-MM") covered by a period label
+
+    "2024" -> ("2024-01", "2024-12"), "2024-H2" -> ("2024-07", "2024-12"),
+    "2024-Q1" -> ("2024-01", "2024-03"), "2024-03" -> ("2024-03", "2024-03").
+    Other labels cover their whole year.
+    """
+    period = str(period)
+    year, first, last = period[:4], 1, 12
+    match = _SUBPERIOD.fullmatch(period[4:])
+    if match:
+        kind, number = match.group(1).upper(), int(match.group(2))
+        months = {"Q": 3, "H": 6}.get(kind, 1)
+        first, last = (number - 1) * months + 1, number * months
+    return f"{year}-{first:02d}", f"{year}-{last:02d}"
+
+
+def _upsert(names):
+    """
+    ON CONFLICT clause that updates a stored (site, period, version) row in place
+
+    An UPDATE (rather than INSERT OR REPLACE's delete + insert) keeps the row
+    id and fires UPDATE triggers, such as the emission_cube maintenance ones.
+    """
+    updates = ", ".join(f"{name} = excluded.{name}" for name in names if name not in UNIQUE_COLUMNS)
+    return f" ON CONFLICT ({', '.join(UNIQUE_COLUMNS)}) DO UPDATE SET {updates}"
+
+
+def _sql_value(value):
+    """NaN (None in optional input fields) is stored as NULL"""
+    return None if value != value else value
+
+
+class ResultStore:
+    """
+    SQLite-backed store of estimate inputs, factor versions and results
+    """
+
+    def __init__(self, path=":memory:", timeout=30.0):
+        """
+        Args:
+            path: Database file (":memory:" for a throwaway store)
+            timeout: Seconds to wait for a competing writer's lock
+        """
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.create_function("period_first", 1, lambda p: period_months(p)[0], deterministic=True)
+        self.conn.create_function("period_last", 1, lambda p: period_months(p)[1], deterministic=True)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === Writes ===
+
+    def save_batch(self, site_ids, periods, columns, results, factor_set=None):
+        """
+        Insert (or replace) many estimates in one transaction
+
+        Args:
+            site_ids: Site identifier per row
+            periods: Period label per row, or one label for every row
+            columns: estimate_batch() input columns
+            results: estimate_batch() result columns for the same rows
+            factor_set: Factor-set version or FactorSet the results were computed with
+
+        Returns:
+            Number of rows written
+        """
+        col = prepare_columns(columns)
+        n = batch_length(col)
+        version = factor_version_of(factor_set)
+        periods = np.broadcast_to(np.asarray(periods, dtype=str), (n,)).tolist()
+        years = [period_year(period) for period in periods]
+        now = time.time()
+
+        values = [np.asarray(site_ids, dtype=str).tolist(), periods, years, [version] * n, [now] * n]
+        for name in INPUT_FIELDS:
+            data = col[name].tolist()
+            values.append([_sql_value(v) for v in data] if name in FLOAT_FIELDS else data)
+        values += [np.broadcast_to(results[name], (n,)).tolist() for name in STORED_RESULT_COLUMNS]
+
+        names = KEY_COLUMNS + INPUT_FIELDS + STORED_RESULT_COLUMNS
+        sql = f"INSERT INTO {TABLE} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})" + _upsert(names)
+        with self.conn:
+            self.conn.executemany(sql, zip(*values))
+        return n
+
+    def save(self, site_id, period, inputs, result, factor_set=None):
+        """
+        Store one estimate() result
+
+        Args:
+            site_id: Site identifier
+            period: Period label (e.g. "2024" or "2024-03")
+            inputs: Inputs dataclass
+            result: estimate() result dictionary
+            factor_set: Factor-set version or FactorSet used
+        """
+        columns = {name: [getattr(inputs, name)] for name in INPUT_FIELDS}
+        columns.update({name: [np.nan] for name in FLOAT_FIELDS if columns[name] == [None]})
+        flat = {name: [result[name]] for name in EMISSION_COLUMNS}
+        flat.update({name: [result["Share_Percent"][label]] for name, label in SHARE_COLUMNS.items()})
+        flat["Grid_EF"] = [result["Grid_EF"]]
+        self.save_batch([site_id], period, columns, flat, factor_set)
+
+    def estimate_and_save(self, site_ids, periods, columns, factor_set=None):
+        """
+        Run estimate_batch() and store every row
+
+        Returns:
+            The estimate_batch() result columns
+        """
+        results = estimate_batch(columns, factor_set=factor_set)
+        self.save_batch(site_ids, periods, columns, results, factor_set)
+        return results
+
+    def copy_rows(self, factor_version, new_version, exclude_ids=None):
+        """
+        Copy stored rows to another factor version inside SQLite, unchanged
+
+        Used for rows whose results a factor revision does not affect.
+
+        Args:
+            factor_version: Version of the rows to copy
+            new_version: Version label for the copies
+            exclude_ids: Optional row ids to leave out
+
+        Returns:
+            Number of rows copied
+        """
+        where, params = self._where(factor_version=factor_version, exclude_ids=exclude_ids)
+        names = ("site_id", "period", "year") + INPUT_FIELDS + STORED_RESULT_COLUMNS
+        with self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO {TABLE} ({', '.join(names)}, factor_version, created_at) "
+                f"SELECT {', '.join(names)}, ?, ? FROM {TABLE}{where}" + _upsert(names + ("created_at",)),
+                [new_version, time.time()] + params,
+            )
+        return cursor.rowcount
+
+    # === Reads ===
+
+    def _where(self, site_id=None, site_ids=None, period=None, start=None, end=None, year=None, region=None,
+               mode=None, factor_version=None, ids=None, exclude_ids=None):
+        clauses, params = [], []
+        if site_id is not None:
+            clauses.append("site_id = ?")
+            params.append(site_id)
+        if period is not None:
+            clauses.append("period = ?")
+            params.append(str(period))
+        # Year bounds come first; the per-row month test is only needed for sub-year bounds
+        if start is not None:
+            first = period_months(start)[0]
+            clauses.append("year >= ?")
+            params.append(int(first[:4]))
+            if not first.endswith("-01"):
+                clauses.append("period_first(period) >= ?")
+                params.append(first)
+        if end is not None:
+            last = period_months(end)[1]
+            clauses.append("year <= ?")
+            params.append(int(last[:4]))
+            if not last.endswith("-12"):
+                clauses.append("period_last(period) <= ?")
+                params.append(last)
+        if year is not None:
+            clauses.append("year = ?")
+            params.append(int(year))
+        if region is not None:
+            regions = [region] if isinstance(region, str) else list(region)
+            clauses.append(f"region IN ({', '.join('?' * len(regions))})")
+            params += regions
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if factor_version is not None:
+            clauses.append("factor_version = ?")
+            params.append(factor_version)
+        # Key lists are bound as one JSON array parameter: no per-key SQL variables, and no
+        # shared state or writes, so concurrent readers and open transactions are unaffected
+        if site_ids is not None:
+            clauses.append("site_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(np.asarray(site_ids, dtype=str).tolist()))
+        if ids is not None and exclude_ids is not None:
+            raise ValueError("Use either ids or exclude_ids, not both")
+        for row_ids, test in ((ids, "IN"), (exclude_ids, "NOT IN")):
+            if row_ids is not None:
+                clauses.append(f"id {test} (SELECT value FROM json_each(?))")
+                params.append(json.dumps(np.asarray(row_ids, dtype=np.int64).tolist()))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, columns=None, **filters):
+        """
+        Stored rows as NumPy columns
+
+        Args:
+            columns: Columns to return (default: everything)
+            **filters: site_id, site_ids, period, start / end (inclusive period
+                range; a row matches when every month of its period lies in
+                it), year, region (one or many), mode, factor_version,
+                ids / exclude_ids (row ids, as returned in the "id" column)
+
+        Returns:
+            Dictionary of column name -> np.ndarray, ordered by site_id, period
+        """
+        columns = tuple(columns or (KEY_COLUMNS + INPUT_FIELDS + STORED_RESULT_COLUMNS))
+        where, params = self._where(**filters)
+        rows = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM {TABLE}{where} ORDER BY site_id, period", params
+        ).fetchall()
+        data = list(zip(*rows)) if rows else [()] * len(columns)
+        out = {}
+        for name, values in zip(columns, data):
+            if name in FLOAT_FIELDS or name in STORED_RESULT_COLUMNS or name == "created_at":
+                out[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            elif name in BOOL_FIELDS:
+                out[name] = np.array(values, dtype=bool)
+            elif name in ("year", "id"):
+                out[name] = np.array(values, dtype=np.int64)
+            else:
+                out[name] = np.array(values, dtype=str)
+        return out
+
+    def get(self, site_id, period, factor_version=None):
+        """
+        Latest stored result for one site and period
+
+        Returns:
+            estimate()-style dictionary, or None if nothing is stored
+        """
+        where, params = self._where(site_id=site_id, period=period, factor_version=factor_version)
+        names = ("region",) + STORED_RESULT_COLUMNS
+        row = self.conn.execute(
+            f"SELECT {', '.join(names)} FROM {TABLE}{where} ORDER BY created_at DESC LIMIT 1", params
+        ).fetchone()
+        if row is None:
+            return None
+        values = dict(zip(names, row))
+        record = {name: values[name] for name in EMISSION_COLUMNS}
+        record["Share_Percent"] = {label: values[name] for name, label in SHARE_COLUMNS.items()}
+        record["Region"] = values["region"]
+        record["Grid_EF"] = values["Grid_EF"]
+        return record
+
+    def history(self, site_id, start=None, end=None, factor_version=None):
+        """
+        One site's stored results over a period range
+
+        Returns:
+            Dictionary of column name -> np.ndarray ordered by period
+        """
+        return self.query(
+            ("period", "factor_version", "region") + EMISSION_COLUMNS,
+            site_id=site_id, start=start, end=end, factor_version=factor_version,
+        )
+
+    def aggregate(self, by=("region",), measures=EMISSION_COLUMNS, **filters):
+        """
+        Summed emissions grouped in SQL
+
+        Args:
+            by: Grouping columns from GROUP_COLUMNS
+            measures: Result columns to sum
+            **filters: As for query()
+
+        Returns:
+            Dictionary with the group columns, "Sites" (row count) and one
+            np.ndarray of sums per measure
+        """
+        bad = [name for name in by if name not in GROUP_COLUMNS] + \
+              [name for name in measures if name not in STORED_RESULT_COLUMNS]
+        if bad:
+            raise ValueError(f"Cannot group or sum by {bad}")
+        where, params = self._where(**filters)
+        group = ", ".join(by)
+        select = ", ".join(tuple(by) + ("COUNT(*)",) + tuple(f"SUM({name})" for name in measures))
+        sql = f"SELECT {select} FROM {TABLE}{where}" + (f" GROUP BY {group} ORDER BY {group}" if by else "")
+        rows = self.conn.execute(sql, params).fetchall()
+        data = list(zip(*rows)) if rows else [()] * (len(by) + 1 + len(measures))
+        out = {name: np.array(values, dtype=np.int64 if name == "year" else str) for name, values in zip(by, data)}
+        out["Sites"] = np.array(data[len(by)], dtype=np.int64)
+        for name, values in zip(measures, data[len(by) + 1:]):
+            out[name] = np.array([0.0 if v is None else v for v in values], dtype=np.float64)
+        return out
+
+    def count(self, **filters):
+        """Number of stored rows matching the filters"""
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
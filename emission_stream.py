@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Streaming Module
+--------------------------------
+Chunked CSV/JSONL bulk estimation with constant memory.
+Rows are read in fixed-size chunks, mapped onto Inputs fields, scored with the
+vectorized batch engine and written out before the next chunk is read.
+
+Usage:
+    python emission_stream.py sites.csv -o results.csv --keep site_id
+    python emission_stream.py sites.jsonl.gz -o results.jsonl --map kwh=annual_kwh
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import math
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from emission_batch import (
+    BOOL_FIELDS,
+    FLOAT_FIELDS,
+    INPUT_DEFAULTS,
+    INPUT_FIELDS,
+    RESULT_COLUMNS,
+    estimate_batch,
+    results_to_records,
+)
+
+DEFAULT_CHUNK_SIZE = 50_000
+TRUE_STRINGS = {"1", "true", "t", "yes", "y"}
+
+
+# === Readers ===
+
+def _open_text(path, mode):
+    """Open a text file, transparently handling .gz compression"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def detect_format(path):
+    """
+    Guess the file format from its extension
+
+    Args:
+        path: File path (.csv / .jsonl / .ndjson, optionally .gz)
+
+    Returns:
+        "csv" or "jsonl"
+    """
+    suffixes = [s.lower() for s in Path(path).suffixes if s.lower() != ".gz"]
+    if suffixes and suffixes[-1] in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def read_rows(handle, fmt="csv"):
+    """
+    Lazily yield one dictionary per input row
+
+    Args:
+        handle: Open text file
+        fmt: "csv" or "jsonl"
+
+    Yields:
+        Dictionary of column name -> raw value
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(handle)
+        return
+    for line in handle:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_chunks(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Group an iterator of rows into lists of at most chunk_size rows
+
+    Args:
+        rows: Iterable of row dictionaries
+        chunk_size: Maximum rows per chunk
+
+    Yields:
+        Lists of row dictionaries
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# === Column Mapping ===
+
+def _parse_float(value, default):
+    """Parse a float cell; blanks and nulls take the Inputs default (None -> NaN)"""
+    if value is None or value == "":
+        return np.nan if default is None else default
+    return float(value)
+
+
+def _float_column(values, default, column, first_row):
+    """Parse one float column; a bad cell is reported with its row and column"""
+    try:
+        return np.array([_parse_float(v, default) for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        for offset, value in enumerate(values):
+            try:
+                _parse_float(value, default)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Row {first_row + offset}, column {column!r}: {exc}") from exc
+        raise
+
+
+def _parse_bool(value, default):
+    """Parse a boolean cell from CSV text or JSON"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+
+def rows_to_columns(rows, column_map=None, first_row=1):
+    """
+    Map raw rows onto estimate_batch() input columns
+
+    Args:
+        rows: List of row dictionaries
+        column_map: Optional mapping of source column -> Inputs field name.
+            Columns already named after Inputs fields are picked up directly.
+        first_row: Data row number of rows[0] in the source, used in parse errors
+
+    Returns:
+        Dictionary of Inputs field name -> np.ndarray (fields absent from the
+        source are left out so estimate_batch() applies the Inputs defaults)
+    """
+    sources = {field: field for field in INPUT_FIELDS}
+    for source, field in (column_map or {}).items():
+        if field not in INPUT_FIELDS:
+            raise ValueError(f"Unknown Inputs field in column map: {field!r}")
+        sources[field] = source
+
+    # JSON lines may omit keys row by row, so look at the whole chunk
+    present = set().union(*(row.keys() for row in rows))
+    columns = {}
+    for field, source in sources.items():
+        if source not in present:
+            continue
+        default = INPUT_DEFAULTS[field]
+        values = [row.get(source) for row in rows]
+        if field in FLOAT_FIELDS:
+            columns[field] = _float_column(values, default, source, first_row)
+        elif field in BOOL_FIELDS:
+            columns[field] = np.array([_parse_bool(v, default) for v in values], dtype=bool)
+        else:
+            columns[field] = np.array([v or default for v in values], dtype=str)
+    return columns
+
+
+# === Writers ===
+
+class CsvResultWriter:
+    """Write flat result columns to CSV, one chunk at a time"""
+
+    def __init__(self, handle, keep=()):
+        self.keep = tuple(keep)
+        self.writer = csv.writer(handle)
+        self.writer.writerow(self.keep + RESULT_COLUMNS)
+
+    def write(self, rows, results):
+        kept = [[row.get(name) for name in self.keep] for row in rows]
+        values = [np.asarray(results[name]).tolist() for name in RESULT_COLUMNS]
+        self.writer.writerows(k + list(v) for k, v in zip(kept, zip(*values)))
+
+
+def _null_non_finite(value):
+    """Replace NaN / infinity (not valid JSON) with None, inside nested dictionaries too"""
+    if isinstance(value, dict):
+        return {name: _null_non_finite(item) for name, item in value.items()}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class JsonlResultWriter:
+    """Write estimate()-style result dictionaries as JSON lines"""
+
+    def __init__(self, handle, keep=()):
+        self.keep = tuple(keep)
+        self.handle = handle
+
+    def write(self, rows, results):
+        lines = []
+        for row, record in zip(rows, results_to_records(results)):
+            if self.keep:
+                record = {**{name: row.get(name) for name in self.keep}, **record}
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, allow_nan=False))
+            except ValueError:
+                lines.append(json.dumps(_null_non_finite(record), ensure_ascii=False, allow_nan=False))
+        self.handle.write("\n".join(lines) + "\n")
+
+
+WRITERS = {"csv": CsvResultWriter, "jsonl": JsonlResultWriter}
+
+
+# === Pipeline ===
+
+def estimate_stream(rows, writer, chunk_size=DEFAULT_CHUNK_SIZE, column_map=None, progress=None):
+    """
+    Score an iterator of rows chunk by chunk and hand each chunk to a writer
+
+    Args:
+        rows: Iterable of row dictionaries
+        writer: Object with write(rows, results), e.g. CsvResultWriter
+        chunk_size: Rows per chunk; peak memory is proportional to this only
+        column_map: Optional mapping of source column -> Inputs field name
+        progress: Optional callback(rows_done, seconds_elapsed) after each chunk
+
+    Returns:
+        Dictionary with rows, seconds and rows_per_sec
+    """
+    start = time.perf_counter()
+    done = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        results = estimate_batch(rows_to_columns(chunk, column_map, done + 1))
+        writer.write(chunk, results)
+        done += len(chunk)
+        if progress:
+            progress(done, time.perf_counter() - start)
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": done,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(done / seconds, 1) if seconds else 0.0,
+    }
+
+
+def estimate_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, column_map=None,
+                  keep=(), input_format=None, output_format=None, progress=None):
+    """
+    Stream an input CSV/JSONL file into an output CSV/JSONL file
+
+    Args:
+        input_path: Source file (.csv / .jsonl, optionally .gz)
+        output_path: Destination file (.csv / .jsonl, optionally .gz)
+        chunk_size: Rows per chunk
+        column_map: Optional mapping of source column -> Inputs field name
+        keep: Source columns copied through to the output (e.g. site_id)
+        input_format: Override input format detection
+        output_format: Override output format detection
+        progress: Optional callback(rows_done, seconds_elapsed)
+
+    Returns:
+        Dictionary with rows, seconds and rows_per_sec
+    """
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+
+    with _open_text(input_path, "r") as source, _open_text(output_path, "w") as sink:
+        writer = WRITERS[output_format](sink, keep=keep)
+        return estimate_stream(read_rows(source, input_format), writer, chunk_size, column_map, progress)
+
+
+# === Command Line ===
+
+def _parse_column_map(pairs):
+    """Parse repeated --map source=field options"""
+    column_map = {}
+    for pair in pairs or ():
+        source, sep, field = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected source=field, got {pair!r}")
+        column_map[source] = field
+    return column_map
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk Scope 1 + 2 estimation for CSV/JSONL site exports")
+    parser.add_argument("input", help="Input file (.csv / .jsonl, optionally .gz)")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv / .jsonl, optionally .gz)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--map", action="append", metavar="SOURCE=FIELD", help="Map a source column to an Inputs field")
+    parser.add_argument("--keep", action="append", default=[], metavar="COLUMN", help="Copy a source column to the output")
+    parser.add_argument("--input-format", choices=sorted(WRITERS), help="Override input format detection")
+    parser.add_argument("--output-format", choices=sorted(WRITERS), help="Override output format detection")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    def report(done, seconds):
+        rate = done / seconds if seconds else 0.0
+        print(f"  {done:,} rows  {rate:,.0f} rows/s", file=sys.stderr)
+
+    stats = estimate_file(
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        column_map=_parse_column_map(args.map),
+        keep=args.keep,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        progress=None if args.quiet else report,
+    )
+    print(f"✅ {stats['rows']:,} rows in {stats['seconds']}s ({stats['rows_per_sec']:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
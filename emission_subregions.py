@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Grid Subregions
+-------------------------------
+Sub-national grid regions (eGRID subregions, provinces, ...) labelled
+"<country>-<subregion>", e.g. "US-CAMX" or "CN-GD". Sites are resolved to a
+subregion offline, from precomputed indexes:
+
+- PostalRangeIndex: sorted postal-code ranges per country; a whole column of
+  postal codes is resolved with one np.searchsorted pass
+- GridIndex: a raster of lat/lon cells (rasterized from subregion polygons),
+  stored as sorted cell keys and looked up the same way
+
+Subregion grid factors come from a user-supplied CSV and are merged into a
+FactorRegistry, so estimate() and estimate_batch() use them through the usual
+factor_set argument. A subregion without a factor uses its country's.
+
+Example:
+    resolver = SubregionResolver(
+        postal=PostalRangeIndex.from_csv("zip_ranges.csv"),
+        grid=GridIndex.load("subregion_grid.npz"),
+    )
+    columns["region"] = resolver.resolve(country, postal=zip_codes, lat=lat, lon=lon)
+    registry = registry_with_subregions(read_subregion_factors("egrid_2022.csv", source="egrid"))
+    estimate_batch(columns, factor_set=registry.factor_set("egrid:2022"))
+"""
+
+import csv
+from pathlib import Path
+
+import numpy as np
+
+import emission_calc
+from emission_factors import FactorRegistry, default_registry
+
+# Postal keys are country slot * POSTAL_SLOT + numeric postal code
+POSTAL_SLOT = 10 ** 9
+MAX_POSTAL_DIGITS = 9
+DEFAULT_GRID_RESOLUTION = 0.1   # degrees
+
+
+def subregion_label(country, subregion):
+    """ "US", "CAMX" -> "US-CAMX" """
+    return f"{country}{emission_calc.SUBREGION_SEPARATOR}{subregion}"
+
+
+def _search_ranges(starts, ends, codes, keys):
+    """Code of the [start, end] range holding each key, -1 where none does"""
+    position = np.searchsorted(starts, keys, side="right") - 1
+    inside = position >= 0
+    inside[inside] = keys[inside] <= ends[position[inside]]
+    return np.where(inside, codes[np.maximum(position, 0)], -1)
+
+
+# === Postal Codes ===
+
+def postal_numbers(postal, digits):
+    """
+    Numeric value of the first `digits` digits of each postal code
+
+    Dashes and spaces are dropped first, so "94105-1234" (ZIP+4) -> 94105 with
+    5 digits and "100-0001" -> 1000001 with 7.
+
+    Args:
+        postal: Array-like of postal-code strings
+        digits: Significant digits for the country
+
+    Returns:
+        np.ndarray of int64 (-1 for codes that are not numeric)
+    """
+    text = np.char.replace(np.char.replace(np.char.strip(np.asarray(postal, dtype=str)), "-", ""), " ", "")
+    text = text.astype(f"U{digits}")
+    numbers = np.full(text.shape, -1, dtype=np.int64)
+    numeric = (np.char.str_len(text) == digits) & np.char.isdigit(text)
+    numbers[numeric] = text[numeric].astype(np.int64)
+    return numbers
+
+
+class PostalRangeIndex:
+    """
+    Sorted, non-overlapping postal-code ranges mapped to subregion labels
+    """
+
+    def __init__(self, countries, digits, starts, ends, labels):
+        """
+        Args:
+            countries: Country code per range
+            digits: Mapping of country -> significant postal digits
+            starts: First postal code of each range (int)
+            ends: Last postal code of each range (inclusive)
+            labels: Subregion label per range (e.g. "US-CAMX")
+        """
+        self.digits = dict(digits)
+        self.countries = tuple(sorted(self.digits))
+        self._slot = {country: i for i, country in enumerate(self.countries)}
+        slots = np.array([self._slot[c] for c in countries], dtype=np.int64) * POSTAL_SLOT
+        starts = slots + np.asarray(starts, dtype=np.int64)
+        ends = slots + np.asarray(ends, dtype=np.int64)
+        if np.any(ends < starts):
+            raise ValueError("Postal range ends before it starts")
+
+        self.labels, label_codes = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        order = np.argsort(starts, kind="stable")
+        self.starts, self.ends, self.codes = starts[order], ends[order], label_codes.ravel()[order]
+        if np.any(self.starts[1:] <= self.ends[:-1]):
+            raise ValueError("Postal ranges overlap")
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Load ranges from a CSV with country, start, end, subregion columns
+
+        Postal codes are given as text of the country's full digit count
+        (e.g. "00501", "99950"); the count sets that country's digits.
+
+        Args:
+            path: CSV file
+
+        Returns:
+            PostalRangeIndex
+        """
+        countries, starts, ends, labels, digits = [], [], [], [], {}
+        with open(path, encoding="utf-8-sig", newline="") as handle:
+            for row in csv.DictReader(handle):
+                country = row["country"].strip()
+                start, end = row["start"].strip(), row["end"].strip()
+                if len(start) != len(end) or digits.setdefault(country, len(start)) != len(start):
+                    raise ValueError(f"Inconsistent postal-code length for {country}: {start!r}-{end!r}")
+                countries.append(country)
+                starts.append(int(start))
+                ends.append(int(end))
+                labels.append(subregion_label(country, row["subregion"].strip()))
+        return cls(countries, digits, starts, ends, labels)
+
+    def lookup(self, country, postal):
+        """
+        Subregion labels for postal codes
+
+        Args:
+            country: Country code per row (or one for all rows)
+            postal: Postal code per row
+
+        Returns:
+            np.ndarray of labels ("" where no range matches)
+        """
+        postal = np.asarray(postal, dtype=str)
+        country = np.broadcast_to(np.asarray(country, dtype=str), postal.shape)
+        keys = np.full(postal.shape, -1, dtype=np.int64)
+        for code, digits in self.digits.items():
+            rows = np.flatnonzero(country == code)
+            if rows.size:
+                numbers = postal_numbers(postal[rows], digits)
+                keys[rows] = np.where(numbers >= 0, self._slot[code] * POSTAL_SLOT + numbers, -1)
+        found = _search_ranges(self.starts, self.ends, self.codes, keys)
+        found[keys < 0] = -1
+        return np.where(found >= 0, self.labels[np.maximum(found, 0)], "")
+
+
+# === Coordinates ===
+
+def _points_in_polygon(x, y, ring):
+    """Even-odd test of points (x, y) against one closed ring of (lon, lat) vertices"""
+    ring = np.asarray(ring, dtype=np.float64)
+    x0, y0 = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    inside = np.zeros(x.shape, dtype=bool)
+    for ax, ay, bx, by in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        inside ^= crosses & (x < (bx - ax) * (y - ay) / (by - ay) + ax)
+    return inside
+
+
+class GridIndex:
+    """
+    Lat/lon raster of subregions, stored as sorted cell keys
+    """
+
+    def __init__(self, resolution, cells, codes, labels):
+        """
+        Args:
+            resolution: Cell size in degrees
+            cells: Cell keys (see cell_keys())
+            codes: Index into labels per cell
+            labels: Subregion labels
+        """
+        self.resolution = float(resolution)
+        self.columns = int(round(360 / self.resolution))
+        order = np.argsort(cells, kind="stable")
+        self.cells = np.asarray(cells, dtype=np.int64)[order]
+        self.codes = np.asarray(codes, dtype=np.int64)[order]
+        self.labels = np.asarray(labels, dtype=str)
+
+    def cell_keys(self, lat, lon):
+        """
+        Cell key per coordinate (row-major from 90°S, 180°W)
+
+        Returns:
+            np.ndarray of int64 (-1 for missing or out-of-range coordinates)
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        valid = (lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)
+        with np.errstate(invalid="ignore"):
+            row = np.floor((np.where(valid, lat, 0) + 90) / self.resolution).astype(np.int64)
+            col = np.floor((np.where(valid, lon, 0) + 180) / self.resolution).astype(np.int64) % self.columns
+        return np.where(valid, row * self.columns + col, -1)
+
+    @classmethod
+    def from_polygons(cls, polygons, resolution=DEFAULT_GRID_RESOLUTION):
+        """
+        Rasterize subregion polygons
+
+        A cell belongs to the subregion whose polygon contains its centre; where
+        polygons overlap, the later one wins.
+
+        Args:
+            polygons: Mapping of subregion label -> list of rings, each a
+                sequence of (lon, lat) vertices (holes use even-odd rings)
+            resolution: Cell size in degrees
+
+        Returns:
+            GridIndex
+        """
+        grid = cls(resolution, [], [], [])
+        owners = {}
+        for code, (label, rings) in enumerate(polygons.items()):
+            vertices = np.concatenate([np.asarray(ring, dtype=np.float64) for ring in rings])
+            lon0, lat0 = vertices.min(axis=0)
+            lon1, lat1 = vertices.max(axis=0)
+            rows = np.arange(np.floor((lat0 + 90) / resolution), np.ceil((lat1 + 90) / resolution), dtype=np.int64)
+            cols = np.arange(np.floor((lon0 + 180) / resolution), np.ceil((lon1 + 180) / resolution), dtype=np.int64)
+            row, col = (axis.ravel() for axis in np.meshgrid(rows, cols, indexing="ij"))
+            y = (row + 0.5) * resolution - 90
+            x = (col + 0.5) * resolution - 180
+            inside = np.zeros(row.shape, dtype=bool)
+            for ring in rings:
+                inside ^= _points_in_polygon(x, y, ring)
+            for key in (row[inside] * grid.columns + col[inside] % grid.columns).tolist():
+                owners[key] = code
+        return cls(resolution, list(owners), list(owners.values()), list(polygons))
+
+    def save(self, path):
+        """Write the raster to an .npz file"""
+        np.savez_compressed(path, resolution=self.resolution, cells=self.cells, codes=self.codes, labels=self.labels)
+
+    @classmethod
+    def load(cls, path):
+        """Load a raster written by save()"""
+        with np.load(path) as data:
+            return cls(float(data["resolution"]), data["cells"], data["codes"], data["labels"])
+
+    def lookup(self, lat, lon):
+        """
+        Subregion labels for coordinates
+
+        Args:
+            lat: Latitude per row (degrees)
+            lon: Longitude per row (degrees)
+
+        Returns:
+            np.ndarray of labels ("" outside every subregion)
+        """
+        keys = self.cell_keys(lat, lon)
+        if not self.cells.size:
+            return np.full(keys.shape, "", dtype=str)
+        position = np.minimum(np.searchsorted(self.cells, keys), self.cells.size - 1)
+        found = (self.cells[position] == keys) & (keys >= 0)
+        return np.where(found, self.labels[self.codes[position]], "")
+
+
+# === Resolution ===
+
+class SubregionResolver:
+    """
+    Postal code first, then coordinates, then the country itself
+    """
+
+    def __init__(self, postal=None, grid=None):
+        """
+        Args:
+            postal: Optional PostalRangeIndex
+            grid: Optional GridIndex
+        """
+        self.postal = postal
+        self.grid = grid
+
+    def resolve(self, country, postal=None, lat=None, lon=None):
+        """
+        Region label per site for Inputs.region / estimate_batch()
+
+        Args:
+            country: Country code per site (or one for all)
+            postal: Optional postal code per site
+            lat: Optional latitude per site
+            lon: Optional longitude per site
+
+        Returns:
+            np.ndarray of labels: subregion where resolved, otherwise the country
+        """
+        shapes = [np.shape(values) for values in (postal, lat, country) if values is not None and np.ndim(values)]
+        country = np.broadcast_to(np.asarray(country, dtype=str), shapes[0] if shapes else ())
+        labels = np.full(country.shape, "", dtype=object)
+        if postal is not None and self.postal is not None:
+            labels = self.postal.lookup(country, postal).astype(object)
+        if lat is not None and lon is not None and self.grid is not None:
+            missing = labels == ""
+            if missing.any():
+                labels[missing] = self.grid.lookup(np.asarray(lat, dtype=np.float64)[missing],
+                                                   np.asarray(lon, dtype=np.float64)[missing])
+        labels = np.where(labels == "", country, labels)
+        return labels.astype(str)
+
+
+# === Factors ===
+
+def read_subregion_factors(path, source="subregion", year=None):
+    """
+    Read subregion grid factors from a CSV
+
+    Columns: country, subregion, grid_ef (kg CO2/kWh), and year unless
+    given for the whole file. An optional source column overrides `source`.
+
+    Args:
+        path: CSV file
+        source: Factor source name for the records
+        year: Year for every row (default: the year column)
+
+    Returns:
+        List of (region, year, source, "grid", value) registry records
+    """
+    records = []
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle):
+            records.append((
+                subregion_label(row["country"].strip(), row["subregion"].strip()),
+                int(row["year"]) if year is None else int(year),
+                (row.get("source") or source).strip(),
+                "grid",
+                float(row["grid_ef"]),
+            ))
+    return records
+
+
+def registry_with_subregions(records, base=None):
+    """
+    Factor registry extended with subregion records
+
+    Args:
+        records: (region, year, source, factor_type, value) records, e.g. from
+            read_subregion_factors()
+        base: Registry to extend (default: default_registry())
+
+    Returns:
+        New FactorRegistry; the base's versions are kept, and each subregion
+        source:year becomes a version whose other regions and factor types
+        fall back to the country values and module constants
+    """
+    base = default_registry() if base is None else base
+    return FactorRegistry.from_records(base.records() + list(records))
+
+
+def save_subregion_registry(path, records, base=None):
+    """
+    Write a memory-mappable registry file including the subregions
+
+    Point $EMISSION_FACTOR_REGISTRY at it to make the subregion versions the
+    default everywhere (UI, service, workers).
+
+    Returns:
+        Path of the written file
+    """
+    registry_with_subregions(records, base).save(path)
+    return Path(path)
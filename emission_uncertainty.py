@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Engine Uncertainty Module
+----------------------------------
+Vectorized Monte Carlo confidence intervals for estimates.
+Factor and input uncertainties are sampled as whole NumPy arrays and pushed
+through the batch engine's components; P5/P50/P95 are reported per scope.
+Sites are processed in chunks sized so a (draws x sites) sample block stays
+under a fixed cell budget, so 10k draws x 100k sites never has to fit in memory.
+Shared factor multipliers are drawn once per draw. Each site's own draws come
+from a counter-based SplitMix64 stream keyed by the seed, the site index and
+the quantity, computed for a whole block at once in NumPy, so the same seed
+gives the same percentiles for any max_cells.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from emission_batch import (
+    EMISSION_COLUMNS,
+    batch_factors,
+    combine_batch,
+    minor_scope3_batch,
+    prepare_columns,
+    scope1_refrigerant_batch,
+    scope1_vehicle_batch,
+    scope2_batch,
+)
+
+DEFAULT_QUANTILES = (5, 50, 95)
+# Cells per (draws x sites) block; each intermediate array is 8 bytes per cell
+DEFAULT_MAX_CELLS = 2_000_000
+
+
+@dataclass(frozen=True)
+class UncertaintySpec:
+    """
+    Relative uncertainties (coefficient of variation) used for sampling
+
+    Multiplicative factors are lognormal with mean 1. Factor uncertainties are
+    shared by every site in a draw; activity-data uncertainties are per site.
+
+    Attributes:
+        grid_ef: Grid emission factor
+        fuel_ef: Gasoline / diesel emission factors
+        fleet: CAR_T_CO2E_PER_YEAR fleet assumption (km driven, fuel economy)
+        rule_of_thumb: (low, mode, high) Scope 1 / Scope 2 ratio, triangular
+        activity: Electricity kWh / bill and fuel liters (drawn independently)
+        refrigerant_leak: Refrigerant leakage mass
+        gwp: Refrigerant GWP
+        scope3: Water and waste factors
+    """
+    grid_ef: float = 0.05
+    fuel_ef: float = 0.02
+    fleet: float = 0.30
+    rule_of_thumb: tuple = (0.05, 0.10, 0.20)
+    activity: float = 0.05
+    refrigerant_leak: float = 0.50
+    gwp: float = 0.10
+    scope3: float = 0.30
+
+
+# Ids of the per-site random streams
+ACTIVITY_ELECTRICITY, ACTIVITY_FUEL, FLEET, REFRIGERANT_LEAK, RULE_OF_THUMB = range(1, 6)
+
+# SplitMix64 constants
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _lognormal_from(normals, cv):
+    """Mean-1 lognormal multipliers with coefficient of variation cv from standard normals"""
+    sigma = np.sqrt(np.log1p(cv ** 2))
+    return np.exp(sigma * normals - sigma ** 2 / 2)
+
+
+def _shared_lognormal(rng, cv, draws):
+    """(draws, 1) multipliers shared by every site in a draw"""
+    if not cv:
+        return np.ones((draws, 1))
+    return _lognormal_from(rng.standard_normal(draws), cv)[:, None]
+
+
+def _splitmix(x):
+    """SplitMix64 output function, elementwise on uint64 (wrapping arithmetic)"""
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def _site_uniforms(key, stream, sites, draws, per_draw=1):
+    """
+    (per_draw, draws, sites) uniforms on (0, 1) where each site's values depend only on the seed
+
+    Every (site, stream) pair seeds its own SplitMix64 sequence, and the
+    sequence is evaluated at counters 1, 2, ... for the whole block in one
+    pass, so a site draws the same values whatever block it is processed in.
+    """
+    sites = np.asarray(sites, dtype=np.uint64)
+    stream_word = np.uint64((int(key[1]) + stream * int(_GOLDEN)) % 2 ** 64)
+    seeds = _splitmix(_splitmix(key[0] + sites * _GOLDEN) ^ stream_word)
+    counters = np.arange(1, per_draw * draws + 1, dtype=np.uint64).reshape(per_draw, draws, 1)
+    bits = _splitmix(seeds + counters * _GOLDEN)
+    return ((bits >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+
+
+def _site_normals(key, stream, sites, draws):
+    """(draws, sites) standard normals from the per-site streams (Box-Muller, both outputs of each pair)"""
+    pairs = (draws + 1) // 2
+    radius, angle = _site_uniforms(key, stream, sites, pairs, per_draw=2)
+    radius = np.sqrt(-2.0 * np.log(radius))
+    angle *= 2.0 * np.pi
+    return np.concatenate([radius * np.cos(angle), radius * np.sin(angle)])[:draws]
+
+
+def _site_triangular(key, stream, sites, draws, low, mode, high):
+    """(draws, sites) triangular samples by inverse CDF from the per-site streams"""
+    u = _site_uniforms(key, stream, sites, draws)[0]
+    width = high - low
+    return np.where(
+        u < (mode - low) / width,
+        low + np.sqrt(u * width * (mode - low)),
+        high - np.sqrt((1 - u) * width * (high - mode)),
+    )
+
+
+def _site_lognormal(key, stream, sites, cv, draws):
+    if not cv:
+        return np.ones((draws, len(sites)))
+    return _lognormal_from(_site_normals(key, stream, sites, draws), cv)
+
+
+def _sample_shared(spec, rng, draws):
+    """Factor multipliers drawn once per draw for the whole portfolio"""
+    return {
+        "grid": _shared_lognormal(rng, spec.grid_ef, draws),
+        "fuel": _shared_lognormal(rng, spec.fuel_ef, draws),
+        "gwp": _shared_lognormal(rng, spec.gwp, draws),
+        "water": _shared_lognormal(rng, spec.scope3, draws),
+        "waste": _shared_lognormal(rng, spec.scope3, draws),
+    }
+
+
+def _sample_block(col, factors, spec, shared, key, sites, draws):
+    """Sample one (draws, sites) block of every emission column"""
+    electricity = _site_lognormal(key, ACTIVITY_ELECTRICITY, sites, spec.activity, draws)
+    s2 = scope2_batch(col["annual_kwh"] * electricity, col["monthly_bill_ntd"] * electricity,
+                      col["price_per_kwh_ntd"], factors["grid"] * shared["grid"])
+
+    fuel_liters = _site_lognormal(key, ACTIVITY_FUEL, sites, spec.activity, draws)
+    s1v = scope1_vehicle_batch(
+        col["car_count"], col["motorcycles"],
+        col["gasoline_liters_year"] * fuel_liters, col["diesel_liters_year"] * fuel_liters,
+        factors["gasoline"] * shared["fuel"], factors["diesel"] * shared["fuel"],
+        factors["car_t_per_year"] * _site_lognormal(key, FLEET, sites, spec.fleet, draws),
+    )
+    s1r = scope1_refrigerant_batch(
+        col["refrigerant_leak_kg"] * _site_lognormal(key, REFRIGERANT_LEAK, sites, spec.refrigerant_leak, draws),
+        col["refrigerant_gwp"] * shared["gwp"],
+    )
+    s3 = minor_scope3_batch(
+        col["water_m3_year"], col["waste_ton_year"], col["include_scope3"],
+        factors["water"] * shared["water"], factors["waste"] * shared["waste"],
+    )
+
+    low, mode, high = spec.rule_of_thumb
+    rule_ratio = _site_triangular(key, RULE_OF_THUMB, sites, draws, low, mode, high) if high > low else mode
+    return combine_batch(s2, s1v, s1r, s3, col["use_rule_of_thumb"], rule_ratio)
+
+
+def estimate_uncertainty(columns, draws=10_000, spec=UncertaintySpec(), quantiles=DEFAULT_QUANTILES,
+                         seed=None, max_cells=DEFAULT_MAX_CELLS, factor_set=None):
+    """
+    Monte Carlo percentiles per site and scope
+
+    Args:
+        columns: Mapping of Inputs field name -> array (as for estimate_batch())
+        draws: Monte Carlo draws per site
+        spec: UncertaintySpec with relative uncertainties
+        quantiles: Percentiles to report (0-100)
+        seed: Random seed for reproducible intervals
+        max_cells: Upper bound on draws x sites held in memory at once
+        factor_set: Optional factor-set version or FactorSet
+
+    Returns:
+        Dictionary of emission column (Scope2_Electricity, ..., Total_With_S3)
+        -> np.ndarray of shape (sites, len(quantiles)), in tCO2e
+    """
+    col = prepare_columns(columns)
+    n = len(col["region"])
+    factors = batch_factors(col["region"], factor_set)
+    seed_sequence = np.random.SeedSequence(seed)
+    shared = _sample_shared(spec, np.random.default_rng(seed_sequence), draws)
+    key = seed_sequence.generate_state(2, np.uint64)
+    sites_per_block = max(1, max_cells // draws)
+
+    out = {name: np.empty((n, len(quantiles))) for name in EMISSION_COLUMNS}
+    for start in range(0, n, sites_per_block):
+        stop = min(start + sites_per_block, n)
+        block_col = {name: np.asarray(values[start:stop]) for name, values in col.items()}
+        block_factors = {
+            name: value[start:stop] if np.ndim(value) else value for name, value in factors.items()
+        }
+        samples = _sample_block(block_col, block_factors, spec, shared, key, np.arange(start, stop), draws)
+        for name in EMISSION_COLUMNS:
+            out[name][start:stop] = np.percentile(samples[name], quantiles, axis=0).T
+    return out
@@ -0,0 +1,123 @@
+"""
+Bulk Multi-Site Upload
+Estimate hundreds of thousands of sites from one CSV / XLSX file
+"""
+import streamlit as st
+import sys
+from pathlib import Path
+
+# Add parent directory to path so the engine modules at the root import
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from emission_batch import INPUT_FIELDS
+from emission_jobs import UPLOAD_SUFFIXES, BulkJob
+
+POLL_SECONDS = 1.0
+
+
+# === Job Progress ===
+# Polls the background job once per second; only this fragment reruns, so the
+# rest of the page stays responsive while a job is running.
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_progress(job):
+    if not job.running:
+        # Leave polling mode: the full rerun renders the finished-job view
+        st.rerun()
+
+    if job.progress is None:
+        st.progress(0.0, text=f"{job.rows_done:,} rows processed")
+    else:
+        st.progress(job.progress, text=f"{job.rows_done:,} / {job.total_rows:,} rows")
+    st.caption(f"{job.rows_per_sec:,.0f} rows/s")
+
+    if st.button("⏹ Cancel", key="bulk_cancel"):
+        job.cancel()
+
+    head, latest = job.previews()
+    if latest:
+        st.write("**Latest chunk (preview):**")
+        st.dataframe(latest, use_container_width=True, hide_index=True)
+
+
+def job_summary(job):
+    if job.status == "done":
+        seconds = job.finished_at - job.started_at
+        st.success(f"✅ {job.rows_done:,} sites estimated in {seconds:.1f}s ({job.rows_per_sec:,.0f} rows/s)")
+        st.download_button(
+            "📥 Download Results (CSV, gzip)",
+            data=job.result_bytes(),
+            file_name=f"{Path(job.name).name.split('.')[0]}_results.csv.gz",
+            mime="application/gzip",
+            on_click="ignore",
+            use_container_width=True
+        )
+    elif job.status == "cancelled":
+        st.warning(f"Job cancelled after {job.rows_done:,} rows.")
+    else:
+        st.error(f"Job failed after {job.rows_done:,} rows: {job.error}")
+
+    head, _ = job.previews()
+    if head:
+        st.write("**First results (preview):**")
+        st.dataframe(head, use_container_width=True, hide_index=True)
+
+
+def main():
+    st.set_page_config(
+        page_title="Bulk Upload",
+        page_icon="📦",
+        layout="wide"
+    )
+
+    st.title("📦 Bulk Multi-Site Upload")
+
+    st.divider()
+
+    # === Upload ===
+    st.subheader("📤 Upload Sites")
+
+    with st.expander("ℹ️ Expected columns"):
+        st.write("One row per site. Columns named after these fields are picked up; missing columns use the calculator defaults.")
+        st.code(", ".join(INPUT_FIELDS))
+
+    uploaded = st.file_uploader(
+        "Sites file (CSV, CSV.GZ, JSONL or XLSX)",
+        type=list(UPLOAD_SUFFIXES),
+        key="bulk_upload_file"
+    )
+
+    keep = st.text_input(
+        "Columns to copy into the results",
+        value="site_id",
+        help="Comma-separated source columns, e.g. site_id, site_name",
+        key="bulk_keep_columns"
+    )
+
+    job = st.session_state.get("bulk_job")
+
+    if st.button("Start Estimation", type="primary", disabled=uploaded is None or (job is not None and job.running),
+                 use_container_width=True):
+        if job is not None:
+            job.discard()
+        job = BulkJob(
+            uploaded.getvalue(),
+            uploaded.name,
+            keep=[name.strip() for name in keep.split(",") if name.strip()]
+        ).start()
+        st.session_state.bulk_job = job
+
+    st.divider()
+
+    # === Progress / Results ===
+    if job is not None:
+        st.subheader("📈 Progress")
+        if job.running:
+            job_progress(job)
+        else:
+            job_summary(job)
+
+
+# Streamlit runs pages as __main__; importing the module only defines the functions
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from emission_calc import Inputs, estimate, GRID_EMISSION_FACTORS
+from emission_refrigerants import DEFAULT_REPORT, REPORTS, default_catalog
 
 # Import REGION_ELECTRICITY_PRICES with fallback
 try:
@@ -24,20 +25,7 @@ except ImportError:
         "JP": {"price": 25, "currency": "JPY", "symbol": "¥", "note": "Japan average commercial electricity rate"}
     }
 
-st.set_page_config(
-    page_title="Calculator",
-    page_icon="🌍",
-    layout="wide"
-)
-
-st.title("🌍 Carbon Emission Calculator")
-
-st.divider()
-
-# === Region Selection ===
-st.subheader("📍 Region Selection")
-
-region_names = {
+REGION_NAMES = {
     "TW": "🇹🇼 Taiwan",
     "US": "🇺🇸 United States",
     "EU": "🇪🇺 European Union",
@@ -45,36 +33,17 @@ region_names = {
     "JP": "🇯🇵 Japan"
 }
 
-region = st.selectbox(
-    "Select Your Region",
-    options=list(region_names.keys()),
-    format_func=lambda x: region_names[x],
-    help="Different regions have different grid emission factors",
-    key="calc_region_selector"
-)
-
-grid_ef = GRID_EMISSION_FACTORS[region]
-st.info(f"Grid Emission Factor: **{grid_ef} kg CO2/kWh**")
-
-# Store current region in session state to detect changes
-if "calc_last_region" not in st.session_state:
-    st.session_state.calc_last_region = region
+CUSTOM_REFRIGERANT = "Custom GWP"
+REFRIGERANT_CHOICES = default_catalog().names + [CUSTOM_REFRIGERANT]
 
-# Reset price when region changes to match new region's default
-if st.session_state.calc_last_region != region:
-    st.session_state.calc_last_region = region
-    # Reset price to new region's default when region changes
-    new_region_config = REGION_ELECTRICITY_PRICES.get(region, REGION_ELECTRICITY_PRICES["TW"])
-    st.session_state.calc_price_kwh = float(new_region_config["price"])
 
-st.divider()
+# === Input Tabs ===
+# Each tab is a fragment: editing one of its widgets reruns only that tab.
+# Calculate buttons trigger a full rerun so the results section picks up the
+# new result.
 
-# === Input Section ===
-st.subheader("📊 Input Data")
-
-tab1, tab2 = st.tabs(["Quick Mode", "Detailed Mode"])
-
-with tab1:
+@st.fragment
+def quick_mode_tab(region):
     st.write("**Quick Estimation (Monthly Bill)**")
     
     # Check if clear was requested
@@ -138,7 +107,7 @@ with tab1:
     with col2:
         motorcycles = st.number_input("Number of Motorcycles", min_value=0, value=10, key="calc_motorcycles")
     
-    if st.button("Calculate (Quick)", type="primary", use_container_width=True):
+    if st.button("Calculate (Quick)", type="primary", key="calc_quick_submit", use_container_width=True):
         inputs = Inputs(
             region=region,
             mode="quick",
@@ -152,15 +121,19 @@ with tab1:
         result = estimate(inputs)
         st.session_state.result = result
         st.session_state.calculation_done = True
+        st.rerun()
 
-with tab2:
+
+@st.fragment
+def detailed_mode_tab(region):
     st.write("**Detailed Estimation**")
     
     annual_kwh = st.number_input(
         "Annual Electricity Consumption (kWh)",
         min_value=0,
         value=500000,
-        step=10000
+        step=10000,
+        key="calc_annual_kwh"
     )
     
     col1, col2 = st.columns(2)
@@ -188,13 +161,39 @@ with tab2:
             step=1000
         )
         
-        gwp = st.number_input(
-            "Refrigerant GWP",
-            min_value=0,
-            value=1430,
-            step=100,
-            help="Common: R-134a (1430), R-410A (2088), R-32 (675)"
+        refrigerant_name = st.selectbox(
+            "Refrigerant",
+            REFRIGERANT_CHOICES,
+            index=REFRIGERANT_CHOICES.index("R-134a"),
+            key="calc_refrigerant"
         )
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        report = st.selectbox(
+            "GWP Source",
+            REPORTS,
+            index=REPORTS.index(DEFAULT_REPORT),
+            help="IPCC assessment report (100-year GWP)",
+            key="calc_gwp_report"
+        )
+
+    with col2:
+        if refrigerant_name == CUSTOM_REFRIGERANT:
+            gwp = st.number_input(
+                "Refrigerant GWP",
+                min_value=0,
+                value=1430,
+                step=100,
+                key="calc_custom_gwp"
+            )
+        else:
+            gwp = default_catalog().gwp(refrigerant_name, report)
+            composition = default_catalog().compositions.get(refrigerant_name)
+            st.markdown(f"**Refrigerant GWP:** {gwp:,.4g}")
+            if composition:
+                st.caption("Blend: " + " + ".join(f"{fraction:.0%} {part}" for part, fraction in composition.items()))
     
     include_scope3 = st.checkbox("Include Scope 3 (Water & Waste)", value=True)
     
@@ -208,7 +207,7 @@ with tab2:
         water = 0
         waste = 0
     
-    if st.button("Calculate (Detailed)", type="primary", use_container_width=True):
+    if st.button("Calculate (Detailed)", type="primary", key="calc_detailed_submit", use_container_width=True):
         inputs = Inputs(
             region=region,
             mode="detail",
@@ -225,11 +224,37 @@ with tab2:
         result = estimate(inputs)
         st.session_state.result = result
         st.session_state.calculation_done = True
+        st.rerun()
+
 
-st.divider()
+# === Results ===
 
-# === Results Section ===
-if st.session_state.get("calculation_done"):
+@st.cache_data(max_entries=256, show_spinner=False)
+def report_text(result, region_label):
+    """Downloadable text report for one result (cached per result)"""
+    report = f"""Carbon Emission Calculation Report
+===================================
+
+Region: {region_label}
+Grid Emission Factor: {result['Grid_EF']} kg CO2/kWh
+
+RESULTS
+-------
+Scope 2 (Electricity): {result['Scope2_Electricity']} tCO2e ({result['Share_Percent']['Electricity']}%)
+Scope 1 (Vehicles): {result['Scope1_Vehicles']} tCO2e ({result['Share_Percent']['Vehicles']}%)
+Scope 1 (Refrigerant): {result['Scope1_Refrigerant']} tCO2e ({result['Share_Percent']['Refrigerant']}%)
+Scope 1 Total: {result['Scope1_Total']} tCO2e
+
+Total Emissions (Scope 1+2): {result['Total_S1S2']} tCO2e
+"""
+    
+    if result['Scope3_Minor'] > 0:
+        report += f"Scope 3 (Minor): {result['Scope3_Minor']} tCO2e\n"
+        report += f"Total Emissions (with Scope 3): {result['Total_With_S3']} tCO2e\n"
+    return report
+
+
+def results_section():
     st.subheader("📈 Results")
     
     result = st.session_state.result
@@ -285,64 +310,111 @@ if st.session_state.get("calculation_done"):
     
     with col2:
         st.write("**Calculation Details:**")
-        st.write(f"- Region: {region_names[result['Region']]}")
+        st.write(f"- Region: {REGION_NAMES[result['Region']]}")
         st.write(f"- Grid Emission Factor: {result['Grid_EF']} kg CO2/kWh")
         st.write(f"- Electricity Share: {result['Share_Percent']['Electricity']}%")
         st.write(f"- Vehicles Share: {result['Share_Percent']['Vehicles']}%")
         st.write(f"- Refrigerant Share: {result['Share_Percent']['Refrigerant']}%")
     
-    # Download Button
+    # Download Button (does not trigger a rerun)
     st.divider()
     
-    report = f"""Carbon Emission Calculation Report
-===================================
-
-Region: {region_names[result['Region']]}
-Grid Emission Factor: {result['Grid_EF']} kg CO2/kWh
-
-RESULTS
--------
-Scope 2 (Electricity): {result['Scope2_Electricity']} tCO2e ({result['Share_Percent']['Electricity']}%)
-Scope 1 (Vehicles): {result['Scope1_Vehicles']} tCO2e ({result['Share_Percent']['Vehicles']}%)
-Scope 1 (Refrigerant): {result['Scope1_Refrigerant']} tCO2e ({result['Share_Percent']['Refrigerant']}%)
-Scope 1 Total: {result['Scope1_Total']} tCO2e
-
-Total Emissions (Scope 1+2): {result['Total_S1S2']} tCO2e
-"""
-    
-    if result['Scope3_Minor'] > 0:
-        report += f"Scope 3 (Minor): {result['Scope3_Minor']} tCO2e\n"
-        report += f"Total Emissions (with Scope 3): {result['Total_With_S3']} tCO2e\n"
-    
     st.download_button(
         "📥 Download Report",
-        data=report,
+        data=report_text(result, REGION_NAMES[result['Region']]),
         file_name="carbon_emission_report.txt",
         mime="text/plain",
+        on_click="ignore",
         use_container_width=True
     )
 
-st.divider()
 
-# === Information Section ===
-with st.expander("ℹ️ About Emission Factors"):
-    st.write("""
-    **Grid Emission Factors by Region:**
-    
-    | Region | EF (kg CO2/kWh) | Year |
-    |--------|----------------|------|
-    | Taiwan 🇹🇼 | 0.495 | 2024 |
-    | USA 🇺🇸 | 0.386 | 2024 |
-    | EU 🇪🇺 | 0.295 | 2024 |
-    | China 🇨🇳 | 0.581 | 2024 |
-    | Japan 🇯🇵 | 0.441 | 2024 |
-    
-    **Fuel Emission Factors:**
-    - Gasoline: 2.3 kg CO2/L
-    - Diesel: 2.6 kg CO2/L
-    
-    **Scope 3 Coverage:**
-    - ✅ Water consumption
-    - ✅ Waste disposal
-    - ⚠️ Supply chain data not included (unavailable for most SMEs)
-    """)
+def factor_info():
+    with st.expander("ℹ️ About Emission Factors"):
+        st.write("""
+        **Grid Emission Factors by Region:**
+    
+        | Region | EF (kg CO2/kWh) | Year |
+        |--------|----------------|------|
+        | Taiwan 🇹🇼 | 0.495 | 2024 |
+        | USA 🇺🇸 | 0.386 | 2024 |
+        | EU 🇪🇺 | 0.295 | 2024 |
+        | China 🇨🇳 | 0.581 | 2024 |
+        | Japan 🇯🇵 | 0.441 | 2024 |
+    
+        **Fuel Emission Factors:**
+        - Gasoline: 2.3 kg CO2/L
+        - Diesel: 2.6 kg CO2/L
+    
+        **Scope 3 Coverage:**
+        - ✅ Water consumption
+        - ✅ Waste disposal
+        - ⚠️ Supply chain data not included (unavailable for most SMEs)
+        """)
+
+
+def main():
+    st.set_page_config(
+        page_title="Calculator",
+        page_icon="🌍",
+        layout="wide"
+    )
+    
+    st.title("🌍 Carbon Emission Calculator")
+    
+    st.divider()
+    
+    # === Region Selection ===
+    # Region changes rerun the whole page: tabs, prices and results depend on it
+    st.subheader("📍 Region Selection")
+    
+    region = st.selectbox(
+        "Select Your Region",
+        options=list(REGION_NAMES.keys()),
+        format_func=lambda x: REGION_NAMES[x],
+        help="Different regions have different grid emission factors",
+        key="calc_region_selector"
+    )
+    
+    grid_ef = GRID_EMISSION_FACTORS[region]
+    st.info(f"Grid Emission Factor: **{grid_ef} kg CO2/kWh**")
+    
+    # Store current region in session state to detect changes
+    if "calc_last_region" not in st.session_state:
+        st.session_state.calc_last_region = region
+    
+    # Reset price when region changes to match new region's default
+    if st.session_state.calc_last_region != region:
+        st.session_state.calc_last_region = region
+        # Reset price to new region's default when region changes
+        new_region_config = REGION_ELECTRICITY_PRICES.get(region, REGION_ELECTRICITY_PRICES["TW"])
+        st.session_state.calc_price_kwh = float(new_region_config["price"])
+    
+    st.divider()
+    
+    # === Input Section ===
+    st.subheader("📊 Input Data")
+    
+    tab1, tab2 = st.tabs(["Quick Mode", "Detailed Mode"])
+    
+    with tab1:
+        quick_mode_tab(region)
+    
+    with tab2:
+        detailed_mode_tab(region)
+    
+    st.divider()
+    
+    # === Results Section ===
+    if st.session_state.get("calculation_done"):
+        results_section()
+    
+    st.divider()
+    
+    # === Information Section ===
+    factor_info()
+
+
+# Streamlit runs pages as __main__; importing the module (benchmarks) only defines the functions
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Tests for the benchmark suite (benchmark)
+"""
+import json
+
+import benchmark
+from benchmark import DETAIL_INPUTS, _case, _reference_estimate, compare, main, run_benchmarks
+from emission_calc import Inputs, estimate
+
+
+def test_compare_flags_only_cases_past_threshold():
+    baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    current = {"results": {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "new": {"seconds": 9.0}}}
+
+    assert compare(current, baseline, threshold=0.2) == [("b", 1.0, 1.5, 1.5)]
+
+
+def test_small_run_saves_json_and_fails_on_regression(tmp_path):
+    report = run_benchmarks(only=("batch",), repeat=1, sizes=("1k",))
+    assert set(report["results"]) == {"batch_1k"}
+    assert report["results"]["batch_1k"]["items"] == 1000
+
+    saved = tmp_path / "bench.json"
+    assert main(["--only", "batch", "--sizes", "1k", "--repeat", "1", "--save", str(saved)]) == 0
+    assert saved.exists()
+
+    report = json.loads(saved.read_text())
+    report["results"]["batch_1k"]["seconds"] = 1e-9
+    baseline = tmp_path / "fast.json"
+    baseline.write_text(json.dumps(report))
+    assert main(["--only", "batch", "--sizes", "1k", "--repeat", "1", "--baseline", str(baseline)]) == 1
+
+
+def test_metrics_gate_against_hook_free_reference(monkeypatch):
+    for inputs in (DETAIL_INPUTS, Inputs(monthly_bill_ntd=5000, car_count=2, use_rule_of_thumb=True),
+                   Inputs(region="US", annual_kwh=1000.0, include_scope3=True, water_m3_year=10.0)):
+        assert _reference_estimate(inputs) == estimate(inputs)
+
+    def fake_metrics(overhead):
+        return lambda repeat: {"metrics_disabled": {**_case(1.0), "overhead_pct": overhead}}
+
+    monkeypatch.setattr(benchmark, "bench_metrics", fake_metrics(4.9))
+    assert main(["--only", "metrics"]) == 0
+    monkeypatch.setattr(benchmark, "bench_metrics", fake_metrics(5.1))
+    assert main(["--only", "metrics"]) == 1
+    assert main(["--only", "metrics", "--max-metrics-overhead", "6"]) == 0
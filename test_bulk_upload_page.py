@@ -0,0 +1,45 @@
+"""
+Tests for the bulk upload page (pages/Bulk_Upload.py)
+"""
+import csv
+import io
+from pathlib import Path
+
+import pytest
+
+from emission_jobs import BulkJob
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+PAGE = str(Path(__file__).parent / "pages" / "Bulk_Upload.py")
+
+
+def _csv_bytes(count):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["site_id", "region", "annual_kwh"])
+    writer.writerows([f"S{i}", "TW", 1000 * (i + 1)] for i in range(count))
+    return out.getvalue().encode("utf-8")
+
+
+def test_page_renders_without_a_job():
+    at = AppTest.from_file(PAGE, default_timeout=30).run()
+    assert not at.exception
+    assert at.title[0].value == "📦 Bulk Multi-Site Upload"
+    assert at.button[0].disabled   # Start Estimation needs an upload
+    assert [s.value for s in at.subheader] == ["📤 Upload Sites"]
+
+
+def test_finished_job_shows_summary_and_preview(tmp_path):
+    job = BulkJob(_csv_bytes(12), "sites.csv", keep=("site_id",), output_dir=tmp_path,
+                  preview_rows=5).start().join(10)
+    assert job.status == "done", job.error
+
+    at = AppTest.from_file(PAGE, default_timeout=30)
+    at.session_state["bulk_job"] = job
+    at.run()
+
+    assert not at.exception
+    assert at.success[0].value.startswith("12 sites estimated")
+    assert at.dataframe[0].value["site_id"].tolist() == ["S0", "S1", "S2", "S3", "S4"]
+    job.discard()
@@ -0,0 +1,43 @@
+"""
+Tests for the fragment-based Calculator page (pages/Calculator.py)
+"""
+from pathlib import Path
+
+import pytest
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+PAGE = str(Path(__file__).parent / "pages" / "Calculator.py")
+
+
+def test_quick_calculation_renders_results_and_clear_resets():
+    at = AppTest.from_file(PAGE, default_timeout=30).run()
+    assert not at.exception
+    assert len(at.metric) == 0
+
+    at.button(key="calc_quick_submit").click().run()
+    assert [m.value for m in at.metric] == ["6.75 tCO2e", "0.61 tCO2e", "0.07 tCO2e", "7.43 tCO2e"]
+
+    at.button(key="clear_all_calc_inputs").click().run()
+    assert not at.exception
+    assert len(at.metric) == 0
+
+
+def test_detailed_calculation_and_region_change():
+    at = AppTest.from_file(PAGE, default_timeout=30).run()
+    at.selectbox(key="calc_region_selector").set_value("US").run()
+    assert at.number_input(key="calc_price_kwh").value == 0.12
+
+    at.button(key="calc_detailed_submit").click().run()
+    assert not at.exception
+    assert at.metric[3].value == "247.65 tCO2e"
+
+
+def test_refrigerant_catalog_selection():
+    at = AppTest.from_file(PAGE, default_timeout=30).run()
+    at.selectbox(key="calc_refrigerant").set_value("R-410A").run()
+    at.selectbox(key="calc_gwp_report").set_value("AR6").run()
+
+    at.button(key="calc_detailed_submit").click().run()
+    assert not at.exception
+    assert at.metric[2].value == "11.28 tCO2e"  # 5 kg x 2255.5
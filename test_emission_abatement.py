@@ -0,0 +1,135 @@
+"""
+Tests for the abatement planner (emission_abatement)
+"""
+import numpy as np
+import pytest
+
+from emission_abatement import AbatementOptions, Measure, evaluate_measures, read_measures
+from emission_batch import estimate_batch
+
+COLUMNS = {
+    "region": np.array(["TW", "US", "JP", "EU"]),
+    "annual_kwh": np.array([200_000.0, 50_000.0, np.nan, 10_000.0]),
+    "car_count": np.array([4.0, 0.0, 10.0, 2.0]),
+    "gasoline_liters_year": np.array([np.nan, np.nan, 8_000.0, np.nan]),
+    "refrigerant_leak_kg": np.array([2.0, 0.0, 5.0, 1.0]),
+    "refrigerant_gwp": np.array([2088.0, 1430.0, 1430.0, 675.0]),
+}
+
+
+def _total(columns):
+    return estimate_batch(columns, round_output=False)["Total_S1S2"]
+
+
+def test_options_match_recomputed_estimates():
+    measures = [
+        Measure("LED", "efficiency", 0.2, fixed_cost=1000, unit_cost=50),
+        Measure("EV all", "electrification", 1.0, unit_cost=30000),
+        Measure("R-32", "refrigerant_swap", 675, fixed_cost=5000),
+    ]
+    options = evaluate_measures(COLUMNS, measures)
+    found = {(int(s), int(m)): a for s, m, a in zip(options.site_index, options.measure_index, options.abatement_t)}
+    base = _total(COLUMNS)
+
+    efficient = dict(COLUMNS, annual_kwh=COLUMNS["annual_kwh"] * 0.8)
+    swapped = dict(COLUMNS, refrigerant_gwp=np.full(4, 675.0))
+    for site in range(4):
+        saving = base[site] - _total(efficient)[site]
+        assert found.get((site, 0), 0.0) == pytest.approx(saving)
+        swap = base[site] - _total(swapped)[site]
+        assert found.get((site, 2), 0.0) == pytest.approx(max(swap, 0.0))
+    # Site 3 already uses GWP 675 and site 1 leaks nothing: no swap option
+    assert (3, 2) not in found and (1, 2) not in found
+
+    # Electrifying JP's fuel-reported fleet removes 8,000 L and buys 80,000 km of electricity
+    ev_kwh = 8_000 * 10 * 0.18
+    expected = 8_000 * 2.3 / 1000 - ev_kwh * estimate_batch(COLUMNS)["Grid_EF"][2] / 1000
+    assert found[(2, 1)] == pytest.approx(expected)
+    led = (options.site_index == 0) & (options.measure_index == 0)
+    assert options.capex[led][0] == pytest.approx(1000 + 50 * 40)
+
+
+def test_macc_and_budgeted_plan():
+    rng = np.random.default_rng(3)
+    n = 500
+    columns = {
+        "region": rng.choice(["TW", "US", "JP"], n),
+        "annual_kwh": rng.uniform(1e4, 5e5, n),
+        "car_count": rng.integers(0, 8, n).astype(float),
+        "refrigerant_leak_kg": rng.uniform(0, 4, n),
+    }
+    measures = [Measure(f"LED {i}", "efficiency", 0.05 * (i + 1), fixed_cost=20000 * i, unit_cost=900)
+                for i in range(3)]
+    measures += [
+        Measure("EV", "electrification", 0.5, unit_cost=250000),
+        Measure("CO2", "refrigerant_swap", 1, fixed_cost=80000),
+    ]
+    options = evaluate_measures(columns, measures)
+
+    macc = options.macc()
+    assert np.all(np.diff(macc["Cost_per_t"]) >= 0)
+    assert macc["Cumulative_Abatement_t"][-1] == pytest.approx(options.abatement_t.sum(), abs=0.01)
+
+    plan = options.plan(budget=20_000_000, k=300)
+    assert len(plan["Measure"]) <= 300
+    assert plan["Capex"].sum() <= 20_000_000
+    assert np.all(np.diff(plan["Cost_per_t"]) >= 0)
+    kind_of = {m.name: m.kind for m in measures}
+    slots = {(site, kind_of[name]) for site, name in zip(plan["site_index"].tolist(), plan["Measure"].tolist())}
+    assert len(slots) == len(plan["Measure"])
+
+    # Same picks as a plain scan of every option in cost order
+    expected = _scan_plan(options, measures, 20_000_000, 300)
+    assert sorted(plan["Cost_per_t"].tolist()) == sorted(options.cost_per_t[expected].tolist())
+
+
+def _scan_plan(options, measures, budget, k):
+    left, taken, expected = budget, set(), []
+    for i in np.lexsort((np.arange(len(options)), options.cost_per_t)):
+        slot = (options.site_index[i], measures[options.measure_index[i]].kind)
+        if len(expected) == k or slot in taken or options.capex[i] > left:
+            continue
+        taken.add(slot)
+        left -= options.capex[i]
+        expected.append(i)
+    return expected
+
+
+def test_small_budget_stops_early_but_keeps_free_options():
+    rng = np.random.default_rng(5)
+    n = 2000
+    measures = [Measure("LED", "efficiency", 0.1), Measure("EV", "electrification", 1.0),
+                Measure("Leak checks", "refrigerant_swap", 1)]
+    measure_index = np.repeat(np.arange(3), n)
+    # Paid LED / EV options, then free leak checks that cost the most per tonne
+    capex = np.concatenate([rng.uniform(40_000, 60_000, n), rng.uniform(90_000, 120_000, n), np.zeros(n)])
+    annual_cost = np.concatenate([rng.uniform(100, 200, n), rng.uniform(300, 400, n), rng.uniform(500, 900, n)])
+    options = AbatementOptions(measures, np.tile(np.arange(n), 3), measure_index, np.ones(3 * n), capex, annual_cost)
+
+    pulled = []
+    stream = options._stream
+    options._stream = lambda indices, slots: (pulled.append(item) or item for item in stream(indices, slots))
+    plan = options.plan(budget=200_000)
+
+    expected = _scan_plan(options, measures, 200_000, len(options))
+    assert plan["site_index"].tolist() == options.site_index[expected].tolist()
+    assert plan["Cost_per_t"].tolist() == options.cost_per_t[expected].tolist()
+    assert (plan["Capex"] == 0).sum() == n
+    assert len(pulled) < 100
+
+
+def test_read_measures_resolves_refrigerant_names(tmp_path):
+    path = tmp_path / "measures.csv"
+    path.write_text(
+        "name,kind,amount,fixed_cost,unit_cost,lifetime_years\n"
+        "LED,efficiency,0.1,1000,,\n"
+        "Swap,refrigerant_swap,R-32,5000,,15\n"
+    )
+    measures = read_measures(path)
+
+    assert measures[1].amount == 675.0 and measures[1].lifetime_years == 15
+    assert measures[0].lifetime_years == 10
+    with pytest.raises(ValueError):
+        Measure("Solar", "solar", 0.3)
+    with pytest.raises(ValueError):
+        Measure("LED", "efficiency", 1.5)
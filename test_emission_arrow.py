@@ -0,0 +1,106 @@
+"""
+Tests for Arrow / pandas interop (emission_arrow)
+"""
+import numpy as np
+import pytest
+
+from emission_arrow import (
+    arrow_to_columns,
+    dataframe_to_columns,
+    estimate_arrow,
+    estimate_dataframe,
+    result_schema,
+    results_to_arrow,
+)
+from emission_batch import RESULT_COLUMNS, estimate_batch
+from emission_factors import FactorRegistry
+
+pa = pytest.importorskip("pyarrow")
+
+REGIONS = ["TW", "US", "JP", "EU", "CN", "TW"]
+KWH = np.array([120000.0, 50000.0, 0.0, 9000.0, 1.5e6, 42.0])
+CARS = np.array([3.0, 0.0, 12.0, 1.0, 40.0, 2.0])
+
+
+def _expected():
+    return estimate_batch({"region": np.array(REGIONS), "annual_kwh": KWH, "car_count": CARS})
+
+
+def test_record_batch_inputs_and_results_are_not_copied():
+    batch = pa.record_batch({
+        "site_id": [f"S{i}" for i in range(6)],
+        "region": pa.array(REGIONS).dictionary_encode(),
+        "annual_kwh": KWH,
+        "car_count": CARS,
+    })
+
+    columns = arrow_to_columns(batch)
+    assert columns["annual_kwh"].ctypes.data == batch.column("annual_kwh").buffers()[1].address
+    assert columns["car_count"].ctypes.data == batch.column("car_count").buffers()[1].address
+
+    results = estimate_batch(columns, round_output=False)
+    wrapped = results_to_arrow(results)
+    assert wrapped.column("Total_S1S2").buffers()[1].address == results["Total_S1S2"].ctypes.data
+
+    out = estimate_arrow(batch, keep=("site_id",))
+    assert out.schema.remove(out.schema.get_field_index("site_id")) == result_schema()
+    assert out.column("site_id").buffers()[1].address == batch.column("site_id").buffers()[1].address
+    expected = _expected()
+    for name in RESULT_COLUMNS:
+        assert out.column(name).to_pylist() == expected[name].tolist()
+
+
+def test_table_and_reader_process_batch_by_batch_with_nulls():
+    table = pa.Table.from_batches([
+        pa.record_batch({"region": pa.array(REGIONS[:3]), "annual_kwh": KWH[:3], "car_count": CARS[:3]}),
+        pa.record_batch({"region": pa.array(REGIONS[3:]), "annual_kwh": KWH[3:], "car_count": CARS[3:]}),
+    ])
+    out = estimate_arrow(table)
+    assert out.num_rows == 6 and out.column("Region").num_chunks == 2
+    assert out.column("Total_S1S2").to_pylist() == _expected()["Total_S1S2"].tolist()
+
+    streamed = estimate_arrow(pa.RecordBatchReader.from_batches(table.schema, table.to_batches())).read_all()
+    assert streamed.equals(out)
+
+    gaps = estimate_arrow(pa.record_batch({
+        "region": pa.array(["US", None]),
+        "annual_kwh": pa.array([None, 1000.0]),
+        "gasoline_liters_year": pa.array([100, None], type=pa.int32()),
+    }))
+    assert gaps.column("Region").to_pylist() == ["US", "TW"]
+    assert gaps.column("Scope2_Electricity").to_pylist()[1] == estimate_batch(
+        {"region": np.array(["TW"]), "annual_kwh": np.array([1000.0])})["Scope2_Electricity"][0]
+
+
+def test_dataframe_round_trip_shares_arrays():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame({"site_id": range(6), "region": pd.Categorical(REGIONS), "annual_kwh": KWH,
+                          "car_count": CARS})
+
+    out = estimate_dataframe(frame, keep=("site_id",))
+
+    expected = _expected()
+    assert list(out.columns) == list(RESULT_COLUMNS) + ["site_id"]
+    assert out["Region"].tolist() == REGIONS
+    for name in RESULT_COLUMNS[:-2]:
+        assert out[name].tolist() == expected[name].tolist()
+    assert np.shares_memory(dataframe_to_columns(frame)["annual_kwh"], frame["annual_kwh"].to_numpy())
+
+
+def test_subregion_and_unknown_labels_match_estimate_batch():
+    records = FactorRegistry.builtin().records() + [("US-CAMX", 2024, "builtin", "grid", 0.2)]
+    factor_set = FactorRegistry.from_records(records).factor_set("builtin:2024")
+    regions = ["US-CAMX", "XX", "US", None]
+    expected = estimate_batch({"region": np.array(["US-CAMX", "XX", "US", "TW"]), "annual_kwh": 1000.0},
+                              factor_set=factor_set)
+
+    out = estimate_arrow(pa.record_batch({"region": pa.array(regions), "annual_kwh": np.full(4, 1000.0)}),
+                         factor_set=factor_set)
+    assert out.column("Region").to_pylist() == expected["Region"].tolist() == ["US-CAMX", "XX", "US", "TW"]
+    assert out.column("Grid_EF").to_pylist() == expected["Grid_EF"].tolist()
+    assert out.column("Grid_EF").to_pylist()[0] == 0.2
+
+    pd = pytest.importorskip("pandas")
+    frame = estimate_dataframe(pd.DataFrame({"region": regions, "annual_kwh": 1000.0}), factor_set=factor_set)
+    assert frame["Region"].tolist() == expected["Region"].tolist()
+    assert frame["Grid_EF"].tolist() == expected["Grid_EF"].tolist()
@@ -0,0 +1,110 @@
+"""
+Tests for the vectorized batch engine (emission_batch.estimate_batch)
+"""
+import random
+
+import numpy as np
+import pytest
+
+from emission_calc import FrozenInputs, Inputs, estimate
+from emission_batch import InputsBatch, estimate_batch, inputs_to_columns, results_to_records
+from emission_factors import FactorRegistry
+
+
+def _random_inputs(rng):
+    """Random site covering every branch of estimate()"""
+    return Inputs(
+        region=rng.choice(["TW", "US", "EU", "CN", "JP"]),
+        mode=rng.choice(["quick", "detail"]),
+        monthly_bill_ntd=rng.choice([None, 0.0, rng.uniform(100, 50000)]),
+        price_per_kwh_ntd=rng.uniform(0.1, 30),
+        annual_kwh=rng.choice([None, 0.0, rng.uniform(1000, 2e6)]),
+        car_count=float(rng.randint(0, 20)),
+        motorcycles=float(rng.randint(0, 40)),
+        gasoline_liters_year=rng.choice([None, 0.0, rng.uniform(0, 50000)]),
+        diesel_liters_year=rng.choice([None, 0.0, rng.uniform(0, 50000)]),
+        refrigerant_leak_kg=rng.uniform(0, 20),
+        refrigerant_gwp=rng.choice([675.0, 1430.0, 2088.0]),
+        include_scope3=rng.random() < 0.5,
+        water_m3_year=rng.uniform(0, 5000),
+        waste_ton_year=rng.uniform(0, 100),
+        use_rule_of_thumb=rng.random() < 0.5,
+    )
+
+
+def test_estimate_batch_matches_estimate():
+    """Batch results agree with estimate() row for row"""
+    rng = random.Random(42)
+    sites = [_random_inputs(rng) for _ in range(2000)]
+
+    records = results_to_records(estimate_batch(inputs_to_columns(sites)))
+
+    assert records == [estimate(site) for site in sites]
+
+
+def test_estimate_batch_branch_rules():
+    """annual_kwh wins over the bill, and missing fuel falls back to the fleet"""
+    sites = [
+        Inputs(annual_kwh=100000, monthly_bill_ntd=5000),
+        Inputs(annual_kwh=0.0, monthly_bill_ntd=5000),
+        Inputs(car_count=3, motorcycles=2, gasoline_liters_year=None, diesel_liters_year=0.0),
+        Inputs(car_count=3, gasoline_liters_year=None, diesel_liters_year=1000.0),
+        Inputs(monthly_bill_ntd=5000, car_count=5, use_rule_of_thumb=True),
+    ]
+    records = results_to_records(estimate_batch(inputs_to_columns(sites)))
+
+    assert records == [estimate(site) for site in sites]
+
+
+def test_estimate_batch_scalar_defaults_and_codes():
+    """Scalars broadcast, missing fields use Inputs defaults, regions may be codes"""
+    results = estimate_batch({"region": np.array([0, 1], dtype=np.uint8), "annual_kwh": 1000.0})
+
+    assert results["Region"].tolist() == ["TW", "US"]
+    assert results["Scope2_Electricity"].tolist() == [0.49, 0.39]  # 0.495 rounds down, as in estimate()
+
+
+def test_estimate_batch_zero_price_raises():
+    with pytest.raises(ZeroDivisionError):
+        estimate_batch({"monthly_bill_ntd": np.array([100.0]), "price_per_kwh_ntd": 0.0})
+
+
+def test_inputs_batch_rows_slices_and_concat():
+    """Row views round-trip, slices are views, concat preserves order"""
+    sites = [
+        Inputs(region="JP", mode="detail", annual_kwh=1000.0, include_scope3=True, water_m3_year=10.0),
+        Inputs(region="EU", monthly_bill_ntd=200.0, use_rule_of_thumb=True),
+        Inputs(region="CN", gasoline_liters_year=300.0),
+    ]
+    batch = InputsBatch.from_inputs(sites)
+
+    assert [row.to_inputs() for row in batch] == sites
+    assert batch[1] == FrozenInputs.from_inputs(sites[1])
+    assert batch.columns["region"].dtype == np.uint8
+    assert np.shares_memory(batch[1:].columns["annual_kwh"], batch.columns["annual_kwh"])
+    assert list(InputsBatch.concat([batch[2:], batch[:2]])) == [batch[2], batch[0], batch[1]]
+    assert results_to_records(batch.estimate()) == [estimate(site) for site in sites]
+    assert batch.nbytes == len(sites) * (11 * 8 + 2 + 2)
+
+
+def test_inputs_batch_rejects_unknown_region():
+    with pytest.raises(ValueError):
+        InputsBatch.from_columns({"region": np.array(["XX"])})
+    with pytest.raises(ValueError):
+        InputsBatch.from_columns({"region": np.array(["XX-CAMX"])})
+
+
+def test_inputs_batch_keeps_subregion_labels():
+    records = FactorRegistry.builtin().records() + [("US-CAMX", 2024, "builtin", "grid", 0.2)]
+    factor_set = FactorRegistry.from_records(records).factor_set("builtin:2024")
+    columns = {"region": np.array(["US-CAMX", "US", "TW"]), "annual_kwh": 1000.0}
+    batch = InputsBatch.from_columns(columns)
+
+    assert batch[0].region == "US-CAMX"
+    assert batch.columns["region"].tolist() == ["US-CAMX", "US", "TW"]
+    merged = InputsBatch.concat([InputsBatch.from_columns({"region": np.array(["JP"])}), batch])
+    assert [row.region for row in merged] == ["JP", "US-CAMX", "US", "TW"]
+    results = batch.estimate(factor_set=factor_set)
+    assert results["Region"].tolist() == ["US-CAMX", "US", "TW"]
+    assert results["Grid_EF"].tolist() == estimate_batch(columns, factor_set=factor_set)["Grid_EF"].tolist()
+    assert results["Grid_EF"][0] == 0.2
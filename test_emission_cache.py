@@ -0,0 +1,69 @@
+"""
+Tests for the memoization layer (emission_cache)
+"""
+import pytest
+
+import emission_calc
+from emission_calc import Inputs, estimate
+from emission_cache import EstimateCache, canonical_key
+from emission_factors import FactorRegistry
+
+
+def test_canonical_key_ignores_irrelevant_fields():
+    fleet = Inputs(car_count=3, gasoline_liters_year=None)
+    assert canonical_key(fleet) == canonical_key(Inputs(car_count=3.0, gasoline_liters_year=0.0, mode="detail"))
+    assert canonical_key(Inputs(annual_kwh=1000.0, monthly_bill_ntd=50)) == canonical_key(Inputs(annual_kwh=1000.0))
+    assert canonical_key(Inputs(water_m3_year=5.0)) == canonical_key(Inputs())
+    assert canonical_key(Inputs(monthly_bill_ntd=900, car_count=1, use_rule_of_thumb=True)) == \
+        canonical_key(Inputs(monthly_bill_ntd=900, car_count=7, use_rule_of_thumb=True))
+    assert canonical_key(Inputs(car_count=1)) != canonical_key(Inputs(car_count=2))
+
+
+def test_cache_hits_lru_and_ttl():
+    now = [0.0]
+    cache = EstimateCache(maxsize=2, ttl=10, clock=lambda: now[0])
+
+    first = cache.estimate(Inputs(annual_kwh=1000.0))
+    first["Total_S1S2"] = -1  # callers get copies
+    assert cache.estimate(Inputs(annual_kwh=1000.0, mode="detail")) == estimate(Inputs(annual_kwh=1000.0))
+    cache.estimate(Inputs(annual_kwh=2000.0))
+    cache.estimate(Inputs(annual_kwh=3000.0))  # evicts 1000 (least recently used)
+    now[0] = 20.0
+    cache.estimate(Inputs(annual_kwh=3000.0))  # expired
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.expirations, info.currsize) == (1, 4, 1, 1, 2)
+
+
+def test_cache_invalidates_when_factors_change(monkeypatch):
+    cache = EstimateCache()
+    inputs = Inputs(region="TW", annual_kwh=10000.0)
+    cache.estimate(inputs)
+
+    monkeypatch.setitem(emission_calc.GRID_EMISSION_FACTORS, "TW", 0.474)
+
+    assert cache.estimate(inputs) == estimate(inputs)
+    assert cache.cache_info().invalidations == 1
+    assert cache.quick_estimate_from_monthly_bill(5000, 2) == emission_calc.quick_estimate_from_monthly_bill(5000, 2)
+
+
+def test_cache_keys_on_factor_set_content_and_zero_grid():
+    records = FactorRegistry.builtin().records()
+    factor_set = FactorRegistry.from_records(records).factor_set("builtin:2024")
+    cache = EstimateCache()
+    inputs = Inputs(region="TW", annual_kwh=10000.0, car_count=1, use_rule_of_thumb=True)
+    cache.estimate(inputs, factor_set)
+    assert cache.estimate(inputs, FactorRegistry.from_records(records).factor_set("builtin:2024")) is not None
+    assert cache.cache_info().hits == 1   # same version and values: shared entry
+
+    with pytest.raises(ValueError):
+        factor_set.registry.values[0, 0, 0, 0] = 0.0   # edits build a new registry instead
+    edited = [(r, y, s, t, 0.0 if (r, t) == ("TW", "grid") else v) for r, y, s, t, v in records]
+    zero_grid = FactorRegistry.from_records(edited).factor_set("builtin:2024")
+    assert cache.estimate(inputs, zero_grid) == estimate(inputs, zero_grid)
+    assert cache.cache_info().hits == 1
+
+    # No Scope 2 under a zero grid factor, so the rule of thumb does not hide the fleet
+    more_cars = Inputs(region="TW", annual_kwh=10000.0, car_count=5, use_rule_of_thumb=True)
+    assert cache.estimate(more_cars, zero_grid) == estimate(more_cars, zero_grid)
+    assert cache.estimate(more_cars, zero_grid)["Scope1_Vehicles"] > cache.estimate(inputs, zero_grid)["Scope1_Vehicles"]
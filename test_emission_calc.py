@@ -0,0 +1,46 @@
+"""
+Tests for the lazy estimate() result record (emission_calc.EstimateResult)
+"""
+import json
+
+import pytest
+
+from emission_calc import EstimateResult, Inputs, estimate, estimate_record
+
+CASES = [
+    Inputs(),
+    Inputs(region="US", mode="detail", annual_kwh=500000, gasoline_liters_year=15000, diesel_liters_year=5000,
+           refrigerant_leak_kg=5, refrigerant_gwp=1430, include_scope3=True, water_m3_year=2000,
+           waste_ton_year=50),
+    Inputs(region="TW", monthly_bill_ntd=5000, car_count=5, motorcycles=10, use_rule_of_thumb=True),
+    Inputs(region="XX", annual_kwh=1234.5, include_scope3=False),
+]
+
+
+@pytest.mark.parametrize("inputs", CASES)
+def test_record_matches_estimate_dictionary(inputs):
+    expected = estimate(inputs)
+    record = estimate_record(inputs)
+
+    assert isinstance(record, EstimateResult)
+    assert record.to_dict() == expected
+    assert {key: record[key] for key in record.keys()} == expected
+    assert json.loads(record.to_json()) == expected
+    assert estimate_record(inputs, "builtin:2024").to_dict() == estimate(inputs, "builtin:2024")
+
+
+def test_record_is_slotted_and_rejects_unknown_keys():
+    record = estimate_record(CASES[1])
+
+    assert not hasattr(record, "__dict__")
+    assert record.Total_S1S2 == estimate(CASES[1])["Total_S1S2"]
+    with pytest.raises(KeyError):
+        record["total"]
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    for inputs in CASES:
+        assert msgpack.unpackb(estimate_record(inputs).to_msgpack()) == estimate(inputs)
+    odd = EstimateResult("X" * 40, 0.5, float("nan"), 0, 0, 0, 0, 0)
+    assert msgpack.unpackb(odd.to_msgpack())["Region"] == "X" * 40
@@ -0,0 +1,87 @@
+"""
+Tests for the aggregate cube (emission_cube)
+"""
+import numpy as np
+import pytest
+
+from emission_cube import SCOPE_COLUMNS, AggregateCube
+from emission_store import ResultStore
+
+
+def _columns(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "region": rng.choice(["TW", "US", "JP"], n),
+        "annual_kwh": rng.uniform(1e3, 1e5, n),
+        "car_count": rng.integers(0, 4, n).astype(float),
+        "refrigerant_leak_kg": rng.uniform(0, 2, n),
+        "water_m3_year": rng.uniform(0, 500, n),
+        "mode": rng.choice(["quick", "detail"], n),
+    }
+
+
+def _assert_matches_raw(cube, store, by):
+    fast, raw = cube.rollup(by), store.aggregate(by=by)
+    assert fast.keys() == raw.keys()
+    for name in raw:
+        if raw[name].dtype.kind == "f":
+            np.testing.assert_allclose(fast[name], raw[name], rtol=1e-9, atol=1e-6)
+        else:
+            assert fast[name].tolist() == raw[name].tolist()
+
+
+def test_triggers_follow_inserts_updates_copies_and_deletes():
+    with ResultStore() as store:
+        cube = AggregateCube(store)
+        sites = [f"S{i}" for i in range(40)]
+        store.estimate_and_save(sites, "2023", _columns())
+        store.estimate_and_save(sites, "2024-03", _columns(seed=1))
+        by = ("factor_version", "region", "year", "mode")
+        _assert_matches_raw(cube, store, by)
+
+        # Re-saving a (site, period) updates it in place and may move it to another cell
+        moved = dict(_columns(seed=2), region=np.full(40, "EU"))
+        store.estimate_and_save(sites, "2024-03", moved)
+        store.copy_rows("builtin:2024", "audit:2024")
+        _assert_matches_raw(cube, store, by)
+
+        store.conn.execute("DELETE FROM estimates WHERE region = 'EU'")
+        store.conn.commit()
+        _assert_matches_raw(cube, store, by)
+        assert "EU" not in cube.rollup(("region",))["region"].tolist()
+        assert cube.cells() == len(cube.rollup(by)["Sites"])
+
+
+def test_backfill_filters_and_rebuild():
+    with ResultStore() as store:
+        store.estimate_and_save([f"S{i}" for i in range(40)], "2024", _columns())
+        cube = AggregateCube(store)
+        assert cube.rollup(())["Sites"].tolist() == [40]
+
+        tw = cube.rollup(("year",), region="TW", mode="quick")
+        assert tw["Sites"].tolist() == [store.count(region="TW", mode="quick")]
+        both = cube.rollup(("region",), region=["TW", "US"], year=2024)
+        assert both["region"].tolist() == ["TW", "US"]
+        with pytest.raises(ValueError):
+            cube.rollup(("region",), site_id="S1")
+        with pytest.raises(ValueError):
+            cube.rollup(("site_id",))
+        assert cube.rebuild() == cube.cells()
+        assert AggregateCube(store).cells() == cube.cells()
+
+
+def test_drill_down_and_scope_breakdown():
+    with ResultStore() as store:
+        cube = AggregateCube(store)
+        store.estimate_and_save([f"S{i}" for i in range(40)], "2024", _columns())
+
+        top = cube.rollup(("region",))
+        modes = cube.drill_down(("region",), "mode")
+        for region, total in zip(top["region"].tolist(), top["Total_S1S2"].tolist()):
+            assert modes["Total_S1S2"][modes["region"] == region].sum() == pytest.approx(total)
+        sites = cube.drill_down(("region",), "site_id", region="TW")
+        assert sites["Total_S1S2"].sum() == pytest.approx(top["Total_S1S2"][top["region"] == "TW"][0])
+
+        scopes = cube.by_scope(("region",))
+        assert scopes["Scope"][:4].tolist() == list(SCOPE_COLUMNS)
+        assert scopes["Emissions"].sum() == pytest.approx(top["Total_With_S3"].sum())
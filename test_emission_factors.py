@@ -0,0 +1,59 @@
+"""
+Tests for the versioned factor registry (emission_factors)
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from emission_calc import Inputs, estimate
+from emission_batch import estimate_batch, inputs_to_columns, results_to_records
+from emission_factors import FactorRegistry, load_registry
+
+
+def _history_registry():
+    records = [(r, 2024, "builtin", "grid", ef) for r, ef in {"TW": 0.495, "US": 0.386}.items()]
+    records += [("TW", 2022, "builtin", "grid", 0.509), ("US", 2022, "builtin", "grid", 0.400)]
+    records += [("TW", 2022, "builtin", "gasoline", 2.2)]
+    return FactorRegistry.from_records(records)
+
+
+def test_builtin_factor_set_matches_module_constants():
+    sites = [Inputs(region="JP", annual_kwh=120000, car_count=3, include_scope3=True, waste_ton_year=4)]
+
+    assert estimate(sites[0], "builtin:2024") == estimate(sites[0])
+    assert results_to_records(estimate_batch(inputs_to_columns(sites), factor_set="builtin:2024")) == \
+        [estimate(sites[0])]
+
+
+def test_memory_mapped_registry_lookup_and_versions(tmp_path):
+    path = tmp_path / "factors.efr"
+    _history_registry().save(path)
+    registry = load_registry(path)
+
+    assert isinstance(registry.values, np.memmap)
+    assert sorted(registry.versions()) == ["builtin:2022", "builtin:2024"]
+    assert registry.lookup("US", 2022, "builtin", "grid") == 0.400
+    assert registry.lookup("XX", 2022, "builtin", "grid") == 0.509  # unknown region falls back to TW
+    assert np.isnan(registry.lookup("US", 2023, "builtin", "grid"))
+    assert pickle.loads(pickle.dumps(registry)) is registry  # workers re-map by path
+
+
+def test_past_year_recompute_single_and_batch():
+    factor_set = _history_registry().factor_set("builtin:2022")
+    site = Inputs(region="TW", annual_kwh=100000.0, car_count=2)
+
+    result = estimate(site, factor_set)
+    assert result["Grid_EF"] == 0.509
+    assert result["Scope2_Electricity"] == 50.9
+    assert result["Scope1_Vehicles"] == round(2 * 1500 * 2.2 / 1000, 2)
+
+    columns = inputs_to_columns([site, site])
+    batch = estimate_batch(columns, factor_set=factor_set, years=np.array([2022, 2024]))
+    assert batch["Grid_EF"].tolist() == [0.509, 0.495]
+    assert results_to_records(batch)[0] == result
+
+
+def test_unknown_version_raises():
+    with pytest.raises(KeyError):
+        estimate(Inputs(annual_kwh=1.0), "builtin:1999")
@@ -0,0 +1,111 @@
+"""
+Tests for fuel-card transaction ingestion (emission_fuelcards)
+"""
+import csv
+import gzip
+
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch
+from emission_fuelcards import FuelCardAggregator, fuel_codes, ingest_file
+
+
+def _tx(tid, ts, site, vehicle, fuel, liters):
+    return {"transaction_id": tid, "timestamp": ts, "site_id": site, "vehicle_id": vehicle,
+            "fuel_type": fuel, "liters": liters}
+
+
+def test_chunks_aggregate_by_vehicle_and_drop_duplicates():
+    cards = FuelCardAggregator()
+    cards.add_rows([
+        _tx("T1", "2024-01-03 08:00:00", "S1", "V1", "Unleaded 95", "40"),
+        _tx("T2", "2024-01-05", "S1", "V1", "Petrol", "10.5"),
+        _tx("T3", "2024-01-05", "S1", "V2", "Diesel", "60"),
+        _tx("T1", "2024-01-03 08:00:00", "S1", "V1", "Unleaded 95", "40"),   # duplicate in chunk
+        _tx("T9", "2024-01-06", "S1", "V2", "LPG", "30"),                    # not gasoline / diesel
+    ])
+    counts = cards.add_rows([
+        _tx("T3", "2024-01-05", "S1", "V2", "Diesel", "60"),                 # duplicate across chunks
+        _tx("T4", "2024-02-01", "S2", "V3", "diesel", "25"),
+        _tx("T5", "bad date", "S2", "V3", "diesel", "25"),
+    ])
+
+    assert counts == {"rows": 3, "accepted": 1, "duplicates": 1, "late": 0, "future": 0, "invalid": 1}
+    assert cards.counts["accepted"] == 4 and cards.counts["invalid"] == 2
+    totals = cards.vehicle_totals()
+    assert totals["period"].tolist() == ["2024-01", "2024-01", "2024-02"]
+    assert totals["vehicle_id"].tolist() == ["V1", "V2", "V3"]
+    assert totals["liters"].tolist() == [50.5, 60.0, 25.0]
+    assert totals["transactions"].tolist() == [2, 1, 1]
+
+
+def test_late_rows_accepted_within_allowed_lateness():
+    cards = FuelCardAggregator(allowed_lateness_days=5)
+    cards.add_rows([_tx("A", "2024-03-30", "S1", "V1", "diesel", "10")])
+    cards.add_rows([_tx("B", "2024-04-04", "S1", "V1", "diesel", "20")])
+    cards.add_rows([_tx("C", "2024-03-31", "S1", "V1", "diesel", "5"),     # 4 days late: kept
+                    _tx("A", "2024-03-30", "S1", "V1", "diesel", "10")])   # still deduplicated
+    assert cards.open_periods() == ["2024-03", "2024-04"]
+
+    cards.add_rows([_tx("D", "2024-04-07", "S1", "V1", "diesel", "1")])
+    counts = cards.add_rows([_tx("E", "2024-03-31", "S1", "V1", "diesel", "7")])
+
+    assert counts["late"] == 1 and counts["accepted"] == 1 and cards.late_liters == 7.0
+    assert cards.open_periods() == ["2024-04"]
+    assert cards.site_liters()["diesel_liters_year"].tolist() == [43.0]
+
+
+def test_rows_grouped_by_card_are_all_summed():
+    months = [f"2024-{m:02d}-15" for m in range(1, 13)]
+    cards = FuelCardAggregator(allowed_lateness_days=7)
+    for vehicle in ("V1", "V2"):   # one vehicle's whole year, then the other's
+        cards.add_rows([_tx(f"{vehicle}-{m}", day, "S1", vehicle, "diesel", "10") for m, day in enumerate(months)])
+
+    assert cards.counts["accepted"] == 24 and cards.counts["late"] == 11
+    assert cards.site_liters(2024)["diesel_liters_year"].tolist() == [240.0]
+
+
+def test_future_dated_rows_do_not_close_periods():
+    cards = FuelCardAggregator(allowed_lateness_days=5, now="2024-04-10")
+    cards.add_rows([_tx("A", "2024-03-30", "S1", "V1", "diesel", "10")])
+    counts = cards.add_rows([_tx("Z", "2042-04-01", "S1", "V1", "diesel", "99"),    # year typo
+                             _tx("B", "2024-04-14", "S1", "V1", "diesel", "20")])   # within lateness of now
+    assert counts["future"] == 1 and counts["accepted"] == 1
+    assert cards.watermark == np.datetime64("2024-04-14", "s")
+
+    counts = cards.add_rows([_tx("C", "2024-04-02", "S1", "V1", "diesel", "5")])
+    assert counts["late"] == 0
+    assert cards.site_liters()["diesel_liters_year"].tolist() == [35.0]
+
+
+def test_fuel_labels_match_exact_aliases_only():
+    labels = ["Unleaded  95", "GAS OIL", "Gas Oil 10ppm", "Natural Gas", "Diesel Exhaust Fluid", "LPG"]
+    assert fuel_codes(labels).tolist() == [0, 1, 1, -1, -1, -1]
+
+
+def test_file_ingestion_feeds_batch_estimator(tmp_path):
+    path = tmp_path / "cards.csv.gz"
+    rng = np.random.default_rng(3)
+    liters = np.round(rng.uniform(5, 80, 1000), 2)
+    with gzip.open(path, "wt", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["txn", "timestamp", "site_id", "vehicle_id", "fuel_type", "liters"])
+        for i, value in enumerate(liters):
+            day = np.datetime64("2024-01-01") + i * 366 // 1000
+            writer.writerow([f"T{i}", str(day), f"S{i % 3}", f"V{i % 7}", ("gasoline", "diesel")[i % 2], value])
+
+    cards = FuelCardAggregator(column_map={"txn": "transaction_id"})
+    stats = ingest_file(path, cards, chunk_size=128)
+    assert stats["accepted"] == 1000
+
+    columns = cards.apply_to_columns(
+        {"region": ["TW"] * 4, "car_count": [5.0] * 4}, ["S0", "S1", "S2", "S9"], year=2024
+    )
+    sites = np.arange(1000) % 3
+    gasoline = [liters[(sites == s) & (np.arange(1000) % 2 == 0)].sum() for s in range(3)]
+    assert columns["gasoline_liters_year"][:3] == pytest.approx(gasoline)
+    assert np.isnan(columns["diesel_liters_year"][3])
+
+    results = estimate_batch(columns)
+    assert results["Scope1_Vehicles"][3] == estimate_batch({"region": ["TW"], "car_count": [5.0]})["Scope1_Vehicles"][0]
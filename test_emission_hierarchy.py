@@ -0,0 +1,62 @@
+"""
+Tests for organizational hierarchy rollups (emission_hierarchy)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import inputs_to_columns
+from emission_calc import Inputs, estimate
+from emission_hierarchy import EmissionHierarchy
+
+SITES = {
+    ("Acme", "Retail", "TW", "S1"): Inputs(region="TW", annual_kwh=100000, car_count=2),
+    ("Acme", "Retail", "TW", "S2"): Inputs(region="TW", monthly_bill_ntd=5000, use_rule_of_thumb=True),
+    ("Acme", "Retail", "JP", "S3"): Inputs(region="JP", annual_kwh=50000, refrigerant_leak_kg=3, refrigerant_gwp=2088),
+    ("Acme", "Plants", "US", "S4"): Inputs(region="US", annual_kwh=900000, include_scope3=True, waste_ton_year=40),
+}
+
+
+def _tree():
+    tree = EmissionHierarchy.from_paths(SITES, levels=("company", "business_unit", "country", "site"))
+    tree.set_sites(list(SITES), inputs_to_columns(list(SITES.values())))
+    return tree
+
+
+def test_subtotals_and_shares_match_site_estimates():
+    tree = _tree()
+
+    for path, inputs in SITES.items():
+        expected = estimate(inputs)
+        result = tree.result(path)
+        assert {k: result[k] for k in expected if k not in ("Region", "Grid_EF")} == \
+            {k: v for k, v in expected.items() if k not in ("Region", "Grid_EF")}
+
+    retail_tw = sum(estimate(SITES[p])["Total_S1S2"] for p in SITES if p[:3] == ("Acme", "Retail", "TW"))
+    assert tree.result(("Acme", "Retail", "TW"))["Total_S1S2"] == pytest.approx(retail_tw, abs=0.02)
+    countries = tree.rollup("country")
+    assert countries["Node"] == [("Acme", "Retail", "TW"), ("Acme", "Retail", "JP"), ("Acme", "Plants", "US")]
+    assert countries["Share_Of_Parent"][2] == 100.0
+
+
+def test_update_touches_only_the_path_to_the_root():
+    tree = _tree()
+    before = tree.subtotal.copy()
+    tree.shares(("Acme",))
+    tree.shares(("Acme", "Plants"))
+
+    site = ("Acme", "Retail", "JP", "S3")
+    tree.update_site(site, Inputs(region="JP", annual_kwh=80000))
+
+    changed = set(np.flatnonzero((tree.subtotal != before).any(axis=1)).tolist())
+    assert changed == set(tree.path_to_root(site))
+    assert tree._dirty[tree.node(("Acme",))] and not tree._dirty[tree.node(("Acme", "Plants"))]
+    assert tree.result(site)["Total_S1S2"] == estimate(Inputs(region="JP", annual_kwh=80000))["Total_S1S2"]
+
+    incremental = tree.subtotal.copy()
+    tree.rebuild()
+    np.testing.assert_allclose(incremental, tree.subtotal, rtol=1e-12, atol=1e-12)
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        EmissionHierarchy(["a", "b"], [1, 0])
@@ -0,0 +1,53 @@
+"""
+Tests for the hourly Scope 2 engine (emission_hourly)
+"""
+import numpy as np
+import pytest
+
+from emission_calc import compute_scope2
+from emission_hourly import HourlyFactorProfiles, hourly_scope2, save_profile, to_hourly
+
+
+def test_flat_profile_matches_annual_scope2_and_months_add_up():
+    rng = np.random.default_rng(1)
+    quarter_hours = rng.random(8760 * 4)
+
+    result = hourly_scope2(quarter_hours, "JP", 2023)
+
+    assert result["Annual_kWh"] == pytest.approx(quarter_hours.sum())
+    assert result["Scope2_Electricity"] == pytest.approx(compute_scope2(quarter_hours.sum(), None, 4.4, "JP"))
+    assert result["Monthly_Scope2"].sum() == pytest.approx(result["Scope2_Electricity"])
+    assert result["Effective_Grid_EF"] == pytest.approx(0.441)
+
+
+def test_memory_mapped_profiles_and_site_matrix(tmp_path):
+    factors = np.full(8784, 0.5)
+    factors[24 * 60 + 18] = 2.0   # 2024-03-01 18:00 is the dirtiest hour
+    save_profile(tmp_path, "TW", 2024, factors)
+    loads = np.lib.format.open_memmap(tmp_path / "loads.npy", mode="w+", dtype=np.float64, shape=(5, 8784 * 2))
+    loads[:] = np.arange(1, 6)[:, None]
+    loads.flush()
+
+    profiles = HourlyFactorProfiles(tmp_path)
+    result = hourly_scope2(np.load(tmp_path / "loads.npy", mmap_mode="r"), ["TW", "TW", "US", "TW", "US"], 2024,
+                           HourlyFactorProfiles(tmp_path, fallback_flat=True), block_sites=2)
+
+    assert isinstance(profiles.profile("TW", 2024), np.memmap)
+    assert profiles.available() == [("TW", 2024)]
+    hourly_kwh = np.arange(1, 6) * 2.0
+    assert result["Annual_kWh"] == pytest.approx(hourly_kwh * 8784)
+    assert result["Scope2_Electricity"][0] == pytest.approx(2 * (8783 * 0.5 + 2.0) / 1000)
+    assert result["Peak_Hour"][0] == np.datetime64("2024-03-01T18")
+    assert result["Peak_Hour_Scope2"][0] == pytest.approx(2 * 2.0 / 1000)
+    assert result["Effective_Grid_EF"][2] == pytest.approx(0.386)
+    assert result["Monthly_Scope2"].shape == (5, 12)
+    with pytest.raises(KeyError):
+        profiles.profile("US", 2024)
+
+
+def test_interval_validation():
+    assert to_hourly(np.ones((2, 8760 * 4)), 2023).shape == (2, 8760)
+    with pytest.raises(ValueError):
+        to_hourly(np.ones(8760 * 3), 2023)
+    with pytest.raises(ValueError):
+        to_hourly(np.ones(8760), 2024)
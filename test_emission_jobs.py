@@ -0,0 +1,95 @@
+"""
+Tests for background bulk jobs (emission_jobs)
+"""
+import csv
+import gc
+import gzip
+import io
+import os
+
+import pytest
+
+from emission_batch import estimate_batch
+from emission_jobs import BulkJob, count_rows, read_result_csv
+from emission_stream import rows_to_columns
+
+ROWS = [
+    {"site_id": f"S{i}", "region": ("TW", "US", "JP")[i % 3], "annual_kwh": str(1000 * (i + 1)),
+     "car_count": str(i % 4), "refrigerant_leak_kg": "1.5", "refrigerant_gwp": "1430"}
+    for i in range(250)
+]
+
+
+def _csv_bytes(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+def test_csv_job_matches_batch_engine_and_keeps_previews(tmp_path):
+    job = BulkJob(_csv_bytes(ROWS), "sites.csv", chunk_size=64, keep=("site_id",),
+                  output_dir=tmp_path, preview_rows=5).start().join(10)
+
+    assert job.status == "done", job.error
+    assert (job.total_rows, job.rows_done, job.progress) == (250, 250, 1.0)
+
+    records = read_result_csv(job.result_bytes())
+    expected = estimate_batch(rows_to_columns(ROWS))
+    assert [r["site_id"] for r in records] == [row["site_id"] for row in ROWS]
+    assert [float(r["Total_S1S2"]) for r in records] == expected["Total_S1S2"].tolist()
+
+    head, latest = job.previews()
+    assert [r["site_id"] for r in head] == ["S0", "S1", "S2", "S3", "S4"]
+    assert [r["site_id"] for r in latest] == [f"S{i}" for i in range(245, 250)]
+
+    job.discard()
+    assert not os.path.exists(job.output_path)
+
+
+def test_gzip_upload_and_failures(tmp_path):
+    data = gzip.compress(_csv_bytes(ROWS))
+    assert count_rows(data, "sites.csv.gz") is None
+    job = BulkJob(data, "sites.csv.gz", output_dir=tmp_path).start().join(10)
+    assert job.status == "done" and job.rows_done == 250
+
+    bad = _csv_bytes([{"monthly_bill_ntd": "100", "price_per_kwh_ntd": "0"}])
+    failed = BulkJob(bad, "bad.csv", output_dir=tmp_path).start().join(10)
+    assert failed.status == "failed"
+    assert "ZeroDivisionError" in failed.error
+    with pytest.raises(RuntimeError):
+        failed.result_bytes()
+    assert not os.path.exists(failed.output_path)
+
+    # A finished job's file goes away with the job (e.g. an evicted session)
+    path = job.output_path
+    del job
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_row_count_follows_quoted_multiline_fields():
+    data = b'site_id,note,annual_kwh\r\nS1,"two\nlines",100\r\n\r\nS2,plain,200\r\nS3,"x\n\ny",300'
+    assert count_rows(data, "sites.csv") == 3
+    assert count_rows(b'{"a": 1}\n\n{"a": 2}\n', "sites.jsonl") == 2
+
+
+def test_xlsx_upload(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(list(ROWS[0]))
+    for row in ROWS[:30]:
+        sheet.append([row["site_id"], row["region"], float(row["annual_kwh"]), int(row["car_count"]), 1.5, 1430])
+    path = tmp_path / "sites.xlsx"
+    workbook.save(path)
+
+    job = BulkJob(path.read_bytes(), "sites.xlsx", chunk_size=8, keep=("site_id",), output_dir=tmp_path)
+    job.start().join(10)
+
+    assert job.status == "done", job.error
+    assert job.total_rows == 30
+    records = read_result_csv(job.result_bytes())
+    expected = estimate_batch(rows_to_columns(ROWS[:30]))
+    assert [float(r["Total_S1S2"]) for r in records] == expected["Total_S1S2"].tolist()
@@ -0,0 +1,97 @@
+"""
+Tests for market-based Scope 2 (emission_market)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch
+from emission_market import allocate_contracts, market_scope2_batch, read_contracts
+
+
+def _naive_allocation(regions, years, kwh, contracts, before=1, after=0):
+    """Row-by-row reference: same pass, year, pool and service order as the solver"""
+    need = list(kwh)
+    left = [mwh * 1000 for mwh in contracts["mwh"]]
+    order = sorted(range(len(left)), key=lambda j: (contracts["region"][j], contracts["vintage"][j],
+                                                    contracts["ef"][j]))
+    used = [0.0] * len(left)
+    for key_of in (lambda label: label, lambda label: label.split("-")[0]):
+        for year in sorted(set(years)):
+            for i, region in enumerate(regions):
+                if years[i] != year:
+                    continue
+                for j in order:
+                    if need[i] <= 0:
+                        break
+                    vintage = contracts["vintage"][j]
+                    if contracts["region"][j] == key_of(region) and year - before <= vintage <= year + after:
+                        take = min(need[i], left[j])
+                        need[i] -= take
+                        left[j] -= take
+                        used[j] += take
+    return used
+
+
+def test_greedy_allocation_matches_row_by_row_reference():
+    rng = np.random.default_rng(7)
+    regions = rng.choice(["US", "US-CAMX", "EU", "JP"], 300)
+    years = rng.integers(2023, 2025, 300)
+    kwh = rng.uniform(1_000, 50_000, 300)
+    contracts = {
+        "region": rng.choice(["US", "US-CAMX", "EU", "JP"], 40),
+        "vintage": rng.integers(2021, 2026, 40),
+        "mwh": rng.uniform(10, 400, 40),
+        "ef": rng.choice([0.0, 0.1], 40),
+    }
+
+    site, contract, amount, used = allocate_contracts(regions, years, kwh, contracts)
+
+    np.testing.assert_allclose(used, _naive_allocation(regions.tolist(), years.tolist(), kwh, contracts), atol=1e-6)
+    assert np.all(np.bincount(site, weights=amount, minlength=300) <= kwh + 1e-6)
+    vintage, year = contracts["vintage"][contract], years[site]
+    assert np.all((vintage >= year - 1) & (vintage <= year))
+    own = contracts["region"][contract]
+    assert np.all((own == regions[site]) | (own == np.char.partition(regions[site], "-")[:, 0]))
+
+
+def test_location_and_market_based_side_by_side():
+    columns = {
+        "region": np.array(["US", "US", "JP"]),
+        "annual_kwh": np.array([100_000.0, np.nan, 50_000.0]),
+        "monthly_bill_ntd": np.array([np.nan, 30_000.0, np.nan]),
+        "price_per_kwh_ntd": 3.0,
+    }
+    contracts = {"region": np.array(["US"]), "vintage": np.array([2024]), "mwh": np.array([150.0])}
+
+    result = market_scope2_batch(columns, contracts, years=2024, residual_mix={"US": 0.5})
+
+    np.testing.assert_allclose(result.location_based, estimate_batch(columns, round_output=False)["Scope2_Electricity"])
+    # Site 0 is fully covered; site 1 (120 MWh from its bill) gets the other 50 MWh
+    np.testing.assert_allclose(result.covered_kwh, [100_000.0, 50_000.0, 0.0])
+    np.testing.assert_allclose(result.market_based, [0.0, 70_000 * 0.5 / 1000, result.location_based[2]])
+    assert result.contract_remaining_mwh.tolist() == [0.0]
+    totals = result.totals()
+    assert totals["Covered_Percent"] == round(150_000 / 270_000 * 100, 1)
+    assert totals["Market_Based"] < totals["Location_Based"]
+    assert result.by_region(columns["region"])["Region"].tolist() == ["JP", "US"]
+
+
+def test_read_contracts_and_vintage_window(tmp_path):
+    path = tmp_path / "contracts.csv"
+    path.write_text(
+        "contract_id,region,vintage,mwh,ef,kind\n"
+        "REC-1,EU,2020,500,,GO\n"
+        "PPA-1,EU,2024,200,0.02,PPA\n"
+    )
+    contracts = read_contracts(path)
+    columns = {"region": np.array(["EU"]), "annual_kwh": np.array([300_000.0])}
+
+    result = market_scope2_batch(columns, contracts, years=2024)
+
+    # The 2020 vintage is outside the window; the PPA counts at its own factor
+    assert result.contract_used_mwh.tolist() == [0.0, 200.0]
+    assert result.market_based[0] == pytest.approx(200_000 * 0.02 / 1000 + 100_000 * result.residual_ef[0] / 1000)
+    wide = market_scope2_batch(columns, contracts, years=2024, vintage_before=5)
+    assert wide.covered_kwh.tolist() == [300_000.0]
+    with pytest.raises(ValueError):
+        allocate_contracts(["EU"], 2024, [-1.0], contracts)
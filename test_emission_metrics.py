@@ -0,0 +1,64 @@
+"""
+Tests for estimate() instrumentation (emission_metrics)
+"""
+import json
+import logging
+
+import pytest
+
+import emission_metrics
+from emission_calc import Inputs, estimate
+from emission_metrics import STAGES
+
+
+@pytest.fixture
+def metrics():
+    yield emission_metrics.enable()
+    emission_metrics.disable()
+
+
+def test_enabled_results_match_and_stages_are_counted(metrics):
+    inputs = [
+        Inputs(region="US", mode="detail", annual_kwh=120000, gasoline_liters_year=800, include_scope3=True,
+               water_m3_year=300),
+        Inputs(monthly_bill_ntd=5000, car_count=3, use_rule_of_thumb=True),
+    ]
+    instrumented = [estimate(i) for i in inputs]
+    emission_metrics.disable()
+
+    assert emission_metrics.current() is None
+    assert instrumented == [estimate(i) for i in inputs]
+    assert metrics.stage_calls == dict.fromkeys(STAGES, 2)
+    assert sorted(metrics.calls) == [("TW", "quick"), ("US", "detail")]
+    assert all(seconds > 0 for seconds in metrics.stage_seconds.values())
+
+
+def test_prometheus_export_has_histograms_and_errors(metrics):
+    estimate(Inputs(region="JP", annual_kwh=1000))
+    with pytest.raises(ZeroDivisionError):
+        estimate(Inputs(monthly_bill_ntd=100, price_per_kwh_ntd=0))
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE emission_estimate_seconds histogram" in text
+    assert 'emission_estimate_seconds_bucket{region="JP",mode="quick",le="+Inf"} 1' in text
+    assert 'emission_estimate_seconds_count{region="TW",mode="quick"} 1' in text
+    assert 'emission_estimate_errors_total{region="TW",mode="quick",error="ZeroDivisionError"} 1' in text
+    assert 'emission_stage_calls_total{stage="factors"} 2' in text
+    assert 'emission_stage_calls_total{stage="scope2"} 1' in text
+
+
+def test_sampled_structured_logs_and_profiles(caplog):
+    profiles = []
+    emission_metrics.enable(log_every=2, profile_every=3, profile_sink=profiles.append)
+    try:
+        with caplog.at_level(logging.INFO, logger=emission_metrics.LOGGER_NAME):
+            for _ in range(6):
+                estimate(Inputs(annual_kwh=1000))
+    finally:
+        emission_metrics.disable()
+
+    events = [json.loads(record.getMessage()) for record in caplog.records]
+    assert [event["seq"] for event in events] == [2, 4, 6]
+    assert set(events[0]["stages"]) == set(STAGES)
+    assert len(profiles) == 2
@@ -0,0 +1,20 @@
+"""
+Tests for process-pool portfolio estimation (emission_parallel)
+"""
+from emission_calc import Inputs, estimate
+from emission_parallel import estimate_portfolio
+
+
+def test_estimate_portfolio_keeps_input_order():
+    """Pool results equal the in-process results, in input order"""
+    sites = [Inputs(region="US", annual_kwh=1000.0 * i, car_count=i % 7) for i in range(1, 101)]
+
+    results = estimate_portfolio(sites, workers=2, chunk_size=7, min_parallel=0)
+
+    assert results == [estimate(site) for site in sites]
+
+
+def test_estimate_portfolio_small_inputs_run_in_process():
+    sites = [Inputs(annual_kwh=5000.0)]
+
+    assert estimate_portfolio(sites, workers=8) == [estimate(sites[0])]
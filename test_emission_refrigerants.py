@@ -0,0 +1,47 @@
+"""
+Tests for the refrigerant catalog (emission_refrigerants)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch
+from emission_refrigerants import BLENDS, RefrigerantCatalog, blend_gwp, default_catalog, with_refrigerant_gwp
+
+
+def test_pure_gases_and_blend_composition():
+    catalog = default_catalog()
+
+    assert catalog.gwp("R-134a") == 1430
+    assert catalog.gwp("R-32", "AR6") == 771
+    assert catalog.gwp("R-410A") == pytest.approx(0.5 * 675 + 0.5 * 3500)
+    assert catalog.gwp("R-404A", "AR5") == pytest.approx(0.44 * 3170 + 0.52 * 4800 + 0.04 * 1300)
+    assert catalog.gwp("R-744") == 1
+    with pytest.raises(ValueError):
+        blend_gwp({"R-32": 0.5, "R-125": 0.4})
+    with pytest.raises(ValueError):
+        catalog.gwp("R-32", "AR3")
+
+
+def test_vectorized_lookup_normalizes_spelling_and_handles_unknowns():
+    catalog = RefrigerantCatalog(blends={**BLENDS, "Custom-1": {"R-32": 0.7, "R-1234yf": 0.3}})
+    names = np.array(["R-32", "r410a", "R 134A", "custom-1", "R-32", "R-999"])
+
+    values = catalog.lookup(names[:-1], "AR6")
+    assert values.tolist() == pytest.approx([771, 2255.5, 1530, 0.7 * 771 + 0.3 * 0.501, 771])
+    assert catalog.lookup(names, default=0.0)[-1] == 0.0
+    with pytest.raises(KeyError, match="R-999"):
+        catalog.lookup(names)
+
+
+def test_inventory_column_feeds_batch_engine():
+    columns = {
+        "region": ["TW", "TW", "TW"],
+        "refrigerant_leak_kg": [2.0, 2.0, 2.0],
+        "refrigerant_gwp": [500.0, 500.0, 500.0],
+        "refrigerant": ["R-410A", "", "R-32"],
+    }
+
+    resolved = with_refrigerant_gwp(columns)
+    assert "refrigerant" not in resolved
+    assert resolved["refrigerant_gwp"].tolist() == [2087.5, 500.0, 675.0]
+    assert estimate_batch(resolved)["Scope1_Refrigerant"].tolist() == [4.17, 1.0, 1.35]
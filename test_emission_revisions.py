@@ -0,0 +1,94 @@
+"""
+Tests for factor revisions (emission_revisions)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch
+from emission_factors import FactorRegistry
+from emission_hierarchy import EmissionHierarchy
+from emission_revisions import FactorDependencyIndex, diff_factor_sets, revise_factors
+from emission_store import ResultStore
+
+
+def _registry(tw_grid_2025=0.474, water_2025=None):
+    records = FactorRegistry.builtin().records()
+    for region, _, _, factor_type, value in list(records):
+        records.append((region, 2024, "moenv", factor_type, value))
+        if region == "TW" and factor_type == "grid":
+            value = tw_grid_2025
+        if factor_type == "water" and water_2025 is not None:
+            value = water_2025
+        records.append((region, 2025, "moenv", factor_type, value))
+    return FactorRegistry.from_records(records)
+
+
+def _columns():
+    return {
+        "region": np.array(["TW", "TW-N", "US", "JP", "TW", "TW"]),
+        "annual_kwh": np.array([100_000.0, 20_000.0, 50_000.0, 10_000.0, np.nan, np.nan]),
+        "car_count": np.array([2.0, 0.0, 1.0, 0.0, 3.0, 0.0]),
+        "water_m3_year": np.array([0.0, 0.0, 0.0, 500.0, 0.0, 0.0]),
+        "include_scope3": np.array([True, True, True, True, True, False]),
+    }
+
+
+def test_revision_recomputes_only_dependent_rows():
+    registry = _registry()
+    old, new = registry.factor_set("moenv:2024"), registry.factor_set("moenv:2025")
+    changes = diff_factor_sets(old, new, ["TW", "TW-N", "US", "JP"])
+    assert list(zip(changes["Region"].tolist(), changes["Factor"].tolist())) == [("TW", "grid"), ("TW-N", "grid")]
+
+    columns = _columns()
+    site_ids = [f"S{i}" for i in range(6)]
+    with ResultStore() as store:
+        store.estimate_and_save(site_ids, "2024", columns, factor_set=old)
+        report = revise_factors(store, old, new)
+
+        # TW and TW-N rows with electricity; the fleet-only TW row does not use the grid factor
+        assert report.sites["site_id"].tolist() == ["S0", "S1"]
+        assert (report.recomputed, report.carried) == (2, 4)
+        expected = estimate_batch(columns, factor_set=new)["Total_S1S2"]
+        stored = store.query(("site_id", "Total_S1S2"), factor_version="moenv:2025")
+        assert stored["Total_S1S2"].tolist() == expected.tolist()
+        assert store.count(factor_version="moenv:2024") == 6
+        assert report.by_region()["Region"].tolist() == ["TW", "TW-N"]
+        assert np.all(report.sites["Change"] < 0)
+
+
+def test_in_place_correction_uses_dependency_index():
+    old = _registry().factor_set("moenv:2025")
+    corrected = _registry(water_2025=0.0005).factor_set("moenv:2025")
+    columns = _columns()
+    with ResultStore() as store:
+        store.estimate_and_save([f"S{i}" for i in range(6)], "2024", columns, factor_set=old)
+        index = FactorDependencyIndex.build(store, "moenv:2025")
+        assert index.rows(["JP", "TW"], ["water", "water"]).size == 1
+        # Water is used only where Scope 3 is included and water is reported
+        report = revise_factors(store, old, corrected, index=index)
+
+        assert report.sites["site_id"].tolist() == ["S3"]
+        assert report.carried == 0 and store.count() == 6
+        assert store.get("S3", "2024")["Scope3_Minor"] == pytest.approx(500 * 0.0005)
+
+
+def test_apply_to_hierarchy_matches_fresh_rollup():
+    registry = _registry()
+    old, new = registry.factor_set("moenv:2024"), registry.factor_set("moenv:2025")
+    columns = _columns()
+    site_ids = [f"S{i}" for i in range(6)]
+    paths = [("Acme", "Retail" if i % 2 else "Plants", site) for i, site in enumerate(site_ids)]
+    tree = EmissionHierarchy.from_paths(paths, levels=("company", "unit", "site"))
+    leaves = np.array([tree.node(path) for path in paths])
+    tree.set_sites(leaves, columns, factor_set=old)
+
+    with ResultStore() as store:
+        store.estimate_and_save(site_ids, "2024", columns, factor_set=old)
+        report = revise_factors(store, old, new)
+    nodes = report.apply_to_hierarchy(tree, period="2024")
+
+    fresh = EmissionHierarchy.from_paths(paths, levels=("company", "unit", "site"))
+    fresh.set_sites(leaves, columns, factor_set=new)
+    assert nodes["Level"] == ["company", "unit", "unit", "site", "site"]
+    assert nodes["New_Total"][0] == pytest.approx(fresh.result(("Acme",))["Total_S1S2"], abs=0.02)
+    assert nodes["Change"][0] == pytest.approx(report.sites["Change"].sum(), abs=0.02)
@@ -0,0 +1,37 @@
+"""
+Tests for the scenario sweep engine (emission_scenarios)
+"""
+import itertools
+from dataclasses import replace
+
+from emission_calc import Inputs, estimate
+from emission_scenarios import sweep
+
+
+def test_sweep_matches_nested_loops_and_reuses_components():
+    base = Inputs(region="TW", monthly_bill_ntd=5000, car_count=5, refrigerant_leak_kg=3)
+    axes = {
+        "price_per_kwh_ntd": [3.5, 4.4, 5.0],
+        "car_count": [0, 5, 10],
+        "refrigerant_gwp": [675, 1430],
+    }
+
+    cube = sweep(base, axes)
+
+    assert cube.shape == (3, 3, 2)
+    assert cube.component_cells == {"scope2": 3, "scope1_vehicle": 3, "scope1_refrigerant": 2, "scope3_minor": 1}
+    for (i, price), (j, cars), (k, gwp) in itertools.product(*(enumerate(v) for v in axes.values())):
+        expected = estimate(replace(base, price_per_kwh_ntd=price, car_count=cars, refrigerant_gwp=gwp))
+        assert cube["Total_S1S2"][i, j, k] == expected["Total_S1S2"]
+        assert cube["Share_Percent_Refrigerant"][i, j, k] == expected["Share_Percent"]["Refrigerant"]
+
+
+def test_grid_ef_axis_and_tidy_export(tmp_path):
+    cube = sweep(Inputs(annual_kwh=100000.0), {"grid_ef": [0.4, 0.5], "use_rule_of_thumb": [False, True]})
+
+    records = cube.to_records()
+    assert len(records) == 4
+    assert records[3] == {**records[3], "grid_ef": 0.5, "use_rule_of_thumb": True, "Total_S1S2": 55.0}
+
+    cube.to_csv(tmp_path / "sweep.csv")
+    assert (tmp_path / "sweep.csv").read_text().count("\n") == 5
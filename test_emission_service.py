@@ -0,0 +1,80 @@
+"""
+Tests for the asyncio HTTP service (emission_service)
+"""
+import asyncio
+import json
+
+import pytest
+
+from emission_calc import Inputs, estimate, quick_estimate_from_monthly_bill
+from emission_service import EstimationService, MicroBatcher, Overloaded
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_concurrent_requests_are_micro_batched():
+    async def scenario():
+        service = EstimationService(port=0, max_delay=0.01)
+        await service.start()
+        try:
+            sites = [{"region": "US", "annual_kwh": 1000.0 * i, "car_count": i} for i in range(1, 21)]
+            replies = await asyncio.gather(*(_request(service.port, "POST", "/estimate", s) for s in sites))
+            quick = await _request(service.port, "POST", "/quick", {"monthly_bill_ntd": 5000, "car_count": 2})
+            bulk = await _request(service.port, "POST", "/bulk", {"sites": sites[:3]})
+            bad = await _request(service.port, "POST", "/estimate", {"nope": 1})
+            ready = await _request(service.port, "GET", "/readyz")
+            return replies, quick, bulk, bad, ready, service.batcher.batches
+        finally:
+            await service.stop()
+
+    replies, quick, bulk, bad, ready, batches = asyncio.run(scenario())
+
+    expected = [estimate(Inputs(region="US", annual_kwh=1000.0 * i, car_count=i)) for i in range(1, 21)]
+    assert [body for _, body in replies] == expected
+    assert batches < 20
+    assert quick == (200, quick_estimate_from_monthly_bill(5000, 2))
+    assert bulk == (200, {"results": expected[:3]})
+    assert bad[0] == 400
+    assert ready == (200, {"ready": True, "queued": 0})
+
+
+def test_full_queue_applies_backpressure():
+    async def scenario():
+        batcher = MicroBatcher(max_pending=1)  # not started, so nothing drains
+        batcher.submit(Inputs())
+        with pytest.raises(Overloaded):
+            batcher.submit(Inputs())
+
+    asyncio.run(scenario())
+
+
+def test_malformed_content_length_is_rejected():
+    async def raw(port, length):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"POST /estimate HTTP/1.1\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n{{}}".encode())
+        await writer.drain()
+        reply = await reader.read()
+        writer.close()
+        head, _, body = reply.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    async def scenario():
+        service = EstimationService(port=0)
+        await service.start()
+        try:
+            return [await raw(service.port, length) for length in ("abc", "-1", "2")]
+        finally:
+            await service.stop()
+
+    garbled, negative, ok = asyncio.run(scenario())
+    assert garbled == negative == (400, {"error": "invalid Content-Length"})
+    assert ok == (200, estimate(Inputs()))
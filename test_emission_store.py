@@ -0,0 +1,76 @@
+"""
+Tests for the persistent result store (emission_store)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch, inputs_to_columns
+from emission_calc import Inputs, estimate
+from emission_store import ResultStore
+
+INPUTS = [
+    Inputs(region="TW", monthly_bill_ntd=5000, car_count=2, use_rule_of_thumb=True),
+    Inputs(region="US", mode="detail", annual_kwh=200000, gasoline_liters_year=900, include_scope3=True,
+           water_m3_year=100),
+    Inputs(region="TW", annual_kwh=80000, refrigerant_leak_kg=2, refrigerant_gwp=2088),
+]
+SITES = ["S1", "S2", "S3"]
+
+
+def test_bulk_insert_round_trips_inputs_and_results(tmp_path):
+    columns = inputs_to_columns(INPUTS)
+    with ResultStore(tmp_path / "store.db") as store:
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        results = store.estimate_and_save(SITES, "2024", columns)
+        rows = store.query(period="2024")
+
+        assert rows["site_id"].tolist() == SITES
+        assert rows["factor_version"].tolist() == ["builtin:2024"] * 3
+        np.testing.assert_array_equal(rows["annual_kwh"], columns["annual_kwh"])   # NaN survives as NULL
+        assert rows["use_rule_of_thumb"].tolist() == [True, False, False]
+        assert rows["Total_S1S2"].tolist() == results["Total_S1S2"].tolist()
+        assert store.get("S2", "2024") == estimate(INPUTS[1])
+
+
+def test_replace_range_and_aggregate_queries():
+    store = ResultStore()
+    columns = inputs_to_columns(INPUTS)
+    for period in ("2023", "2024-06", "2024-12"):
+        store.estimate_and_save(SITES, period, columns)
+    store.save("S1", "2024-12", INPUTS[1], estimate(INPUTS[1]))   # replaces the S1 row
+
+    assert store.count() == 9
+    assert store.history("S1", start="2024", end="2024-12")["period"].tolist() == ["2024-06", "2024-12"]
+    assert store.query(region="US", year=2024, columns=("site_id",))["site_id"].tolist() == ["S1", "S2", "S2"]
+
+    totals = estimate_batch(columns)["Total_S1S2"]
+    by_region = store.aggregate(by=("region",), period="2024-06")
+    assert by_region["region"].tolist() == ["TW", "US"]
+    assert by_region["Sites"].tolist() == [2, 1]
+    assert by_region["Total_S1S2"] == pytest.approx([totals[0] + totals[2], totals[1]])
+    by_year = store.aggregate(by=("year",), measures=("Scope2_Electricity",))
+    assert by_year["year"].tolist() == [2023, 2024]
+    with pytest.raises(ValueError):
+        store.aggregate(by=("site_id; DROP TABLE estimates",))
+
+
+def test_period_range_spans_granularities_and_reads_do_not_commit():
+    store = ResultStore()
+    columns = inputs_to_columns(INPUTS)
+    for period in ("2023-Q4", "2024-Q1", "2024-H2", "2024-03", "2025"):
+        store.estimate_and_save(SITES, period, columns)
+
+    def periods(**filters):
+        return sorted(set(store.query(("period",), **filters)["period"].tolist()))
+
+    assert periods(start="2024", end="2024-12") == ["2024-03", "2024-H2", "2024-Q1"]
+    assert periods(end="2024") == ["2023-Q4", "2024-03", "2024-H2", "2024-Q1"]
+    assert periods(start="2024-02", end="2024-Q1") == ["2024-03"]
+    assert periods(start="2024-Q3") == ["2024-H2", "2025"]
+
+    # A read with key lists leaves the caller's open transaction alone
+    store.conn.execute("DELETE FROM estimates WHERE site_id = 'S3'")
+    assert store.count(site_ids=["S1", "S3"]) == 5
+    assert store.count(exclude_ids=store.query(("id",), site_ids=["S1"])["id"]) == 5
+    store.conn.rollback()
+    assert store.count(site_ids=["S3"]) == 5
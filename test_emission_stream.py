@@ -0,0 +1,71 @@
+"""
+Tests for the streaming CSV/JSONL estimator (emission_stream)
+"""
+import csv
+import gzip
+import json
+
+import pytest
+
+from emission_calc import Inputs, estimate
+from emission_stream import estimate_file, main
+
+
+def _write_sites(path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_id", "region", "kwh", "monthly_bill_ntd", "car_count", "use_rule_of_thumb"])
+        writer.writerow(["A", "TW", "500000", "", "5", "false"])
+        writer.writerow(["B", "US", "", "3000", "2", "true"])
+        writer.writerow(["C", "JP", "", "", "", "0"])
+
+
+def test_estimate_file_csv_matches_estimate(tmp_path):
+    """Chunked CSV output equals estimate() and keeps pass-through columns"""
+    source = tmp_path / "sites.csv"
+    output = tmp_path / "results.jsonl"
+    _write_sites(source)
+
+    stats = estimate_file(source, output, chunk_size=2, column_map={"kwh": "annual_kwh"}, keep=["site_id"])
+
+    assert stats["rows"] == 3
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    expected = [
+        estimate(Inputs(region="TW", annual_kwh=500000, car_count=5)),
+        estimate(Inputs(region="US", monthly_bill_ntd=3000, car_count=2, use_rule_of_thumb=True)),
+        estimate(Inputs(region="JP")),
+    ]
+    assert [r.pop("site_id") for r in records] == ["A", "B", "C"]
+    assert records == expected
+
+
+def test_cli_writes_csv(tmp_path, capsys):
+    source = tmp_path / "sites.csv"
+    output = tmp_path / "results.csv.gz"
+    _write_sites(source)
+
+    assert main([str(source), "-o", str(output), "--map", "kwh=annual_kwh", "--quiet"]) == 0
+
+    assert "rows/s" in capsys.readouterr().err
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Region"] for row in rows] == ["TW", "US", "JP"]
+
+
+def test_bad_cells_name_their_row_and_nan_writes_null(tmp_path):
+    source = tmp_path / "sites.csv"
+    source.write_text("site_id,kwh\nA,100\nB,nan\nC,12;5\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 3, column 'kwh'"):
+        estimate_file(source, tmp_path / "bad.jsonl", chunk_size=2, column_map={"kwh": "annual_kwh"})
+
+    source.write_text("site_id,kwh,car_count\nA,100,1\nB,100,nan\n", encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    estimate_file(source, output, column_map={"kwh": "annual_kwh"}, keep=["site_id"])
+
+    def reject(constant):
+        raise ValueError(constant)
+
+    records = [json.loads(line, parse_constant=reject) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert records[0]["Scope1_Vehicles"] > 0
+    assert records[1]["site_id"] == "B" and records[1]["Scope1_Vehicles"] is None
+    assert records[1]["Share_Percent"]["Vehicles"] is None
@@ -0,0 +1,76 @@
+"""
+Tests for grid subregions (emission_subregions)
+"""
+import numpy as np
+import pytest
+
+from emission_batch import estimate_batch
+from emission_calc import Inputs, estimate
+from emission_factors import FactorRegistry
+from emission_subregions import (
+    GridIndex,
+    PostalRangeIndex,
+    SubregionResolver,
+    read_subregion_factors,
+    registry_with_subregions,
+)
+
+
+def _postal_index(tmp_path):
+    path = tmp_path / "ranges.csv"
+    path.write_text(
+        "country,start,end,subregion\n"
+        "US,90000,96199,CAMX\n"
+        "US,10000,14999,NYUP\n"
+        "US,00501,00544,NYLI\n"
+        "CN,510000,529999,GD\n"
+    )
+    return PostalRangeIndex.from_csv(path)
+
+
+def test_postal_ranges_resolve_zip_plus_four_and_misses(tmp_path):
+    index = _postal_index(tmp_path)
+    country = ["US", "US", "US", "US", "CN", "CN", "JP", "US"]
+    postal = ["94105-1234", "10001", "00501", "20500", "518000", "100000", "100-0001", "ABCDE"]
+
+    assert index.lookup(country, postal).tolist() == ["US-CAMX", "US-NYUP", "US-NYLI", "", "CN-GD", "", "", ""]
+    with pytest.raises(ValueError):
+        PostalRangeIndex(["US", "US"], {"US": 5}, [100, 150], [200, 300], ["US-A", "US-B"])
+
+
+def test_grid_index_from_polygons_save_and_load(tmp_path):
+    grid = GridIndex.from_polygons({
+        "US-WEST": [[(-125, 32), (-114, 32), (-114, 42), (-125, 42)]],
+        "US-DONUT": [[(-100, 30), (-90, 30), (-90, 40), (-100, 40)], [(-97, 33), (-93, 33), (-93, 37), (-97, 37)]],
+    }, resolution=0.25)
+    grid.save(tmp_path / "grid.npz")
+    loaded = GridIndex.load(tmp_path / "grid.npz")
+
+    lat = [37.77, 31.0, 35.0, 35.0, np.nan]
+    lon = [-122.42, -95.0, -95.0, -80.0, -95.0]
+    assert loaded.lookup(lat, lon).tolist() == ["US-WEST", "US-DONUT", "", "", ""]
+
+    resolver = SubregionResolver(grid=loaded)
+    assert resolver.resolve(["US", "US", "US", "US", "TW"], lat=lat, lon=lon).tolist() == \
+        ["US-WEST", "US-DONUT", "US", "US", "TW"]
+
+
+def test_subregion_factors_drive_batch_and_scalar_estimates(tmp_path):
+    path = tmp_path / "egrid.csv"
+    path.write_text("country,subregion,grid_ef\nUS,CAMX,0.20\nUS,NYUP,0.11\nUS,RMPA,0.55\n")
+    registry = registry_with_subregions(read_subregion_factors(path, source="egrid", year=2022),
+                                        base=FactorRegistry.builtin())
+    assert set(registry.versions()) == {"builtin:2024", "egrid:2022"}
+
+    resolver = SubregionResolver(postal=_postal_index(tmp_path))
+    regions = resolver.resolve(["US", "US", "CN", "US"], postal=["94105", "12345", "518000", "20500"])
+    results = estimate_batch({"region": regions, "annual_kwh": np.full(4, 100000.0)},
+                             factor_set=registry.factor_set("egrid:2022"))
+
+    # CN-GD and the unresolved US site fall back to the country factors
+    assert regions.tolist() == ["US-CAMX", "US-NYUP", "CN-GD", "US"]
+    assert results["Grid_EF"].tolist() == [0.20, 0.11, 0.581, 0.386]
+    assert results["Region"].tolist() == regions.tolist()
+    scalar = estimate(Inputs(region="US-CAMX", annual_kwh=100000.0), registry.factor_set("egrid:2022"))
+    assert (scalar["Scope2_Electricity"], scalar["Region"], scalar["Grid_EF"]) == (20.0, "US-CAMX", 0.2)
+    assert estimate(Inputs(region="CN-GD", annual_kwh=1000.0))["Grid_EF"] == 0.581
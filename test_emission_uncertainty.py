@@ -0,0 +1,50 @@
+"""
+Tests for the Monte Carlo uncertainty engine (emission_uncertainty)
+"""
+import numpy as np
+
+from emission_batch import estimate_batch
+from emission_uncertainty import FLEET, REFRIGERANT_LEAK, UncertaintySpec, _site_lognormal, estimate_uncertainty
+
+COLUMNS = {
+    "region": np.array(["TW", "US", "JP"]),
+    "annual_kwh": np.array([500000.0, np.nan, 20000.0]),
+    "monthly_bill_ntd": np.array([np.nan, 900.0, np.nan]),
+    "price_per_kwh_ntd": np.array([4.4, 0.12, 25.0]),
+    "car_count": np.array([5.0, 2.0, 0.0]),
+    "refrigerant_leak_kg": np.array([5.0, 0.0, 1.0]),
+    "use_rule_of_thumb": np.array([False, True, False]),
+}
+
+
+def test_zero_uncertainty_collapses_to_point_estimate():
+    spec = UncertaintySpec(0, 0, 0, (0.1, 0.1, 0.1), 0, 0, 0, 0)
+
+    bands = estimate_uncertainty(COLUMNS, draws=50, spec=spec, seed=0)
+
+    point = estimate_batch(COLUMNS, round_output=False)
+    for name, values in bands.items():
+        np.testing.assert_allclose(values, np.repeat(point[name][:, None], 3, axis=1))
+
+
+def test_bands_are_ordered_and_reproducible_across_chunk_sizes():
+    one_site_blocks = estimate_uncertainty(COLUMNS, draws=2000, seed=7, max_cells=2000)
+    two_site_blocks = estimate_uncertainty(COLUMNS, draws=2000, seed=7, max_cells=4000)
+    one_block = estimate_uncertainty(COLUMNS, draws=2000, seed=7)
+
+    total = one_site_blocks["Total_S1S2"]
+    assert np.all(total[:, 0] <= total[:, 1]) and np.all(total[:, 1] <= total[:, 2])
+    assert total.shape == (3, 3)
+    for name, values in one_site_blocks.items():
+        assert np.array_equal(values, two_site_blocks[name])
+        assert np.array_equal(values, one_block[name])
+
+
+def test_site_streams_are_independent_of_the_block():
+    key = np.random.SeedSequence(3).generate_state(2, np.uint64)
+    block = _site_lognormal(key, FLEET, np.arange(0, 400), 0.3, 4001)
+    alone = _site_lognormal(key, FLEET, np.array([250]), 0.3, 4001)
+
+    assert np.array_equal(block[:, 250], alone[:, 0])
+    assert abs(block.mean() - 1) < 0.01 and abs(block.std() - 0.3) < 0.01
+    assert not np.array_equal(block[:, 250], _site_lognormal(key, REFRIGERANT_LEAK, np.array([250]), 0.3, 4001)[:, 0])